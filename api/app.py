@@ -0,0 +1,181 @@
+"""
+HTTP service for the material ETL pipeline and the BOM report.
+
+Run with any ASGI server, e.g.:
+    uvicorn api.app:app
+"""
+
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from api.jobs import JobManager, ReportCache
+from config import settings
+from core.services.material_service import material_service_scope
+from core.services.metrics import RunMetrics, to_prometheus
+
+app = FastAPI(title="Pandas Factory BOM service")
+jobs = JobManager()
+report_cache = ReportCache()
+latest_runs: Dict[str, RunMetrics] = {}
+
+
+def record_run(metrics: RunMetrics) -> Dict[str, Any]:
+    """
+    Keeps the metrics of the latest run of each kind for /metrics and returns its summary.
+    """
+
+    latest_runs[metrics.run] = metrics
+    return metrics.summary()
+
+
+def run_import(file_path: Path, mode: str, uploaded: bool = False) -> Dict[str, Any]:
+    """
+    Imports a file and refreshes the BOM report: fully, or for the changed slices only
+    in incremental mode. An uploaded file is deleted afterwards, whether or not the
+    import succeeded.
+    """
+
+    try:
+        with material_service_scope() as service:
+            if mode == "incremental":
+                loaded = service.run_incremental_import(file_path)
+                runs = [record_run(service.metrics)]
+                service.refresh_bom_report(service.changed_slices or set())
+            else:
+                loaded = service.run_import_pipeline(file_path)
+                runs = [record_run(service.metrics)]
+                service.refresh_bom_report()
+            runs.append(record_run(service.metrics))
+            report_rows = service.count_bom_report()
+    finally:
+        if uploaded:
+            file_path.unlink(missing_ok=True)
+
+    return {"rows_loaded": loaded, "report_rows": report_rows, "metrics": runs}
+
+
+def run_bom_refresh() -> Dict[str, Any]:
+    """
+    Recalculates the whole BOM report.
+    """
+
+    with material_service_scope() as service:
+        service.refresh_bom_report()
+        return {
+            "report_rows": service.count_bom_report(),
+            "metrics": [record_run(service.metrics)],
+        }
+
+
+def report_csv() -> Iterator[bytes]:
+    """
+    Streams the BOM report from the database as CSV, batch by batch.
+    """
+
+    with material_service_scope() as service:
+        for number, batch in enumerate(service.iter_bom_report()):
+            yield batch.to_csv(index=False, header=number == 0).encode()
+
+
+@app.post("/imports", status_code=202)
+async def create_import(
+    request: Request,
+    filename: Optional[str] = None,
+    mode: Literal["full", "incremental"] = "full",
+) -> Dict[str, str]:
+    """
+    Starts an import job. With a filename, the request body is stored as the uploaded file
+    (its suffix selects the format) and deleted once the job finishes; without one,
+    settings.INPUT_CSV_PATH is imported.
+    """
+
+    file_path = settings.INPUT_CSV_PATH
+    if filename:
+        settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        file_path = settings.UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename).suffix}"
+        try:
+            with open(file_path, "wb") as f:
+                async for chunk in request.stream():
+                    f.write(chunk)
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+
+    task = partial(run_import, file_path, mode, uploaded=bool(filename))
+    return {"job_id": jobs.submit("import", task)}
+
+
+@app.post("/reports/refresh", status_code=202)
+async def refresh_report() -> Dict[str, str]:
+    """
+    Starts a full BOM recalculation job.
+    """
+
+    return {"job_id": jobs.submit("bom_refresh", run_bom_refresh)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Returns the status of a job and, once finished, its result or error.
+    """
+
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+def report_version() -> Optional[int]:
+    """
+    Returns the raw data version the stored BOM report was built from.
+    """
+
+    with material_service_scope() as service:
+        _, version = service.repository.get_data_versions()
+    return version
+
+
+@app.get("/reports")
+def get_report() -> StreamingResponse:
+    """
+    Streams the BOM report as CSV. The report is cached per report version, so repeated reads
+    between rebuilds do not go back to the database for more than the version lookup.
+    """
+
+    return StreamingResponse(
+        report_cache.stream(report_version(), report_csv), media_type="text/csv"
+    )
+
+
+@app.get("/where-used/{component_id}")
+def get_where_used(
+    component_id: str, plant: Optional[str] = None, year: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Returns the finished goods affected by a component and every path it is used on.
+    """
+
+    with material_service_scope() as service:
+        uses = service.where_used(component_id, plant, year)
+
+    return {
+        "component_id": component_id,
+        "finished_goods": sorted(uses["fin_material_id"].unique().tolist()),
+        "uses": uses.astype(object).where(uses.notna(), None).to_dict(orient="records"),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> str:
+    """
+    Exposes the stage timings of the latest run of each kind in the Prometheus text format.
+    Stages are only timed when settings.METRICS_ENABLED is set.
+    """
+
+    return to_prometheus(list(latest_runs.values()))
@@ -0,0 +1,152 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from config import settings
+
+
+class JobManager:
+    """
+    Runs long pipeline jobs (imports, BOM explosions) on a worker pool and keeps their status.
+    Jobs that write to the database run one at a time on a single writer thread, in the
+    order they were submitted, so imports and report refreshes never interleave.
+    """
+
+    def __init__(self, workers: int = settings.API_WORKERS):
+        """
+        Initializes the worker pool, the writer thread and an empty job table.
+        """
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bom-job"
+        )
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="bom-writer"
+        )
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, task: Callable[[], Any], writes: bool = True) -> str:
+        """
+        Queues a task and returns the id of the new job. Tasks that write go to the
+        writer thread, read-only tasks to the worker pool.
+        """
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": "pending",
+                "result": None,
+                "error": None,
+                "created_at": datetime.now(timezone.utc),
+                "finished_at": None,
+            }
+
+        executor = self._writer if writes else self._executor
+        executor.submit(self._run, job_id, task)
+        logger.info(f"Job {job_id} ({kind}) queued.")
+        return job_id
+
+    def _run(self, job_id: str, task: Callable[[], Any]) -> None:
+        """
+        Executes a task and records its result or error.
+        """
+
+        self._update(job_id, status="running")
+        try:
+            result = task()
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            self._update(job_id, status="failed", error=str(e))
+            return
+
+        self._update(job_id, status="done", result=result)
+        logger.success(f"Job {job_id} finished.")
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        """
+        Updates the stored fields of a job.
+        """
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            if fields.get("status") in ("done", "failed"):
+                job["finished_at"] = datetime.now(timezone.utc)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a snapshot of a job, or None if the id is unknown.
+        """
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self) -> None:
+        """
+        Waits for running jobs and stops the worker pool and the writer thread.
+        """
+
+        self._executor.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+
+class ReportCache:
+    """
+    Keeps the serialized BOM report of one report version in memory, so repeated reads
+    of an unchanged report are served without touching the database. Versions come from
+    the data_versions table, so a report rebuilt by another process is never served stale.
+    """
+
+    def __init__(self, max_bytes: int = settings.REPORT_CACHE_MAX_BYTES):
+        """
+        Initializes an empty cache holding at most max_bytes of report data.
+        """
+
+        self.max_bytes = max_bytes
+        self.version: Optional[int] = None
+        self._chunks: List[bytes] = []
+        self._lock = threading.Lock()
+
+    def stream(
+        self, version: Optional[int], source: Callable[[], Iterator[bytes]]
+    ) -> Iterator[bytes]:
+        """
+        Yields the cached report of the given version, or streams it from source and
+        caches it on the way when it fits into max_bytes. A report without a version
+        (never built) is streamed without caching.
+        """
+
+        if version is None:
+            yield from source()
+            return
+
+        with self._lock:
+            cached = list(self._chunks) if self.version == version else None
+
+        if cached is not None:
+            logger.debug(f"Serving BOM report version {version} from cache.")
+            yield from cached
+            return
+
+        chunks: Optional[List[bytes]] = []
+        size = 0
+        for chunk in source():
+            if chunks is not None:
+                size += len(chunk)
+                if size <= self.max_bytes:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+            yield chunk
+
+        if chunks is not None:
+            with self._lock:
+                self.version, self._chunks = version, chunks
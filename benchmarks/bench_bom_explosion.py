@@ -0,0 +1,90 @@
+"""
+Compares the in-memory BOM explosion engine with the recursive CTE in bom_explosion.sql.
+
+The bundled factory_data.csv is replicated --scale times under new plant IDs,
+which keeps the real hierarchy shape while growing the data.
+
+Usage:
+    python -m benchmarks.bench_bom_explosion --scale 100
+    python -m benchmarks.bench_bom_explosion --scale 100 --db-url postgresql+psycopg://...
+"""
+
+import argparse
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from core.models import Base
+from core.repositories.raw_repository import RawDataRepository
+from core.services.bom_engine import explode_bom
+from core.services.material_service import MaterialETLService
+
+
+def scaled_data(scale: int) -> pd.DataFrame:
+    """
+    Cleans the bundled CSV once and replicates it under `scale` distinct plant IDs.
+    """
+
+    service = MaterialETLService(repository=None)
+    df = service._read_csv(settings.INPUT_CSV_PATH)
+    df = service._clean_data_types(service._transform_columns(df))
+
+    copies = [
+        df.assign(plant_id=df["plant_id"].astype(str) + f"_{copy}")
+        for copy in range(scale)
+    ]
+    return pd.concat(copies, ignore_index=True)
+
+
+def time_engine(df: pd.DataFrame) -> int:
+    """
+    Explodes the data in memory and prints the timing.
+    """
+
+    started = time.perf_counter()
+    report = explode_bom(df)
+    elapsed = time.perf_counter() - started
+    print(f"in-memory   {elapsed:8.3f} s  {len(report):>12,} report rows")
+    return len(report)
+
+
+def time_cte(df: pd.DataFrame, db_url: str) -> int:
+    """
+    Loads the data into the database, runs the CTE and prints the timing (load excluded).
+    """
+
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        service = MaterialETLService(RawDataRepository(session))
+        service.repository.truncate_table()
+        service.repository.copy_insert(df)
+        service.repository.refresh_yearly_aggregate([])
+
+        started = time.perf_counter()
+        report = service.generate_bom_report()
+        elapsed = time.perf_counter() - started
+
+    print(f"CTE + fetch {elapsed:8.3f} s  {len(report):>12,} report rows")
+    return len(report)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    df = scaled_data(args.scale)
+    print(f"Raw rows: {len(df):,} ({args.scale} x bundled data)")
+
+    time_engine(df)
+    if args.db_url:
+        time_cte(df, args.db_url)
+
+
+if __name__ == "__main__":
+    main()
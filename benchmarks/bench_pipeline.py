@@ -0,0 +1,185 @@
+"""
+Times the read, clean, load and explode stages of the pipeline on synthetic factory data.
+
+Each size is generated once into a cached CSV (see benchmarks.synthetic_data). The load
+and BOM CTE stages run only with --db-url, which must point to PostgreSQL. Every run is
+appended to a JSON Lines results file together with the git revision, and compared with
+the last stored run of the same size and options, so regressions between versions show up.
+
+Usage:
+    python -m benchmarks.bench_pipeline --rows 10000 1000000 10000000
+    python -m benchmarks.bench_pipeline --rows 1000000 --db-url postgresql+psycopg://...
+"""
+
+import argparse
+import json
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.synthetic_data import (
+    add_arguments,
+    generator_options,
+    write_factory_csv,
+)
+from core.models import Base
+from core.repositories.raw_repository import RawDataRepository
+from core.services.bom_engine import explode_bom
+from core.services.material_service import MaterialETLService
+from core.services.metrics import RunMetrics
+
+RESULTS_PATH = Path(__file__).parent / "results.jsonl"
+
+
+def git_revision() -> str:
+    """
+    Returns the short git revision of the working tree, or 'unknown' outside a checkout.
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_stages(
+    path: Path, db_url: Optional[str], metrics: RunMetrics
+) -> Dict[str, Any]:
+    """
+    Runs read, clean, explode and, with a PostgreSQL URL, load and the CTE on one CSV file.
+    """
+
+    service = MaterialETLService(repository=None)
+
+    with metrics.stage("read"):
+        df = service._read_csv(path)
+    metrics.add_rows("read", len(df))
+
+    with metrics.stage("clean"):
+        df = service._clean_data_types(service._transform_columns(df))
+        service._validate_columns(df)
+    metrics.add_rows("clean", len(df))
+
+    with metrics.stage("explode"):
+        report = explode_bom(df)
+    metrics.add_rows("explode", len(report))
+
+    if db_url:
+        engine = create_engine(db_url)
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as session:
+            service.repository = RawDataRepository(session)
+
+            with metrics.stage("load"):
+                service.repository.truncate_table()
+                service.repository.reset_partition_hashes()
+                loaded = service._load(df)
+                service.repository.refresh_yearly_aggregate([])
+            metrics.add_rows("load", loaded)
+
+            with metrics.stage("cte"):
+                rows = service.generate_bom_report(force=True)
+            metrics.add_rows("cte", len(rows))
+        engine.dispose()
+
+    return metrics.summary()
+
+
+def previous_result(
+    results_path: Path, current: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns the last stored result for the same size, generator options and database.
+    """
+
+    if not results_path.exists():
+        return None
+
+    previous = None
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line)
+            if all(
+                result[key] == current[key] for key in ("rows", "options", "database")
+            ):
+                previous = result
+    return previous
+
+
+def print_result(result: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    """
+    Prints the stage timings of a run, with the change against the previous run if any.
+    """
+
+    print(f"\n{result['rows']:,} rows @ {result['revision']}")
+    if previous:
+        print(f"compared with {previous['revision']} ({previous['timestamp']})")
+
+    for name, stage in result["stages"].items():
+        line = (
+            f"  {name:<8} {stage['seconds']:9.3f} s  "
+            f"{stage['rows_per_sec'] or 0:14,.0f} rows/sec"
+        )
+        before = previous["stages"].get(name) if previous else None
+        if before and before["seconds"]:
+            change = (stage["seconds"] / before["seconds"] - 1) * 100
+            line += f"  {change:+7.1f} %"
+        print(line)
+
+    if result["peak_rss_bytes"]:
+        print(f"  peak RSS {result['peak_rss_bytes'] / 2**20:9.0f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--data-dir", type=Path, default=Path("/tmp"))
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--results", type=Path, default=RESULTS_PATH)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    options = generator_options(args)
+    suffix = "_".join(f"{value}" for value in options.values())
+
+    results: List[Dict[str, Any]] = []
+    for rows in args.rows:
+        path = args.data_dir / f"factory_bench_{rows}_{suffix}.csv"
+        if not path.exists():
+            print(f"Generating {rows:,} rows into {path}...")
+            write_factory_csv(path, rows, **options)
+
+        summary = run_stages(path, args.db_url, RunMetrics("benchmark", enabled=True))
+        result = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "rows": rows,
+            "options": options,
+            "database": (
+                make_url(args.db_url).get_backend_name() if args.db_url else None
+            ),
+            "stages": summary["stages"],
+            "peak_rss_bytes": summary["peak_rss_bytes"],
+        }
+        print_result(result, previous_result(args.results, result))
+        results.append(result)
+
+    with open(args.results, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    print(f"\nResults appended to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Generates synthetic factory data in the raw CSV layout of factory_data.csv.
+
+Every plant gets finished goods whose BOM is a tree of the given depth and fan-out:
+finished goods (FIN) consume semi-finished materials (PROD), and the last level consumes
+raw materials and additives drawn from a shared per-plant pool. Each BOM edge appears
+once per (year, month). A share of the values is written the way dirty exports write
+them: quantities with thousands separators, empty quantities and NaN-like material IDs.
+
+Usage:
+    python -m benchmarks.synthetic_data --rows 1000000 --output /tmp/factory_1m.csv
+"""
+
+import argparse
+import math
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = [
+    "year",
+    "month",
+    "produced_material",
+    "produced_material_production_type",
+    "produced_material_release_type",
+    "produced_material_quantity",
+    "component_material",
+    "component_material_production_type",
+    "component_material_release_type",
+    "component_material_quantity",
+    "plant_id",
+]
+BAD_IDS = ["nan", "NaN", "null", ""]
+FIRST_ID = 10_000
+RAW_POOL_SIZE = 500
+
+
+def tree_edges(depth: int, fan_out: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (parent, child, level) node numbers of one BOM tree, root 0, in breadth-first order.
+    """
+
+    parents, children, levels = [], [], []
+    level_nodes = np.array([0])
+    next_node = 1
+    for level in range(1, depth + 1):
+        count = len(level_nodes) * fan_out
+        parents.append(np.repeat(level_nodes, fan_out))
+        children.append(np.arange(next_node, next_node + count))
+        levels.append(np.full(count, level))
+        level_nodes = children[-1]
+        next_node += count
+
+    return np.concatenate(parents), np.concatenate(children), np.concatenate(levels)
+
+
+def finished_goods_for(
+    rows: int, plants: int, years: int, months: int, depth: int, fan_out: int
+) -> int:
+    """
+    Returns how many finished goods per plant give at least `rows` rows in total.
+    """
+
+    edges = len(tree_edges(depth, fan_out)[0])
+    return max(1, math.ceil(rows / (plants * years * months * edges)))
+
+
+def _format_quantities(
+    rng: np.random.Generator, values: np.ndarray, dirty_ratio: float
+) -> np.ndarray:
+    """
+    Formats quantities as CSV text; a dirty_ratio share gets thousands separators
+    and a tenth of that share is left empty.
+    """
+
+    text = np.char.mod("%.2f", values).astype(object)
+    dirty = rng.random(len(values)) < dirty_ratio
+    text[dirty] = [f"{value:,.2f}" for value in values[dirty]]
+    text[rng.random(len(values)) < dirty_ratio / 10] = ""
+    return text
+
+
+def iter_factory_data(
+    rows: int,
+    plants: int = 3,
+    years: int = 1,
+    months: int = 12,
+    depth: int = 3,
+    fan_out: int = 3,
+    dirty_ratio: float = 0.05,
+    nan_id_ratio: float = 0.001,
+    first_year: int = 2024,
+    seed: int = 42,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the synthetic raw rows one (plant, year) slice at a time, so large data sets
+    can be written without holding them in memory. The total is `rows` rounded up to
+    whole BOM trees.
+    """
+
+    rng = np.random.default_rng(seed)
+    parent, child, level = tree_edges(depth, fan_out)
+    nodes = len(child) + 1
+    goods = finished_goods_for(rows, plants, years, months, depth, fan_out)
+
+    tree = np.repeat(np.arange(goods), len(child))
+    parent_ids = FIRST_ID + tree * nodes + np.tile(parent, goods)
+    child_ids = FIRST_ID + tree * nodes + np.tile(child, goods)
+    edge_level = np.tile(level, goods)
+
+    leaf = edge_level == depth
+    pool_start = FIRST_ID + goods * nodes
+    child_ids[leaf] = rng.integers(pool_start, pool_start + RAW_POOL_SIZE, leaf.sum())
+
+    produced_release = np.where(np.tile(parent, goods) == 0, "FIN", "PROD")
+    component_release = np.where(
+        leaf, rng.choice(["RM", "ADD"], len(leaf), p=[0.8, 0.2]), "PROD"
+    )
+    node_type = rng.choice(["8002", "8007"], goods * nodes)
+    produced_type = node_type[parent_ids - FIRST_ID]
+    component_type = np.where(
+        leaf, "", node_type[np.minimum(child_ids - FIRST_ID, len(node_type) - 1)]
+    )
+
+    for plant in range(plants):
+        for year in range(first_year, first_year + years):
+            size = len(leaf) * months
+            produced = parent_ids.astype(str).astype(object)
+            produced = np.tile(produced, months)
+            bad = rng.random(size) < nan_id_ratio
+            produced[bad] = rng.choice(BAD_IDS, bad.sum())
+
+            yield pd.DataFrame(
+                {
+                    "year": year,
+                    "month": np.repeat(np.arange(1, months + 1), len(leaf)),
+                    "produced_material": produced,
+                    "produced_material_production_type": np.tile(produced_type, months),
+                    "produced_material_release_type": np.tile(produced_release, months),
+                    "produced_material_quantity": _format_quantities(
+                        rng, rng.uniform(1, 5_000, size).round(2), dirty_ratio
+                    ),
+                    "component_material": np.tile(child_ids, months),
+                    "component_material_production_type": np.tile(
+                        component_type, months
+                    ),
+                    "component_material_release_type": np.tile(
+                        component_release, months
+                    ),
+                    "component_material_quantity": _format_quantities(
+                        rng, rng.uniform(1, 5_000, size).round(2), dirty_ratio
+                    ),
+                    "plant_id": f"RLT_{10 + plant}",
+                },
+                columns=RAW_COLUMNS,
+            )
+
+
+def generate_factory_data(rows: int, **options) -> pd.DataFrame:
+    """
+    Returns the synthetic raw rows as one DataFrame. Options are those of iter_factory_data.
+    """
+
+    return pd.concat(iter_factory_data(rows, **options), ignore_index=True)
+
+
+def write_factory_csv(path: Path, rows: int, **options) -> int:
+    """
+    Writes the synthetic raw rows to a CSV file slice by slice and returns the row count.
+    """
+
+    written = 0
+    for number, frame in enumerate(iter_factory_data(rows, **options)):
+        frame.to_csv(
+            path, index=False, header=number == 0, mode="w" if not number else "a"
+        )
+        written += len(frame)
+    return written
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the generator options to a command line parser.
+    """
+
+    parser.add_argument("--plants", type=int, default=3)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=3)
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument("--nan-id-ratio", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def generator_options(args: argparse.Namespace) -> dict:
+    """
+    Collects the generator options from parsed command line arguments.
+    """
+
+    return {
+        "plants": args.plants,
+        "years": args.years,
+        "months": args.months,
+        "depth": args.depth,
+        "fan_out": args.fan_out,
+        "dirty_ratio": args.dirty_ratio,
+        "nan_id_ratio": args.nan_id_ratio,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--output", type=Path, required=True)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    written = write_factory_csv(args.output, args.rows, **generator_options(args))
+    print(f"Wrote {written:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
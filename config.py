@@ -11,8 +11,11 @@ class Settings:
     MP3_DIR = BASE_DIR / "resources" / "mp3"
     SQL_DIR = BASE_DIR / "core" / "sql" / "procedures"
     INPUT_CSV_PATH = DATA_DIR / "factory_data.csv"
+    REPORT_PARQUET_PATH = PROCESSED_DIR / "factory_report"
+    REJECTS_PATH = PROCESSED_DIR / "rejects"
     SQL_BOM_SCRIPT_PATH = SQL_DIR / "bom_explosion.sql"
     MUSIC_PATH = MP3_DIR / "background.mp3"
+    UPLOAD_DIR = DATA_DIR / "uploads"
 
     POSTGRES_USER = os.getenv("POSTGRES_USER", "root")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "root")
@@ -25,11 +28,53 @@ class Settings:
 
     DB_URL = f"postgresql+psycopg://{_user}:{_pwd}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
     RENAME_MAP = {
         "produced_material": "produced_material_id",
         "component_material": "component_material_id",
     }
     ID_COLUMNS = ["produced_material_id", "component_material_id", "plant_id"]
+    TYPE_COLUMNS = [
+        "produced_material_production_type",
+        "produced_material_release_type",
+        "component_material_production_type",
+        "component_material_release_type",
+    ]
+
+    # Creates raw_factory_data and bom_reports partitioned by year and plant (PostgreSQL only).
+    # Has to match how the tables were created.
+    PARTITION_TABLES = os.getenv("PARTITION_TABLES", "false").lower() == "true"
+
+    COMPACT_DTYPES = os.getenv("COMPACT_DTYPES", "true").lower() == "true"
+    QUANTITY_DTYPE = os.getenv("QUANTITY_DTYPE", "float64")
+
+    # Where rows rejected by data-quality rules go: "table", "parquet" or "none"
+    REJECTS_SINK = os.getenv("REJECTS_SINK", "table").lower()
+
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "100000"))
+    USE_COPY_LOADER = os.getenv("USE_COPY_LOADER", "true").lower() == "true"
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", os.cpu_count() or 1))
+    IMPORT_QUEUE_SIZE = int(os.getenv("IMPORT_QUEUE_SIZE", "4"))
+    IMPORT_IN_FLIGHT = int(os.getenv("IMPORT_IN_FLIGHT", "2"))
+
+    # How the database-backed service explodes the BOM: "sql" runs bom_explosion.sql,
+    # "parallel" explodes the yearly aggregate on BOM_WORKERS processes in Python
+    BOM_ENGINE = os.getenv("BOM_ENGINE", "sql").lower()
+    BOM_WORKERS = int(os.getenv("BOM_WORKERS", os.cpu_count() or 1))
+    BOM_PARALLEL_MIN_ROWS = int(os.getenv("BOM_PARALLEL_MIN_ROWS", "100000"))
+    BOM_MAX_DEPTH = int(os.getenv("BOM_MAX_DEPTH", "50"))
+    REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", "50000"))
+    SCENARIO_CACHE_SIZE = int(os.getenv("SCENARIO_CACHE_SIZE", "32"))
+
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+    API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+    REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 2**20)))
 
 
 settings = Settings()
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+from loguru import logger
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+
+
+class Database:
+    """
+    Owns the pooled sync and async engines for one database URL and hands out
+    short-lived sessions, so jobs reuse warm connections instead of reconnecting.
+    """
+
+    def __init__(self, url: str = settings.DB_URL):
+        """
+        Creates the sync engine with the pool settings from config. The async engine
+        is created on first use.
+        """
+
+        self.url = url
+        self.engine: Engine = create_engine(url, **self._engine_options())
+        self.session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self._async_engine: Optional[AsyncEngine] = None
+
+    @property
+    def backend(self) -> str:
+        """
+        Returns the backend name of the URL, e.g. 'postgresql' or 'sqlite'.
+        """
+
+        return make_url(self.url).get_backend_name()
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """
+        Returns the async engine for the same URL, creating it with the same pool settings.
+        """
+
+        if self._async_engine is None:
+            logger.debug("Creating async engine...")
+            self._async_engine = create_async_engine(self.url, **self._engine_options())
+        return self._async_engine
+
+    def _engine_options(self) -> Dict[str, Any]:
+        """
+        Builds the pool and connection options. Pool sizing and the statement timeout
+        apply to server databases only; SQLite keeps its default pool.
+        """
+
+        if self.backend == "sqlite":
+            return {}
+
+        options: Dict[str, Any] = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        }
+        if self.backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            }
+        return options
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """
+        Provides a session for one job. Uncommitted work is rolled back on error and the
+        connection goes back to the pool when the job ends.
+        """
+
+        session = self.session_factory()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def dispose(self) -> None:
+        """
+        Closes all pooled connections of the sync engine.
+        """
+
+        self.engine.dispose()
+
+    async def dispose_async(self) -> None:
+        """
+        Closes all pooled connections of the async engine, if it was created.
+        """
+
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+
+@lru_cache(maxsize=None)
+def get_database(url: str = settings.DB_URL) -> Database:
+    """
+    Returns the process-wide Database for a URL, so every job shares one pool.
+    """
+
+    return Database(url)
@@ -0,0 +1,62 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+CATEGORY_DTYPE = "category"
+INTEGER_COLUMNS = ["year", "month"]
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """
+    Returns the memory held by a DataFrame in bytes, including string payloads.
+    """
+
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    category_columns: Iterable[str],
+    quantity_columns: Iterable[str],
+    quantity_dtype: str = "float64",
+) -> pd.DataFrame:
+    """
+    Stores repeated labels as categoricals, downcasts year/month to the smallest integer type
+    and casts quantities to quantity_dtype (float32 halves them at ~7 significant digits).
+    """
+
+    compact = {}
+    for col in category_columns:
+        if col in df.columns and df[col].dtype != CATEGORY_DTYPE:
+            compact[col] = df[col].astype(CATEGORY_DTYPE)
+
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and is_integer_dtype(df[col]):
+            compact[col] = pd.to_numeric(df[col], downcast="integer")
+
+    for col in quantity_columns:
+        if col in df.columns:
+            compact[col] = df[col].astype(quantity_dtype)
+
+    return df.assign(**compact)
+
+
+def decode_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns compact columns back into the plain types the database driver binds:
+    categoricals into their labels, small integers into int64 and float32 into float64
+    with the decimal value it was parsed from (2843.17, not 2843.169921875).
+    """
+
+    decoded = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            decoded[col] = df[col].astype(dtype.categories.dtype)
+        elif isinstance(dtype, np.dtype) and dtype.kind in "iu" and dtype.itemsize < 8:
+            decoded[col] = df[col].astype(np.int64)
+        elif dtype == np.float32:
+            decoded[col] = df[col].astype(str).astype(np.float64)
+
+    return df.assign(**decoded) if decoded else df
@@ -1,3 +1,8 @@
 from .base import Base, BaseModel
+from .bom_diagnostic import BomDiagnostic
+from .data_version import DataVersion
 from .processed_data import BomReport
 from .raw_data import RawFactoryData
+from .raw_partition import RawDataPartition
+from .raw_yearly import RawFactoryYearly
+from .reject import Reject
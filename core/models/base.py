@@ -1,8 +1,11 @@
 from datetime import datetime
+from typing import Dict
 
 from sqlalchemy import DateTime, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from config import settings
+
 
 class Base(DeclarativeBase):
     """
@@ -32,3 +35,15 @@ class BaseModel(Base):
         onupdate=func.now(),
         comment="Data of updating",
     )
+
+
+def partition_options() -> Dict[str, str]:
+    """
+    Returns the table options that declare a table partitioned by year in PostgreSQL when
+    settings.PARTITION_TABLES is on. Year partitions are listed by plant and created by the
+    repository as data arrives; year and plant join the primary key, as PostgreSQL requires.
+    """
+
+    if not settings.PARTITION_TABLES:
+        return {}
+    return {"postgresql_partition_by": "LIST (year)"}
@@ -0,0 +1,22 @@
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class BomDiagnostic(BaseModel):
+    """
+    Records BOM paths the explosion could not expand: cycles, where a component produces
+    one of its own ancestors, and paths cut at the configured maximum depth.
+    """
+
+    __tablename__ = "bom_diagnostics"
+    __table_args__ = (Index("ix_bom_diagnostics_slice", "plant", "year"),)
+
+    plant: Mapped[str] = mapped_column(String(50))
+    year: Mapped[int] = mapped_column(Integer)
+    fin_material_id: Mapped[str] = mapped_column(String(50))
+
+    reason: Mapped[str] = mapped_column(String(20))
+    level: Mapped[int] = mapped_column(Integer)
+    path: Mapped[str] = mapped_column(Text)
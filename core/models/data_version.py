@@ -0,0 +1,16 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class DataVersion(BaseModel):
+    """
+    Holds a single row with the version of the raw data, bumped by every import,
+    and the raw data version the stored BOM report was calculated from.
+    """
+
+    __tablename__ = "data_versions"
+
+    raw_version: Mapped[int] = mapped_column(Integer, default=0)
+    report_version: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -1,7 +1,8 @@
-from sqlalchemy import Float, Integer, String
+from sqlalchemy import Float, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
-from core.models.base import BaseModel
+from config import settings
+from core.models.base import BaseModel, partition_options
 
 
 class BomReport(BaseModel):
@@ -10,9 +11,23 @@ class BomReport(BaseModel):
     """
 
     __tablename__ = "bom_reports"
+    __table_args__ = (
+        Index(
+            "ix_bom_reports_report_order",
+            "plant",
+            "year",
+            "fin_material_id",
+            "component_id",
+            "id",
+        ),
+        Index("ix_bom_reports_where_used", "component_id", "plant", "year"),
+        partition_options(),
+    )
 
-    plant: Mapped[str] = mapped_column(String(50))
-    year: Mapped[int] = mapped_column(Integer)
+    plant: Mapped[str] = mapped_column(
+        String(50), primary_key=settings.PARTITION_TABLES
+    )
+    year: Mapped[int] = mapped_column(Integer, primary_key=settings.PARTITION_TABLES)
 
     fin_material_id: Mapped[str] = mapped_column(String(50))
     fin_material_release_type: Mapped[str] = mapped_column(String(50), nullable=True)
@@ -36,3 +51,12 @@ class BomReport(BaseModel):
         String(50), nullable=True
     )
     component_consumption_quantity: Mapped[float] = mapped_column(Float, nullable=True)
+
+    level: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    # Component needed per unit of the finished good along this path, and for its whole production
+    unit_requirement: Mapped[float] = mapped_column(Float, nullable=True)
+    total_requirement: Mapped[float] = mapped_column(Float, nullable=True)
+
+    # Materials from the finished good down to the component, joined with ' > '
+    path: Mapped[str] = mapped_column(Text, nullable=True)
@@ -1,7 +1,9 @@
-from sqlalchemy import Float, Integer, String
+from sqlalchemy import Float, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
-from .base import BaseModel
+from config import settings
+
+from .base import BaseModel, partition_options
 
 
 class RawFactoryData(BaseModel):
@@ -11,10 +13,16 @@ class RawFactoryData(BaseModel):
     """
 
     __tablename__ = "raw_factory_data"
+    __table_args__ = (
+        Index("ix_raw_factory_data_partition", "plant_id", "year", "month"),
+        partition_options(),
+    )
 
-    year: Mapped[int] = mapped_column(Integer)
+    year: Mapped[int] = mapped_column(Integer, primary_key=settings.PARTITION_TABLES)
     month: Mapped[int] = mapped_column(Integer)
-    plant_id: Mapped[str] = mapped_column(String(50))
+    plant_id: Mapped[str] = mapped_column(
+        String(50), primary_key=settings.PARTITION_TABLES
+    )
 
     produced_material_id: Mapped[str] = mapped_column(String(50))
     produced_material_production_type: Mapped[str] = mapped_column(
@@ -0,0 +1,25 @@
+from sqlalchemy import Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class RawDataPartition(BaseModel):
+    """
+    Tracks the content hash of every loaded (plant, year, month) partition of raw factory data,
+    so incremental imports can skip partitions that did not change.
+    """
+
+    __tablename__ = "raw_data_partitions"
+    __table_args__ = (
+        UniqueConstraint(
+            "plant_id", "year", "month", name="uq_raw_data_partitions_key"
+        ),
+    )
+
+    plant_id: Mapped[str] = mapped_column(String(50))
+    year: Mapped[int] = mapped_column(Integer)
+    month: Mapped[int] = mapped_column(Integer)
+
+    content_hash: Mapped[str] = mapped_column(String(64))
+    row_count: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,43 @@
+from sqlalchemy import Float, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class RawFactoryYearly(BaseModel):
+    """
+    Holds raw factory data rolled up to yearly totals per (plant, year, produced, component) edge.
+    It is maintained by every import and read directly by the BOM explosion.
+    """
+
+    __tablename__ = "raw_factory_yearly"
+    __table_args__ = (
+        Index(
+            "ix_raw_factory_yearly_produced",
+            "plant_id",
+            "year",
+            "produced_material_id",
+        ),
+        Index("ix_raw_factory_yearly_release_type", "produced_material_release_type"),
+    )
+
+    plant_id: Mapped[str] = mapped_column(String(50))
+    year: Mapped[int] = mapped_column(Integer)
+
+    produced_material_id: Mapped[str] = mapped_column(String(50))
+    produced_material_release_type: Mapped[str] = mapped_column(
+        String(50), nullable=True
+    )
+    produced_material_production_type: Mapped[str] = mapped_column(
+        String(50), nullable=True
+    )
+    produced_material_quantity: Mapped[float] = mapped_column(Float, nullable=True)
+
+    component_material_id: Mapped[str] = mapped_column(String(50))
+    component_material_release_type: Mapped[str] = mapped_column(
+        String(50), nullable=True
+    )
+    component_material_production_type: Mapped[str] = mapped_column(
+        String(50), nullable=True
+    )
+    component_material_quantity: Mapped[float] = mapped_column(Float, nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class Reject(BaseModel):
+    """
+    Records source rows that failed a data-quality rule during cleaning, with the rule's
+    reason code, the offending value and the full source row as JSON.
+    """
+
+    __tablename__ = "rejects"
+    __table_args__ = (Index("ix_rejects_source", "source", "source_line"),)
+
+    source: Mapped[str] = mapped_column(String(255))
+    source_line: Mapped[int] = mapped_column(Integer)
+
+    reason: Mapped[str] = mapped_column(String(50))
+    column_name: Mapped[str] = mapped_column(String(100))
+    value: Mapped[str] = mapped_column(Text, nullable=True)
+    action: Mapped[str] = mapped_column(String(20))
+    record: Mapped[str] = mapped_column(Text)
@@ -0,0 +1,197 @@
+import asyncio
+from typing import AsyncIterator, List
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from config import settings
+from core.dtypes import decode_frame
+from core.models.raw_data import RawFactoryData
+from core.models.raw_partition import RawDataPartition
+from core.repositories.raw_repository import (
+    PARTITION_CHILDREN_QUERY,
+    RawDataRepository,
+)
+
+
+class AsyncRawDataRepository:
+    """
+    Provides asynchronous bulk loading of raw factory data on an async SQLAlchemy engine.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        """
+        Initializes the repository with an async engine (e.g. postgresql+psycopg).
+        """
+
+        self.engine = engine
+
+    async def replace_all(self, frames: AsyncIterator[pd.DataFrame]) -> int:
+        """
+        Replaces all raw data with the given frames in one transaction: clears the raw table
+        and the partition hashes, streams every frame in, then rebuilds the yearly aggregate
+        and bumps the raw data version.
+        Frames are pulled one at a time, so the producer is throttled by the database.
+        A partitioned table is loaded into its reload table, whose partitions are created
+        frame by frame and swapped in at the end, so the old partitions stay readable.
+        """
+
+        table = RawFactoryData.__table__
+        async with self.engine.begin() as connection:
+            logger.debug(f"Clearing {table.name} and partition hashes...")
+            partitioned = self._partitioned(connection)
+            target = table.name
+            if partitioned:
+                target = RawDataRepository._reload_name(table.name)
+                for statement in RawDataRepository._reload_statements(table.name):
+                    await connection.execute(text(statement))
+                frames = self._with_partitions(connection, frames, target)
+            else:
+                await connection.execute(text(f"DELETE FROM {table.name};"))
+            await connection.execute(
+                text(f"DELETE FROM {RawDataPartition.__tablename__};")
+            )
+
+            if self._supports_copy(connection):
+                total = await self._copy_frames(connection, frames, target)
+            else:
+                total = await self._insert_frames(connection, frames, target)
+
+            if partitioned:
+                await self._swap_reload(connection)
+            for statement in RawDataRepository._yearly_statements("TRUE"):
+                await connection.execute(text(statement))
+            await connection.execute(text(RawDataRepository._bump_version_statement()))
+
+        return total
+
+    async def _swap_reload(self, connection: AsyncConnection) -> None:
+        """
+        Replaces the partitions of raw_factory_data with those of its reload table.
+        """
+
+        table_name = RawFactoryData.__tablename__
+        reload = RawDataRepository._reload_name(table_name)
+        old = await self._child_partitions(connection, table_name)
+        new = {
+            partition: await self._child_partitions(connection, partition)
+            for partition in await self._child_partitions(connection, reload)
+        }
+
+        logger.debug(
+            f"Swapping {len(new)} reloaded year partitions into {table_name}..."
+        )
+        statements = RawDataRepository._swap_statements(table_name, reload, old, new)
+        for statement in statements:
+            await connection.execute(text(statement))
+
+    @staticmethod
+    async def _child_partitions(
+        connection: AsyncConnection, table_name: str
+    ) -> List[str]:
+        """
+        Returns the names of the direct partitions of a table.
+        """
+
+        children = await connection.execute(
+            text(PARTITION_CHILDREN_QUERY), {"name": table_name}
+        )
+        return list(children.scalars().all())
+
+    async def _with_partitions(
+        self,
+        connection: AsyncConnection,
+        frames: AsyncIterator[pd.DataFrame],
+        target: str,
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        Creates the missing (plant, year) partitions of every frame under the target table
+        before handing it on.
+        """
+
+        async for frame in frames:
+            statements = RawDataRepository._partition_statements(
+                target,
+                "plant_id",
+                RawDataRepository._frame_slices(frame, "plant_id"),
+            )
+            for statement in statements:
+                await connection.exec_driver_sql(statement)
+            yield frame
+
+    async def _copy_frames(
+        self,
+        connection: AsyncConnection,
+        frames: AsyncIterator[pd.DataFrame],
+        target: str,
+    ) -> int:
+        """
+        Writes every frame with COPY FROM STDIN on the psycopg async connection.
+        CSV serialization runs in a worker thread to keep the event loop free.
+        """
+
+        table = RawFactoryData.__table__
+        raw = await connection.get_raw_connection()
+        total = 0
+
+        async with raw.driver_connection.cursor() as cursor:
+            async for frame in frames:
+                columns = [col for col in frame.columns if col in table.columns]
+                data = await asyncio.to_thread(
+                    RawDataRepository._to_copy_csv, frame, table, columns
+                )
+                statement = RawDataRepository._copy_statement(table, columns, target)
+
+                logger.debug(f"Streaming batch of {len(frame)} records via COPY...")
+                async with cursor.copy(statement) as copy:
+                    await copy.write(data)
+                total += len(frame)
+
+        return total
+
+    async def _insert_frames(
+        self,
+        connection: AsyncConnection,
+        frames: AsyncIterator[pd.DataFrame],
+        target: str,
+    ) -> int:
+        """
+        Inserts every frame into the target table with an executemany INSERT,
+        for backends without COPY.
+        """
+
+        table = RawFactoryData.__table__
+        total = 0
+        async for frame in frames:
+            columns = [col for col in frame.columns if col in table.columns]
+            records = decode_frame(frame[columns])
+            records = records.astype(object).where(records.notna(), None)
+
+            logger.debug(f"Inserting batch of {len(frame)} records...")
+            statement = text(
+                f"INSERT INTO {target} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + col for col in columns)})"
+            )
+            await connection.execute(statement, records.to_dict(orient="records"))
+            total += len(frame)
+
+        return total
+
+    @staticmethod
+    def _partitioned(connection: AsyncConnection) -> bool:
+        """
+        Checks whether settings.PARTITION_TABLES is on and the connection is PostgreSQL.
+        """
+
+        return settings.PARTITION_TABLES and connection.dialect.name == "postgresql"
+
+    @staticmethod
+    def _supports_copy(connection: AsyncConnection) -> bool:
+        """
+        Checks whether the connection is PostgreSQL through the psycopg 3 async driver.
+        """
+
+        dialect = connection.dialect
+        return dialect.name == "postgresql" and dialect.driver == "psycopg"
@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
 
 
 class BaseRepository(ABC):
@@ -22,6 +25,176 @@ class BaseRepository(ABC):
 
         pass
 
+    @abstractmethod
+    def copy_insert(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> int:
+        """
+        Streams one or more DataFrames into the underlying table and returns the number of rows loaded.
+        """
+
+        pass
+
+    @abstractmethod
+    def get_partition_hashes(self) -> Dict[Tuple[str, int, int], str]:
+        """
+        Returns the stored content hash of every loaded (plant_id, year, month) partition.
+        """
+
+        pass
+
+    @abstractmethod
+    def reset_partition_hashes(self) -> None:
+        """
+        Forgets all stored partition hashes.
+        """
+
+        pass
+
+    @abstractmethod
+    def store_partition_hashes(self, partitions: List[Dict[str, Any]]) -> None:
+        """
+        Records the content hash and row count of the given partitions.
+        """
+
+        pass
+
+    @abstractmethod
+    def replace_partitions(
+        self, data: pd.DataFrame, partitions: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Atomically replaces the given partitions with new rows and records their hashes.
+        """
+
+        pass
+
+    @abstractmethod
+    def refresh_yearly_aggregate(self, slices: List[Tuple[str, int]]) -> None:
+        """
+        Rebuilds the pre-aggregated yearly data for the given (plant, year) slices.
+        An empty list rebuilds everything.
+        """
+
+        pass
+
+    @abstractmethod
+    def get_data_versions(self) -> Tuple[int, Optional[int]]:
+        """
+        Returns the raw data version and the raw data version the BOM report was built from.
+        """
+
+        pass
+
+    @abstractmethod
+    def set_report_version(self, version: int) -> None:
+        """
+        Records the raw data version the next BOM report is built from.
+        """
+
+        pass
+
+    @abstractmethod
+    def stream_yearly(
+        self, slices: List[Tuple[str, int]], batch_size: int = 10000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the yearly aggregate rows of the given (plant, year) slices (all if empty)
+        in DataFrame batches.
+        """
+
+        pass
+
+    @abstractmethod
+    def replace_bom_reports(
+        self,
+        report: pd.DataFrame,
+        diagnostics: pd.DataFrame,
+        slices: List[Tuple[str, int]],
+        version: int,
+    ) -> int:
+        """
+        Atomically replaces the report and diagnostics of the given slices (all if empty)
+        and records the raw data version they were built from.
+        """
+
+        pass
+
+    @abstractmethod
+    def set_bom_refresh_scope(self, slices: List[Tuple[str, int]]) -> None:
+        """
+        Limits the next BOM calculation in the current transaction to the given (plant, year) slices.
+        An empty list means a full refresh.
+        """
+
+        pass
+
+    @abstractmethod
+    def clear_bom_reports(self, slices: List[Tuple[str, int]]) -> bool:
+        """
+        Empties the bom_reports partitions of the given slices (all if empty) before a BOM
+        calculation. Returns False when the table is not partitioned.
+        """
+
+        pass
+
+    @abstractmethod
+    def set_bom_max_depth(self, max_depth: int) -> None:
+        """
+        Limits the depth of the next BOM calculation in the current transaction.
+        """
+
+        pass
+
+    @abstractmethod
+    def get_bom_diagnostics(self) -> List[Any]:
+        """
+        Returns the BOM paths that were cut by cycle detection or the depth limit.
+        """
+
+        pass
+
+    @abstractmethod
+    def get_where_used(
+        self,
+        component_id: str,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Returns the BOM report rows that consume a component, with their finished goods and paths.
+        """
+
+        pass
+
+    @abstractmethod
+    def insert_rejects(self, rejects: pd.DataFrame) -> int:
+        """
+        Appends rows rejected by data-quality rules to the rejects table.
+        """
+
+        pass
+
+    @abstractmethod
+    def stream_raw_sql(
+        self,
+        sql_query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 10000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Executes a raw SQL query and yields the result in DataFrame batches.
+        """
+
+        pass
+
+    @abstractmethod
+    def copy_out_csv(self, sql_query: str) -> Optional[Iterator[bytes]]:
+        """
+        Streams the result of a query as CSV bytes, or returns None when the backend
+        cannot export it natively.
+        """
+
+        pass
+
     @abstractmethod
     def execute_raw_sql(self, sql_query: str) -> list[any]:
         """
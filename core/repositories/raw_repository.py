@@ -1,12 +1,46 @@
-from typing import Any, Dict, List
+import hashlib
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
+import pandas as pd
 from loguru import logger
-from sqlalchemy import text
+from pandas.api.types import is_float_dtype
+from sqlalchemy import String, Table, text
 from sqlalchemy.orm import Session
 
+from config import settings
+from core.dtypes import decode_frame
+from core.models.bom_diagnostic import BomDiagnostic
+from core.models.data_version import DataVersion
+from core.models.processed_data import BomReport
 from core.models.raw_data import RawFactoryData
+from core.models.raw_partition import RawDataPartition
+from core.models.raw_yearly import RawFactoryYearly
+from core.models.reject import Reject
 from core.repositories.base import BaseRepository
 
+YEARLY_KEYS = [
+    "plant_id",
+    "year",
+    "produced_material_id",
+    "produced_material_release_type",
+    "produced_material_production_type",
+    "component_material_id",
+    "component_material_release_type",
+    "component_material_production_type",
+]
+YEARLY_QUANTITIES = ["produced_material_quantity", "component_material_quantity"]
+PARTITION_PLANT_COLUMNS = {
+    RawFactoryData.__tablename__: "plant_id",
+    BomReport.__tablename__: "plant",
+}
+PARTITION_CHILDREN_QUERY = (
+    "SELECT child.relname FROM pg_inherits "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "WHERE parent.relname = :name"
+)
+
 
 class RawDataRepository(BaseRepository):
     """
@@ -19,13 +53,26 @@ class RawDataRepository(BaseRepository):
         """
 
         self.session = session
+        self._reload_pending = False
 
     def truncate_table(self) -> None:
         """
         Clears the raw factory data table and resets identity values if supported.
+        The raw data version is bumped in the same transaction, so a report built from
+        the cleared data is never served as current if the following load fails.
+        A partitioned table is left untouched instead: an empty reload table is created,
+        the following loads fill it, and refresh_yearly_aggregate swaps its partitions in.
         """
 
         table_name = RawFactoryData.__tablename__
+        if self._partitioned():
+            logger.debug(f"Creating reload table for {table_name}...")
+            for statement in self._reload_statements(table_name):
+                self.session.execute(text(statement))
+            self.session.commit()
+            self._reload_pending = True
+            return
+
         logger.debug(f"Truncating table {table_name}...")
         try:
             self.session.execute(
@@ -35,6 +82,7 @@ class RawDataRepository(BaseRepository):
             self.session.rollback()
             logger.debug(f"TRUNCATE not supported, using DELETE for {table_name}")
             self.session.execute(text(f"DELETE FROM {table_name};"))
+        self.session.execute(text(self._bump_version_statement()))
         self.session.commit()
 
     def bulk_insert(self, data: List[Dict[str, Any]]) -> None:
@@ -47,8 +95,858 @@ class RawDataRepository(BaseRepository):
             return
 
         logger.debug(f"Inserting batch of {len(data)} records...")
-        self.session.bulk_insert_mappings(RawFactoryData, data)
+        table = RawFactoryData.__table__
+        if self._partitioned():
+            self._ensure_partitions(
+                table,
+                {(row["plant_id"], row["year"]) for row in data},
+                self._load_target(table),
+            )
+        if self._reload_pending:
+            columns = [col for col in data[0] if col in table.columns]
+            self._insert_frames([pd.DataFrame(data)], self._load_target(table), columns)
+        else:
+            self.session.bulk_insert_mappings(RawFactoryData, data)
+        self.session.commit()
+
+    def copy_insert(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> int:
+        """
+        Loads a DataFrame or an iterator of DataFrame chunks with PostgreSQL COPY FROM STDIN.
+        Chunks are serialized as CSV straight into the COPY stream, without building per-row dicts.
+        Falls back to bulk_insert for backends other than PostgreSQL with psycopg 3.
+        """
+
+        frames = [data] if isinstance(data, pd.DataFrame) else data
+
+        if not self._supports_copy():
+            logger.debug("COPY not supported, falling back to bulk insert...")
+            total = 0
+            for frame in frames:
+                records = decode_frame(frame)
+                records = records.astype(object).where(records.notna(), None)
+                self.bulk_insert(records.to_dict(orient="records"))
+                total += len(frame)
+            return total
+
+        table = RawFactoryData.__table__
+        if self._partitioned():
+            # The partitions of a chunk are created before its COPY, so each chunk gets its own.
+            target = self._load_target(table)
+            total = 0
+            for frame in frames:
+                self._ensure_partitions(
+                    table, self._frame_slices(frame, "plant_id"), target
+                )
+                total += self._copy_frames([frame], table, target=target)
+        else:
+            total = self._copy_frames(frames, table)
+        if not total:
+            logger.warning("No data to insert.")
+            return 0
+
+        self.session.commit()
+        return total
+
+    def get_partition_hashes(self) -> Dict[Tuple[str, int, int], str]:
+        """
+        Returns the content hash stored for every loaded (plant_id, year, month) partition.
+        """
+
+        rows = self.session.execute(
+            text(
+                f"SELECT plant_id, year, month, content_hash "
+                f"FROM {RawDataPartition.__tablename__}"
+            )
+        )
+        return {(row[0], row[1], row[2]): row[3] for row in rows}
+
+    def reset_partition_hashes(self) -> None:
+        """
+        Forgets all stored partition hashes, e.g. after a full reload.
+        """
+
+        self.session.execute(text(f"DELETE FROM {RawDataPartition.__tablename__};"))
+        self.session.commit()
+
+    def store_partition_hashes(self, partitions: List[Dict[str, Any]]) -> None:
+        """
+        Upserts the content hash and row count of the given partitions and commits.
+        """
+
+        if not partitions:
+            return
+        self.session.execute(text(self._partition_upsert_statement()), partitions)
+        self.session.commit()
+
+    @staticmethod
+    def _partition_upsert_statement() -> str:
+        """
+        Builds the upsert that records the content hash and row count of a partition.
+        """
+
+        return (
+            f"INSERT INTO {RawDataPartition.__tablename__} "
+            f"(plant_id, year, month, content_hash, row_count) "
+            f"VALUES (:plant_id, :year, :month, :content_hash, :row_count) "
+            f"ON CONFLICT (plant_id, year, month) DO UPDATE SET "
+            f"content_hash = excluded.content_hash, "
+            f"row_count = excluded.row_count, "
+            f"updated_at = CURRENT_TIMESTAMP;"
+        )
+
+    def replace_partitions(
+        self, data: pd.DataFrame, partitions: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Replaces whole (plant_id, year, month) partitions in one transaction.
+        The rows are loaded into a staging table first, then the old partitions are deleted,
+        the staged rows inserted, the partition hashes upserted and the yearly aggregate
+        of the affected (plant, year) slices rebuilt.
+        """
+
+        table = RawFactoryData.__table__
+        staging = f"{table.name}_staging"
+        columns = [col for col in data.columns if col in table.columns]
+        column_list = ", ".join(columns)
+
+        logger.debug(f"Replacing {len(partitions)} partitions via {staging}...")
+        try:
+            self.session.execute(text(f"DROP TABLE IF EXISTS {staging};"))
+            self.session.execute(
+                text(
+                    f"CREATE TEMP TABLE {staging} AS "
+                    f"SELECT {column_list} FROM {table.name} WHERE 1 = 0;"
+                )
+            )
+
+            if self._supports_copy():
+                total = self._copy_frames([data], table, target=staging)
+            else:
+                total = self._insert_frames([data], staging, columns)
+
+            if self._partitioned():
+                # One DELETE per month with literal keys is pruned to its plant partition.
+                self._ensure_partitions(
+                    table, {(p["plant_id"], p["year"]) for p in partitions}
+                )
+                self.session.execute(
+                    text(
+                        f"DELETE FROM {table.name} WHERE plant_id = :plant_id "
+                        f"AND year = :year AND month = :month;"
+                    ),
+                    [
+                        {
+                            "plant_id": p["plant_id"],
+                            "year": int(p["year"]),
+                            "month": int(p["month"]),
+                        }
+                        for p in partitions
+                    ],
+                )
+            else:
+                self.session.execute(
+                    text(
+                        f"DELETE FROM {table.name} "
+                        f"WHERE (plant_id, year, month) IN "
+                        f"(SELECT DISTINCT plant_id, year, month FROM {staging});"
+                    )
+                )
+            self.session.execute(
+                text(
+                    f"INSERT INTO {table.name} ({column_list}) "
+                    f"SELECT {column_list} FROM {staging};"
+                )
+            )
+            self.session.execute(text(self._partition_upsert_statement()), partitions)
+            self.session.execute(text(f"DROP TABLE {staging};"))
+            self._aggregate_yearly(
+                sorted({(p["plant_id"], int(p["year"])) for p in partitions})
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return total
+
+    def refresh_yearly_aggregate(self, slices: List[Tuple[str, int]]) -> None:
+        """
+        Rebuilds the yearly aggregate for the given (plant, year) slices, or entirely
+        when the list is empty, and commits. A pending partitioned reload is swapped in
+        within the same transaction, so readers see either the old or the new data.
+        """
+
+        try:
+            if self._reload_pending:
+                self._swap_reload()
+            self._aggregate_yearly(slices)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self._reload_pending = False
+
+    def _swap_reload(self) -> None:
+        """
+        Replaces the partitions of raw_factory_data with those loaded into its reload table,
+        without committing.
+        """
+
+        table_name = RawFactoryData.__tablename__
+        reload = self._reload_name(table_name)
+        old = self._child_partitions(table_name)
+        new = {
+            partition: self._child_partitions(partition)
+            for partition in self._child_partitions(reload)
+        }
+
+        logger.debug(
+            f"Swapping {len(new)} reloaded year partitions into {table_name}..."
+        )
+        for statement in self._swap_statements(table_name, reload, old, new):
+            self.session.execute(text(statement))
+
+    def _child_partitions(self, table_name: str) -> List[str]:
+        """
+        Returns the names of the direct partitions of a table.
+        """
+
+        children = self.session.execute(
+            text(PARTITION_CHILDREN_QUERY), {"name": table_name}
+        ).scalars()
+        return list(children)
+
+    @staticmethod
+    def _reload_name(table_name: str) -> str:
+        """
+        Names the table a full reload of a partitioned table is loaded into.
+        """
+
+        return f"{table_name}_reload"
+
+    @classmethod
+    def _reload_statements(cls, table_name: str) -> List[str]:
+        """
+        Builds the statements that recreate the empty reload table of a partitioned table.
+        Column defaults are copied, so ids keep coming from the main table's sequence.
+        """
+
+        reload = cls._reload_name(table_name)
+        return [
+            f"DROP TABLE IF EXISTS {reload};",
+            f"CREATE TABLE {reload} (LIKE {table_name} INCLUDING ALL) "
+            f"PARTITION BY LIST (year);",
+        ]
+
+    @classmethod
+    def _swap_statements(
+        cls,
+        table_name: str,
+        reload: str,
+        old: List[str],
+        new: Dict[str, List[str]],
+    ) -> List[str]:
+        """
+        Builds the DDL that drops the old year partitions of a table, detaches the year
+        partitions of its reload table, renames them and their plant partitions to the
+        table's names and attaches them. The year CHECK constraint spares ATTACH the scan.
+        """
+
+        statements = [f"DROP TABLE {child};" for child in old]
+        for partition, leaves in sorted(new.items()):
+            year = int(partition.rsplit("_y", 1)[1])
+            name = cls._partition_name(table_name, year)
+            statements.append(f"ALTER TABLE {reload} DETACH PARTITION {partition};")
+            statements.extend(
+                f"ALTER TABLE {leaf} RENAME TO {name}{leaf[len(partition):]};"
+                for leaf in sorted(leaves)
+            )
+            statements.append(f"ALTER TABLE {partition} RENAME TO {name};")
+            statements.append(
+                f"ALTER TABLE {table_name} ATTACH PARTITION {name} "
+                f"FOR VALUES IN ({year});"
+            )
+        statements.append(f"DROP TABLE {reload};")
+        return statements
+
+    def _aggregate_yearly(self, slices: List[Tuple[str, int]]) -> None:
+        """
+        Replaces the yearly aggregate rows of the given slices with fresh sums over the monthly
+        raw rows and bumps the raw data version, without committing.
+        An empty list rebuilds the whole table. PostgreSQL reads the slices from the
+        bom_refresh_scope temp table; other backends get them as bound parameters.
+        """
+
+        logger.debug(
+            f"Refreshing yearly aggregate for {len(slices) or 'all'} slices..."
+        )
+        params: Dict[str, Any] = {}
+        if self._postgres():
+            in_scope = (
+                "NOT EXISTS (SELECT 1 FROM bom_refresh_scope) "
+                "OR (plant_id, year) IN (SELECT plant_id, year FROM bom_refresh_scope)"
+            )
+            if slices and self._partitioned():
+                # Literal years let the planner prune raw_factory_data to their partitions.
+                years = sorted({int(year) for _, year in slices})
+                in_scope = f"({in_scope}) AND year IN ({', '.join(map(str, years))})"
+            self.set_bom_refresh_scope(slices)
+        else:
+            in_scope, params = self._slice_condition(slices, "plant_id")
+
+        for statement in self._yearly_statements(in_scope):
+            self.session.execute(text(statement), params)
+        self.session.execute(text(self._bump_version_statement()))
+
+    @staticmethod
+    def _slice_condition(
+        slices: List[Tuple[str, int]], plant_column: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Builds a WHERE condition with bound parameters matching the given (plant, year) slices,
+        or every row when the list is empty.
+        """
+
+        if not slices:
+            return "TRUE", {}
+
+        condition = " OR ".join(
+            f"({plant_column} = :plant_{i} AND year = :year_{i})"
+            for i in range(len(slices))
+        )
+        params: Dict[str, Any] = {}
+        for i, (plant, year) in enumerate(slices):
+            params.update({f"plant_{i}": plant, f"year_{i}": int(year)})
+        return condition, params
+
+    @staticmethod
+    def _yearly_statements(condition: str) -> List[str]:
+        """
+        Builds the DELETE and INSERT ... SELECT SUM statements that rebuild
+        the yearly aggregate rows matching a raw data condition.
+        """
+
+        yearly = RawFactoryYearly.__tablename__
+        keys = ", ".join(YEARLY_KEYS)
+        sums = ", ".join(f"SUM({col})" for col in YEARLY_QUANTITIES)
+        return [
+            f"DELETE FROM {yearly} WHERE {condition};",
+            f"INSERT INTO {yearly} ({keys}, {', '.join(YEARLY_QUANTITIES)}) "
+            f"SELECT {keys}, {sums} "
+            f"FROM {RawFactoryData.__tablename__} "
+            f"WHERE {condition} "
+            f"GROUP BY {keys};",
+        ]
+
+    @staticmethod
+    def _bump_version_statement() -> str:
+        """
+        Builds the upsert that increments the raw data version in the single data_versions row.
+        """
+
+        versions = DataVersion.__tablename__
+        return (
+            f"INSERT INTO {versions} (id, raw_version) VALUES (1, 1) "
+            f"ON CONFLICT (id) DO UPDATE SET "
+            f"raw_version = {versions}.raw_version + 1, "
+            f"updated_at = CURRENT_TIMESTAMP;"
+        )
+
+    def get_data_versions(self) -> Tuple[int, Optional[int]]:
+        """
+        Returns the current raw data version and the version the BOM report was built from.
+        """
+
+        row = self.session.execute(
+            text(
+                f"SELECT raw_version, report_version "
+                f"FROM {DataVersion.__tablename__} WHERE id = 1"
+            )
+        ).first()
+        return (row[0], row[1]) if row else (0, None)
+
+    def set_report_version(self, version: int) -> None:
+        """
+        Records the raw data version the BOM report is being built from, without committing.
+        """
+
+        versions = DataVersion.__tablename__
+        self.session.execute(
+            text(
+                f"INSERT INTO {versions} (id, raw_version, report_version) "
+                f"VALUES (1, :version, :version) "
+                f"ON CONFLICT (id) DO UPDATE SET "
+                f"report_version = excluded.report_version, "
+                f"updated_at = CURRENT_TIMESTAMP;"
+            ),
+            {"version": version},
+        )
+
+    def stream_yearly(
+        self, slices: List[Tuple[str, int]], batch_size: int = 10000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the yearly aggregate rows of the given (plant, year) slices, or all of them
+        when the list is empty, in DataFrame batches.
+        """
+
+        condition, params = self._slice_condition(slices, "plant_id")
+        columns = ", ".join(YEARLY_KEYS + YEARLY_QUANTITIES)
+        return self.stream_raw_sql(
+            f"SELECT {columns} FROM {RawFactoryYearly.__tablename__} "
+            f"WHERE {condition}",
+            params,
+            batch_size,
+        )
+
+    def replace_bom_reports(
+        self,
+        report: pd.DataFrame,
+        diagnostics: pd.DataFrame,
+        slices: List[Tuple[str, int]],
+        version: int,
+    ) -> int:
+        """
+        Replaces the report and diagnostics rows of the given (plant, year) slices, or all of
+        them when the list is empty, with rows exploded outside the database, records the raw
+        data version they were built from and commits, all in one transaction.
+        Rows are written in REPORT_BATCH_SIZE batches, through COPY where supported.
+        """
+
+        reports, diagnostics_table = BomReport.__table__, BomDiagnostic.__table__
+        try:
+            if not self.clear_bom_reports(slices):
+                condition, params = self._slice_condition(slices, "plant")
+                self.session.execute(
+                    text(f"DELETE FROM {reports.name} WHERE {condition};"), params
+                )
+            condition, params = self._slice_condition(slices, "plant")
+            self.session.execute(
+                text(f"DELETE FROM {diagnostics_table.name} WHERE {condition};"),
+                params,
+            )
+
+            logger.debug(f"Writing {len(report)} rows to {reports.name}...")
+            total = self._write_frames(report, reports)
+            self._write_frames(diagnostics, diagnostics_table)
+            self.set_report_version(version)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return total
+
+    def _write_frames(self, frame: pd.DataFrame, table: Table) -> int:
+        """
+        Writes a DataFrame to a table in REPORT_BATCH_SIZE batches, without committing.
+        """
+
+        batches = self._frame_batches(frame, settings.REPORT_BATCH_SIZE)
+        if self._supports_copy():
+            return self._copy_frames(batches, table)
+        columns = [col for col in frame.columns if col in table.columns]
+        return self._insert_frames(batches, table.name, columns)
+
+    @staticmethod
+    def _frame_batches(frame: pd.DataFrame, size: int) -> Iterator[pd.DataFrame]:
+        """
+        Yields consecutive slices of up to size rows of a DataFrame.
+        """
+
+        for start in range(0, len(frame), size):
+            stop = start + size
+            yield frame.iloc[start:stop]
+
+    def set_bom_refresh_scope(self, slices: List[Tuple[str, int]]) -> None:
+        """
+        Fills the transaction-scoped bom_refresh_scope temp table read by the BOM script.
+        The rows disappear on commit or rollback, so the scope never leaks into the next run.
+        Does nothing on backends other than PostgreSQL, which lack ON COMMIT DELETE ROWS.
+        """
+
+        if not self._postgres():
+            return
+
+        self.session.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS bom_refresh_scope "
+                "(plant_id VARCHAR(50), year INTEGER) ON COMMIT DELETE ROWS;"
+            )
+        )
+        self.session.execute(text("DELETE FROM bom_refresh_scope;"))
+        if slices:
+            logger.debug(f"Limiting BOM calculation to {len(slices)} slices...")
+            self.session.execute(
+                text(
+                    "INSERT INTO bom_refresh_scope (plant_id, year) "
+                    "VALUES (:plant_id, :year)"
+                ),
+                [
+                    {"plant_id": plant_id, "year": int(year)}
+                    for plant_id, year in slices
+                ],
+            )
+
+    def clear_bom_reports(self, slices: List[Tuple[str, int]]) -> bool:
+        """
+        Empties the bom_reports partitions the next BOM calculation rewrites, without committing:
+        the plant partitions of the given slices are truncated, or all partitions are dropped
+        and recreated for the yearly aggregate when the list is empty. Sets bom.reports_cleared
+        so the script skips its DELETE. Returns False for tables that are not partitioned.
+        """
+
+        if not self._partitioned():
+            return False
+
+        table = BomReport.__table__
+        if slices:
+            self._ensure_partitions(table, slices)
+            names = [
+                self._partition_name(table.name, year, plant)
+                for plant, year in sorted(
+                    {(plant, int(year)) for plant, year in slices}
+                )
+            ]
+            logger.debug(f"Truncating {len(names)} partitions of {table.name}...")
+            self.session.execute(text(f"TRUNCATE TABLE {', '.join(names)};"))
+        else:
+            logger.debug(f"Dropping the partitions of {table.name}...")
+            self._drop_partitions(table)
+            self._ensure_partitions(
+                table,
+                self.session.execute(
+                    text(
+                        f"SELECT DISTINCT plant_id, year "
+                        f"FROM {RawFactoryYearly.__tablename__}"
+                    )
+                ).all(),
+            )
+
+        self.session.execute(
+            text("SELECT set_config('bom.reports_cleared', 'on', true);")
+        )
+        return True
+
+    def set_bom_max_depth(self, max_depth: int) -> None:
+        """
+        Sets the transaction-local bom.max_depth setting read by the BOM script.
+        """
+
+        self.session.execute(
+            text("SELECT set_config('bom.max_depth', :max_depth, true);"),
+            {"max_depth": str(int(max_depth))},
+        )
+
+    def get_bom_diagnostics(self) -> List[Any]:
+        """
+        Returns the cycles and depth-limited paths recorded by the last BOM calculation.
+        """
+
+        result = self.session.execute(
+            text(
+                f"SELECT plant, year, fin_material_id, reason, level, path "
+                f"FROM {BomDiagnostic.__tablename__} "
+                f"ORDER BY plant, year, fin_material_id, path"
+            )
+        )
+        return result.fetchall()
+
+    def get_where_used(
+        self,
+        component_id: str,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Returns every report row that consumes the component, optionally limited to one plant
+        or year. The lookup runs on the (component_id, plant, year) index of 'bom_reports'.
+        """
+
+        conditions = ["component_id = :component_id"]
+        if plant is not None:
+            conditions.append("plant = :plant")
+        if year is not None:
+            conditions.append("year = :year")
+
+        result = self.session.execute(
+            text(
+                f"SELECT plant, year, fin_material_id, prod_material_id, level, "
+                f"unit_requirement, total_requirement, path "
+                f"FROM {BomReport.__tablename__} "
+                f"WHERE {' AND '.join(conditions)} "
+                f"ORDER BY plant, year, fin_material_id, path"
+            ),
+            {"component_id": component_id, "plant": plant, "year": year},
+        )
+        return result.fetchall()
+
+    def insert_rejects(self, rejects: pd.DataFrame) -> int:
+        """
+        Appends rejected rows in one COPY, or one executemany INSERT without COPY,
+        and commits them. Rejects are kept across imports; nothing is truncated.
+        """
+
+        if rejects.empty:
+            return 0
+
+        table = Reject.__table__
+        logger.debug(f"Writing {len(rejects)} rejected rows to {table.name}...")
+        if self._supports_copy():
+            total = self._copy_frames([rejects], table)
+        else:
+            columns = [col for col in rejects.columns if col in table.columns]
+            total = self._insert_frames([rejects], table.name, columns)
+
         self.session.commit()
+        return total
+
+    def _copy_frames(
+        self,
+        frames: Iterable[pd.DataFrame],
+        table: Table,
+        target: Optional[str] = None,
+    ) -> int:
+        """
+        Streams DataFrame chunks into a single COPY on the session's connection without committing.
+        The table metadata drives the column list; target overrides the table name (e.g. staging).
+        """
+
+        frames = iter(frames)
+        first = next((frame for frame in frames if not frame.empty), None)
+        if first is None:
+            return 0
+
+        columns = [col for col in first.columns if col in table.columns]
+        statement = self._copy_statement(table, columns, target or table.name)
+        total = 0
+
+        with self._copy_cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                for frame in chain([first], frames):
+                    if frame.empty:
+                        continue
+                    logger.debug(f"Streaming batch of {len(frame)} records via COPY...")
+                    copy.write(self._to_copy_csv(frame, table, columns))
+                    total += len(frame)
+
+        return total
+
+    def _insert_frames(
+        self, frames: Iterable[pd.DataFrame], table_name: str, columns: List[str]
+    ) -> int:
+        """
+        Inserts DataFrame chunks with an executemany INSERT, for backends without COPY.
+        """
+
+        statement = text(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + col for col in columns)})"
+        )
+        total = 0
+        for frame in frames:
+            if frame.empty:
+                continue
+            records = decode_frame(frame[columns])
+            records = records.astype(object).where(records.notna(), None)
+            self.session.execute(statement, records.to_dict(orient="records"))
+            total += len(frame)
+        return total
+
+    def _partitioned(self) -> bool:
+        """
+        Checks whether raw_factory_data and bom_reports are partitioned: settings.PARTITION_TABLES
+        is on and the session is bound to PostgreSQL.
+        """
+
+        if not settings.PARTITION_TABLES:
+            return False
+        return self._postgres()
+
+    def _postgres(self) -> bool:
+        """
+        Checks whether the session is bound to PostgreSQL.
+        """
+
+        return self.session.get_bind().dialect.name == "postgresql"
+
+    def _ensure_partitions(
+        self,
+        table: Table,
+        slices: Iterable[Tuple[str, int]],
+        target: Optional[str] = None,
+    ) -> None:
+        """
+        Creates the missing year partitions and (plant, year) partitions of a partitioned table
+        for the given slices, without committing. Does nothing for other tables.
+        target overrides the table name (e.g. the reload table).
+        """
+
+        if not self._partitioned():
+            return
+
+        statements = self._partition_statements(
+            target or table.name,
+            PARTITION_PLANT_COLUMNS[table.name],
+            {(str(plant), int(year)) for plant, year in slices},
+        )
+        connection = self.session.connection()
+        for statement in statements:
+            # Plant values are inlined, so the DDL bypasses bind parameter parsing.
+            connection.exec_driver_sql(statement)
+
+    def _drop_partitions(self, table: Table) -> None:
+        """
+        Drops every year partition of a partitioned table with its plant partitions,
+        without committing. Unlike DELETE, this leaves no dead rows for autovacuum.
+        """
+
+        for child in self._child_partitions(table.name):
+            self.session.execute(text(f"DROP TABLE {child};"))
+
+    def _load_target(self, table: Table) -> str:
+        """
+        Returns the table loads go to: the reload table while a partitioned reload is pending.
+        """
+
+        return self._reload_name(table.name) if self._reload_pending else table.name
+
+    @staticmethod
+    def _frame_slices(frame: pd.DataFrame, plant_column: str) -> Set[Tuple[str, int]]:
+        """
+        Returns the distinct (plant, year) slices of a DataFrame chunk.
+        """
+
+        if frame.empty:
+            return set()
+        pairs = decode_frame(frame[[plant_column, "year"]].drop_duplicates())
+        return set(zip(pairs[plant_column].astype(str), pairs["year"].astype(int)))
+
+    @staticmethod
+    def _partition_name(table_name: str, year: int, plant: Optional[str] = None) -> str:
+        """
+        Names the partition of a year, or of a plant within it. Plant ids are hashed,
+        as they may contain characters that are not valid in identifiers.
+        """
+
+        name = f"{table_name}_y{int(year)}"
+        if plant is not None:
+            name += f"_p{hashlib.md5(plant.encode()).hexdigest()[:12]}"
+        return name
+
+    @classmethod
+    def _partition_statements(
+        cls, table_name: str, plant_column: str, slices: Set[Tuple[str, int]]
+    ) -> List[str]:
+        """
+        Builds the CREATE TABLE ... PARTITION OF statements for the year partitions, themselves
+        partitioned by plant, and for the plant partitions of the given slices.
+        Year partitions carry a CHECK on their year, so they can be reattached without a scan.
+        """
+
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {cls._partition_name(table_name, year)} "
+            f"PARTITION OF {table_name} (CHECK (year = {year})) "
+            f"FOR VALUES IN ({year}) PARTITION BY LIST ({plant_column});"
+            for year in sorted({year for _, year in slices})
+        ]
+        for plant, year in sorted(slices):
+            value = plant.replace("'", "''")
+            statements.append(
+                f"CREATE TABLE IF NOT EXISTS "
+                f"{cls._partition_name(table_name, year, plant)} "
+                f"PARTITION OF {cls._partition_name(table_name, year)} "
+                f"FOR VALUES IN ('{value}');"
+            )
+        return statements
+
+    def _supports_copy(self) -> bool:
+        """
+        Checks whether the session is bound to PostgreSQL through the psycopg 3 driver.
+        """
+
+        dialect = self.session.get_bind().dialect
+        return dialect.name == "postgresql" and dialect.driver == "psycopg"
+
+    def _copy_cursor(self):
+        """
+        Opens a cursor on the psycopg connection behind the session's current transaction.
+        """
+
+        return self.session.connection().connection.driver_connection.cursor()
+
+    @staticmethod
+    def _copy_statement(table: Table, columns: List[str], target: str) -> str:
+        """
+        Builds a CSV COPY statement. Empty values of NOT NULL columns are kept as empty strings.
+        """
+
+        options = ["FORMAT csv"]
+        not_null = [col for col in columns if not table.columns[col].nullable]
+        if not_null:
+            options.append(f"FORCE_NOT_NULL ({', '.join(not_null)})")
+
+        return (
+            f"COPY {target} ({', '.join(columns)}) "
+            f"FROM STDIN WITH ({', '.join(options)})"
+        )
+
+    @staticmethod
+    def _to_copy_csv(frame: pd.DataFrame, table: Table, columns: List[str]) -> str:
+        """
+        Serializes a chunk to CSV for COPY. Float values bound for text columns are written
+        the way PostgreSQL casts them on INSERT (8002.0 -> "8002").
+        """
+
+        frame = frame[columns]
+        for col in columns:
+            values = frame[col].infer_objects()
+            if isinstance(table.columns[col].type, String) and is_float_dtype(values):
+                frame = frame.assign(
+                    **{col: values.astype("string").str.removesuffix(".0")}
+                )
+
+        return frame.to_csv(header=False, index=False)
+
+    def stream_raw_sql(
+        self,
+        sql_query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 10000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Executes a raw SQL query on a server-side cursor and yields the rows
+        as DataFrames of up to batch_size rows, so the full result is never held in memory.
+        """
+
+        logger.debug(f"Streaming raw SQL query in batches of {batch_size}...")
+        result = self.session.execute(
+            text(sql_query),
+            params or {},
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        columns = list(result.keys())
+        for rows in result.partitions(batch_size):
+            yield pd.DataFrame(rows, columns=columns)
+
+    def copy_out_csv(self, sql_query: str) -> Optional[Iterator[bytes]]:
+        """
+        Streams the result of a query as CSV with a header row through COPY ... TO STDOUT,
+        chunk by chunk. Returns None for backends other than PostgreSQL with psycopg 3.
+        """
+
+        if not self._supports_copy():
+            return None
+
+        def chunks() -> Iterator[bytes]:
+            logger.debug("Streaming query result via COPY TO STDOUT...")
+            statement = f"COPY ({sql_query}) TO STDOUT WITH (FORMAT csv, HEADER)"
+            with self._copy_cursor() as cursor:
+                with cursor.copy(statement) as copy:
+                    for data in copy:
+                        yield bytes(data)
+
+        return chunks()
 
     def execute_raw_sql(self, sql_query: str) -> List[Any]:
         """
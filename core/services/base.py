@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
 
 
 class BaseMaterialService(ABC):
@@ -9,9 +11,31 @@ class BaseMaterialService(ABC):
     """
 
     @abstractmethod
-    def run_import_pipeline(self, file_path: Path) -> int:
+    def run_import_pipeline(
+        self, file_path: Path, chunk_size: Optional[int] = None
+    ) -> int:
         """
         Runs the ETL pipeline to import data from a CSV file and returns the number of rows loaded.
+        When a chunk size is given, the file is streamed and loaded chunk by chunk.
+        """
+
+        pass
+
+    @abstractmethod
+    def run_incremental_import(self, file_path: Path) -> int:
+        """
+        Imports only the (plant, year, month) partitions that changed and returns the number of rows loaded.
+        """
+
+        pass
+
+    @abstractmethod
+    def run_multi_file_import(
+        self, source: Union[Path, str], workers: Optional[int] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Imports every file in a directory or matching a glob pattern
+        and returns the loaded and rejected row counts per file.
         """
 
         pass
@@ -23,3 +47,26 @@ class BaseMaterialService(ABC):
         """
 
         pass
+
+    @abstractmethod
+    def where_used(
+        self,
+        component_id: str,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns the finished goods and paths that consume a component, from the last report.
+        """
+
+        pass
+
+    @abstractmethod
+    def iter_bom_report(
+        self, batch_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the generated bill-of-materials report in DataFrame batches, in report order.
+        """
+
+        pass
@@ -0,0 +1,400 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from loguru import logger
+
+from config import settings
+
+GROUP_COLUMNS = [
+    "plant_id",
+    "year",
+    "produced_material_id",
+    "produced_material_release_type",
+    "produced_material_production_type",
+    "component_material_id",
+    "component_material_release_type",
+    "component_material_production_type",
+]
+QUANTITY_COLUMNS = ["produced_material_quantity", "component_material_quantity"]
+
+REPORT_COLUMNS = [
+    "plant",
+    "year",
+    "fin_material_id",
+    "fin_material_release_type",
+    "fin_material_production_type",
+    "fin_production_quantity",
+    "prod_material_id",
+    "prod_material_release_type",
+    "prod_material_production_type",
+    "prod_material_production_quantity",
+    "component_id",
+    "component_material_release_type",
+    "component_material_production_type",
+    "component_consumption_quantity",
+    "level",
+    "unit_requirement",
+    "total_requirement",
+    "path",
+]
+REPORT_ORDER = ["plant", "year", "fin_material_id", "component_id"]
+REQUIREMENT_KEYS = ["plant", "year", "fin_material_id", "component_id"]
+WHERE_USED_COLUMNS = [
+    "plant",
+    "year",
+    "fin_material_id",
+    "prod_material_id",
+    "level",
+    "unit_requirement",
+    "total_requirement",
+    "path",
+]
+WHERE_USED_ORDER = ["plant", "year", "fin_material_id", "path"]
+PATH_SEPARATOR = " > "
+
+DIAGNOSTIC_COLUMNS = ["plant", "year", "fin_material_id", "reason", "level", "path"]
+DIAGNOSTIC_ORDER = ["plant", "year", "fin_material_id", "path"]
+
+
+def aggregate_yearly(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rolls monthly raw rows up to yearly totals, like the aggregated_bom CTE.
+    NULL group keys form their own groups and all-NULL quantities stay NULL.
+    Compact float32 quantities are summed in float64.
+    """
+
+    df = df.reindex(columns=GROUP_COLUMNS + QUANTITY_COLUMNS)
+    df = df.astype({col: "float64" for col in QUANTITY_COLUMNS})
+    return (
+        df.groupby(GROUP_COLUMNS, dropna=False, observed=True, sort=False)[
+            QUANTITY_COLUMNS
+        ]
+        .sum(min_count=1)
+        .reset_index()
+    )
+
+
+def _node_codes(agg: pd.DataFrame) -> np.ndarray:
+    """
+    Encodes (plant, year, material) nodes as dense integers. Returns the produced-side codes
+    followed by the component-side codes, so both sides of every edge share one code space.
+    """
+
+    plants, _ = pd.factorize(agg["plant_id"])
+    years, year_values = pd.factorize(agg["year"])
+    materials, material_values = pd.factorize(
+        pd.concat([agg["produced_material_id"], agg["component_material_id"]])
+    )
+
+    slices = np.tile(plants.astype(np.int64) * len(year_values) + years, 2)
+    nodes, _ = pd.factorize(slices * len(material_values) + materials)
+    return nodes
+
+
+def _expand(
+    starts: np.ndarray, ends: np.ndarray, order: np.ndarray, nodes: np.ndarray
+) -> tuple:
+    """
+    Finds all outgoing edges of the given nodes in a CSR adjacency.
+    Returns the position of the originating node for every edge and the edge rows.
+    """
+
+    counts = ends[nodes] - starts[nodes]
+    origin = np.repeat(np.arange(len(nodes)), counts)
+    first = np.cumsum(counts) - counts
+    offsets = np.arange(counts.sum()) - np.repeat(first, counts)
+    return origin, order[np.repeat(starts[nodes], counts) + offsets]
+
+
+def explode_bom(
+    df: pd.DataFrame, workers: int = 1, max_depth: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Explodes cleaned raw factory data into BOM report rows, producing the same rows as
+    bom_explosion.sql. Paths cut by cycle detection or the depth limit are logged.
+    """
+
+    report, diagnostics = explode_yearly(aggregate_yearly(df), workers, max_depth)
+    if not diagnostics.empty:
+        logger.warning(
+            f"BOM explosion cut {len(diagnostics)} paths (cycles or max depth)."
+        )
+    return report
+
+
+def explode_yearly(
+    agg: pd.DataFrame,
+    workers: int = 1,
+    max_depth: Optional[int] = None,
+    roots: Optional[pd.MultiIndex] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Explodes yearly aggregated rows into BOM report rows and diagnostics. With more than one
+    worker and enough rows, (plant, year) partitions are exploded concurrently in a process pool.
+    If roots is given, only the finished goods with those (plant_id, year, material) keys
+    are exploded; all rows still serve as children.
+    """
+
+    max_depth = max_depth or settings.BOM_MAX_DEPTH
+    if workers > 1 and len(agg) >= settings.BOM_PARALLEL_MIN_ROWS:
+        return _explode_parallel(agg, workers, max_depth, roots)
+    return _explode_partition(agg, max_depth, roots)
+
+
+def _partition_batches(agg: pd.DataFrame, count: int) -> List[pd.DataFrame]:
+    """
+    Splits aggregated rows into up to `count` batches of whole (plant, year) partitions,
+    balanced by row count and ordered by partition key.
+    """
+
+    if agg.empty:
+        return []
+
+    partition = agg.groupby(
+        ["plant_id", "year"], dropna=False, observed=True, sort=True
+    ).ngroup()
+    order = np.argsort(partition.to_numpy(), kind="stable")
+    ordered = agg.take(order)
+
+    sizes = np.bincount(partition.to_numpy())
+    batch_of_partition = (np.cumsum(sizes) - sizes) * count // len(agg)
+    batch = np.repeat(batch_of_partition, sizes)
+
+    return [
+        ordered[batch == number].reset_index(drop=True) for number in np.unique(batch)
+    ]
+
+
+def _explode_parallel(
+    agg: pd.DataFrame,
+    workers: int,
+    max_depth: int,
+    roots: Optional[pd.MultiIndex] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Explodes batches of (plant, year) partitions in a process pool and merges the results
+    in a deterministic order. BOM hierarchies never cross plants or years.
+    """
+
+    batches = _partition_batches(agg, workers)
+    if len(batches) < 2:
+        return _explode_partition(agg, max_depth, roots)
+
+    logger.debug(f"Exploding {len(batches)} partition batches on {workers} workers...")
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        results = list(
+            executor.map(
+                partial(_explode_partition, max_depth=max_depth, roots=roots), batches
+            )
+        )
+
+    report = pd.concat([result[0] for result in results], ignore_index=True)
+    diagnostics = pd.concat([result[1] for result in results], ignore_index=True)
+    return (
+        report.sort_values(REPORT_ORDER, kind="stable").reset_index(drop=True),
+        diagnostics.sort_values(DIAGNOSTIC_ORDER, kind="stable").reset_index(drop=True),
+    )
+
+
+def _on_path(
+    levels: List[tuple],
+    origin: np.ndarray,
+    nodes: np.ndarray,
+    parents: np.ndarray,
+    children: np.ndarray,
+) -> np.ndarray:
+    """
+    Checks for every new edge whether its component node is already on the path to it,
+    following the parent positions back through the expanded levels to the finished good.
+    """
+
+    on_path = np.zeros(len(nodes), dtype=bool)
+    position = origin
+    for _, rows, parent, _ in reversed(levels):
+        edges = rows[position]
+        on_path |= children[edges] == nodes
+        position = parent[position]
+    return on_path | (parents[edges] == nodes)
+
+
+def _material_labels(values: pd.Series) -> pa.Array:
+    """
+    Returns material IDs as an Arrow string array for building paths, with missing IDs empty.
+    """
+
+    return pa.array(values.astype("string").fillna(""), type=pa.string())
+
+
+def _join_path(paths: pa.Array, materials: pa.Array) -> pa.Array:
+    """
+    Appends one material to every path, joined with ' > ' like the BOM script.
+    """
+
+    return pc.binary_join_element_wise(paths, materials, PATH_SEPARATOR)
+
+
+def _edge_ratios(agg: pd.DataFrame) -> np.ndarray:
+    """
+    Returns how much component every edge consumes per unit of its produced material.
+    Edges without a positive production quantity get NaN.
+    """
+
+    produced = agg["produced_material_quantity"].to_numpy(dtype=float, na_value=np.nan)
+    consumed = agg["component_material_quantity"].to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(produced > 0, consumed / produced, np.nan)
+
+
+def rollup_requirements(report: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sums the rolled-up requirements of a report per (plant, year, finished good, component),
+    over every path on which the component occurs.
+    """
+
+    return (
+        report.groupby(REQUIREMENT_KEYS, dropna=False, observed=True, sort=True)[
+            ["unit_requirement", "total_requirement"]
+        ]
+        .sum(min_count=1)
+        .reset_index()
+    )
+
+
+def _explode_partition(
+    agg: pd.DataFrame, max_depth: int, roots: Optional[pd.MultiIndex] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Explodes aggregated rows in the current process. The parent -> child adjacency is held
+    as integer-coded CSR arrays and the hierarchy is expanded one level at a time
+    with vectorized gathers. An edge whose component is already on its path closes a cycle
+    and is not expanded; expansion stops after max_depth levels.
+    The per-unit requirement of every row is the product of the edge ratios on its path,
+    and the path is extended by one material per level the same way.
+    """
+
+    agg = agg.reindex(columns=GROUP_COLUMNS + QUANTITY_COLUMNS)
+    total = len(agg)
+
+    codes = _node_codes(agg)
+    parents, children = codes[:total], codes[total:]
+    ratios = _edge_ratios(agg)
+    components = _material_labels(agg["component_material_id"])
+
+    order = np.argsort(parents, kind="stable")
+    node_ids = np.arange(codes.max() + 1 if total else 0)
+    starts = np.searchsorted(parents[order], node_ids, side="left")
+    ends = np.searchsorted(parents[order], node_ids, side="right")
+
+    is_fin = agg["produced_material_release_type"].eq("FIN")
+    if roots is not None:
+        is_fin &= pd.MultiIndex.from_frame(
+            agg[["plant_id", "year", "produced_material_id"]]
+        ).isin(roots)
+    rows = np.flatnonzero(is_fin.to_numpy(dtype=bool, na_value=False))
+    fins = rows
+    origin = np.arange(len(rows))
+    cycle = children[rows] == parents[rows]
+    unit = ratios[rows]
+    path = _join_path(
+        _material_labels(agg["produced_material_id"]).take(rows), components.take(rows)
+    )
+    levels: List[tuple] = []
+    units: List[np.ndarray] = []
+    paths: List[pa.Array] = []
+    cut: List[tuple] = []
+
+    while len(rows):
+        levels.append((fins, rows, origin, cycle))
+        units.append(unit)
+        paths.append(path)
+        cut.append(("cycle", len(levels) - 1, np.flatnonzero(cycle)))
+
+        open_rows = np.flatnonzero(~cycle)
+        if len(levels) >= max_depth:
+            nodes = children[rows[open_rows]]
+            cut.append(
+                ("max_depth", len(levels) - 1, open_rows[ends[nodes] > starts[nodes]])
+            )
+            break
+
+        origin, rows = _expand(starts, ends, order, children[rows[open_rows]])
+        origin = open_rows[origin]
+        fins = fins[origin]
+        unit = unit[origin] * ratios[rows]
+        path = _join_path(path.take(origin), components.take(rows))
+        cycle = _on_path(levels, origin, children[rows], parents, children)
+
+    empty = np.array([], int)
+    fin_rows = np.concatenate([level[0] for level in levels] or [empty])
+    edge_rows = np.concatenate([level[1] for level in levels] or [empty])
+    depth_arrays = [
+        np.full(len(level[1]), depth + 1) for depth, level in enumerate(levels)
+    ]
+    depths = np.concatenate(depth_arrays or [empty])
+    unit_requirement = np.concatenate(units or [np.array([], float)])
+    path_labels = pa.chunked_array(paths, type=pa.string()).to_pandas(
+        types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get
+    )
+
+    fin = agg.take(fin_rows).reset_index(drop=True)
+    edge = agg.take(edge_rows).reset_index(drop=True)
+    fin_quantity = fin["produced_material_quantity"].to_numpy(
+        dtype=float, na_value=np.nan
+    )
+
+    report = pd.DataFrame(
+        {
+            "plant": edge["plant_id"],
+            "year": edge["year"],
+            "fin_material_id": fin["produced_material_id"],
+            "fin_material_release_type": fin["produced_material_release_type"],
+            "fin_material_production_type": fin["produced_material_production_type"],
+            "fin_production_quantity": fin["produced_material_quantity"],
+            "prod_material_id": edge["produced_material_id"],
+            "prod_material_release_type": edge["produced_material_release_type"],
+            "prod_material_production_type": edge["produced_material_production_type"],
+            "prod_material_production_quantity": edge["produced_material_quantity"],
+            "component_id": edge["component_material_id"],
+            "component_material_release_type": edge["component_material_release_type"],
+            "component_material_production_type": edge[
+                "component_material_production_type"
+            ],
+            "component_consumption_quantity": edge["component_material_quantity"],
+            "level": depths,
+            "unit_requirement": unit_requirement,
+            "total_requirement": unit_requirement * fin_quantity,
+            "path": path_labels,
+        },
+        columns=REPORT_COLUMNS,
+    )
+
+    cut_frames = [
+        pd.DataFrame(
+            {
+                "plant": agg["plant_id"].to_numpy()[levels[depth][1][positions]],
+                "year": agg["year"].to_numpy()[levels[depth][1][positions]],
+                "fin_material_id": agg["produced_material_id"].to_numpy()[
+                    levels[depth][0][positions]
+                ],
+                "reason": reason,
+                "level": depth + 1,
+                "path": paths[depth].take(positions).to_pylist(),
+            },
+            columns=DIAGNOSTIC_COLUMNS,
+        )
+        for reason, depth, positions in cut
+        if len(positions)
+    ]
+    diagnostics = pd.concat(
+        cut_frames or [pd.DataFrame(columns=DIAGNOSTIC_COLUMNS)], ignore_index=True
+    )
+
+    return (
+        report.sort_values(REPORT_ORDER, kind="stable").reset_index(drop=True),
+        diagnostics.sort_values(DIAGNOSTIC_ORDER, kind="stable").reset_index(drop=True),
+    )
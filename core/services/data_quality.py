@@ -0,0 +1,116 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+BAD_ID_VALUES = ["nan", "none", "null", ""]
+REJECT_SCHEMA = pa.schema(
+    [
+        ("source", pa.string()),
+        ("source_line", pa.int64()),
+        ("reason", pa.string()),
+        ("column_name", pa.string()),
+        ("value", pa.string()),
+        ("action", pa.string()),
+        ("record", pa.string()),
+    ]
+)
+REJECT_COLUMNS = REJECT_SCHEMA.names
+
+
+class RejectRule(NamedTuple):
+    """
+    Declares one data-quality rule: rows of `column` failing `check` are reported under
+    `reason` and either dropped or kept with the cleaned default value.
+    """
+
+    reason: str
+    column: str
+    check: str
+    drop: bool
+
+
+def _bad_id(raw: pd.Series, clean: pd.Series) -> pd.Series:
+    """
+    Flags missing IDs and placeholder values such as 'nan' or 'null'.
+    """
+
+    return clean.isna() | clean.str.lower().isin(BAD_ID_VALUES)
+
+
+def _not_positive(raw: pd.Series, clean: pd.Series) -> pd.Series:
+    """
+    Flags values that are missing, zero or negative.
+    """
+
+    return ~(clean > 0)
+
+
+def _unparseable(raw: pd.Series, clean: pd.Series) -> pd.Series:
+    """
+    Flags values that were present in the file but could not be parsed.
+    """
+
+    present = raw.notna() & raw.astype("string").str.strip().ne("")
+    return clean.isna() & present
+
+
+# Checks receive the raw column and its cleaned values (before defaults are filled in)
+# and return a mask of the failing rows. They only look at their own column.
+CHECKS: Dict[str, Callable[[pd.Series, pd.Series], pd.Series]] = {
+    "bad_id": _bad_id,
+    "not_positive": _not_positive,
+    "unparseable": _unparseable,
+}
+
+REJECT_RULES: List[RejectRule] = [
+    RejectRule("invalid_plant_id", "plant_id", "bad_id", drop=True),
+    RejectRule("invalid_material_id", "produced_material_id", "bad_id", drop=True),
+    RejectRule("invalid_month", "month", "not_positive", drop=True),
+    RejectRule(
+        "unparseable_quantity", "produced_material_quantity", "unparseable", drop=False
+    ),
+    RejectRule(
+        "unparseable_quantity", "component_material_quantity", "unparseable", drop=False
+    ),
+]
+
+
+def reject_rows(df: pd.DataFrame, mask: pd.Series, rule: RejectRule) -> pd.DataFrame:
+    """
+    Builds the reject records of the rows failing a rule from the raw rows. source_line holds
+    the 1-based position of the row in its source until finish_rejects makes it a line number.
+    """
+
+    rows = df[mask]
+    return pd.DataFrame(
+        {
+            "source": None,
+            "source_line": rows.index.to_numpy() + 1,
+            "reason": rule.reason,
+            "column_name": rule.column,
+            "value": rows[rule.column].astype("string").to_numpy(),
+            "action": "dropped" if rule.drop else "defaulted",
+            "record": rows.to_json(orient="records", lines=True).splitlines(),
+        },
+        columns=REJECT_COLUMNS,
+    )
+
+
+def finish_rejects(
+    frames: List[pd.DataFrame], source: Optional[str], header_lines: int = 0
+) -> pd.DataFrame:
+    """
+    Concatenates reject frames and attributes the ones without a source yet to source,
+    shifting their row positions by the header lines (1 for CSV) into line numbers.
+    """
+
+    if not frames:
+        return pd.DataFrame(columns=REJECT_COLUMNS)
+
+    rejects = pd.concat(frames, ignore_index=True)
+    pending = rejects["source"].isna()
+    if source is not None and pending.any():
+        rejects.loc[pending, "source_line"] += header_lines
+        rejects.loc[pending, "source"] = source
+    return rejects
@@ -0,0 +1,319 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+from config import settings
+from core.repositories.base import BaseRepository
+from core.services.bom_engine import (
+    DIAGNOSTIC_COLUMNS,
+    DIAGNOSTIC_ORDER,
+    REPORT_COLUMNS,
+    REPORT_ORDER,
+    WHERE_USED_COLUMNS,
+    WHERE_USED_ORDER,
+    aggregate_yearly,
+    explode_yearly,
+)
+from core.services.data_quality import REJECT_COLUMNS
+from core.services.material_service import (
+    PARTITION_KEYS,
+    MaterialETLService,
+    PartitionState,
+)
+from core.services.metrics import RunMetrics
+from core.services.scenario_service import ScenarioService
+
+
+class InMemoryMaterialService(MaterialETLService):
+    """
+    Runs the ETL pipeline and the BOM explosion in memory with the pandas/NumPy engine,
+    without a database round trip. Useful for what-if scenarios and profiling.
+    """
+
+    def __init__(self, repository: Optional[BaseRepository] = None):
+        """
+        Initializes the service with empty raw data, report, diagnostics and rejects frames.
+        The repository is optional and not used by the in-memory pipeline.
+        """
+
+        super().__init__(repository)
+        self.data = pd.DataFrame()
+        self.rejects = pd.DataFrame(columns=REJECT_COLUMNS)
+        self.report = pd.DataFrame(columns=REPORT_COLUMNS)
+        self.diagnostics = pd.DataFrame(columns=DIAGNOSTIC_COLUMNS)
+        self._where_used_index: Optional[pd.DataFrame] = None
+        self._stored_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def _extract_clean(self, file_path: Path) -> pd.DataFrame:
+        """
+        Reads, transforms, cleans and validates a whole file.
+        """
+
+        df = self._read_csv(file_path)
+        df = self._transform_columns(df)
+        df = self._clean_data_types(df)
+        self._validate_columns(df)
+        return df
+
+    def run_import_pipeline(
+        self,
+        file_path: Path = settings.INPUT_CSV_PATH,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """
+        Replaces the in-memory raw data with the cleaned contents of the file.
+        """
+
+        logger.info("Starting in-memory ETL pipeline...")
+        self._reset_rejects()
+
+        if chunk_size:
+            frames = list(self._iter_clean_chunks(file_path, chunk_size))
+        else:
+            frames = [self._extract_clean(file_path)]
+
+        self.data = self._concat(frames)
+        partitions: PartitionState = {}
+        for frame in frames:
+            self._collect_row_hashes(frame, partitions)
+        self._store_partition_hashes(partitions)
+        self.changed_slices = None
+        self._flush_rejects(file_path)
+
+        logger.success(f"In-memory ETL finished. Rows loaded: {len(self.data)}")
+        return len(self.data)
+
+    def run_multi_file_import(
+        self,
+        source: Union[Path, str] = settings.DATA_DIR,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Replaces the in-memory raw data with the cleaned contents of all matching files,
+        parsed concurrently in a process pool.
+        """
+
+        logger.info("Starting in-memory multi-file ETL pipeline...")
+        self._reset_rejects()
+
+        stats: Dict[str, Dict[str, int]] = {}
+        frames = list(
+            self._iter_clean_files(self._resolve_files(source), workers, stats)
+        )
+
+        self.data = self._concat(frames)
+        partitions: PartitionState = {}
+        for frame in frames:
+            self._collect_row_hashes(frame, partitions)
+        self._store_partition_hashes(partitions)
+        self.changed_slices = None
+        self._flush_rejects()
+
+        logger.success(f"In-memory ETL finished. Rows loaded: {len(self.data)}")
+        return stats
+
+    def run_incremental_import(self, file_path: Path = settings.INPUT_CSV_PATH) -> int:
+        """
+        Replaces only the (plant_id, year, month) partitions whose content changed.
+        """
+
+        logger.info("Starting in-memory incremental ETL pipeline...")
+        self._reset_rejects()
+
+        df = self._extract_clean(file_path)
+        self._validate_columns(df, PARTITION_KEYS)
+        self._flush_rejects(file_path)
+
+        hashes = self._partition_hashes(df)
+        changed = self._changed_partitions(hashes, self._stored_hashes)
+        if changed.empty:
+            logger.success(f"All {len(hashes)} partitions are unchanged.")
+            return 0
+
+        changed_keys = pd.MultiIndex.from_frame(changed[PARTITION_KEYS])
+        in_changed = pd.MultiIndex.from_frame(df[PARTITION_KEYS]).isin(changed_keys)
+
+        if self.data.empty:
+            self.data = df[in_changed].reset_index(drop=True)
+        else:
+            stale = pd.MultiIndex.from_frame(self.data[PARTITION_KEYS]).isin(
+                changed_keys
+            )
+            self.data = self._concat([self.data[~stale], df[in_changed]])
+
+        self._stored_hashes.update(self._hash_map(changed))
+
+        loaded = int(in_changed.sum())
+        logger.success(
+            f"In-memory incremental ETL finished. {len(changed)} partitions, "
+            f"{loaded} rows replaced."
+        )
+        return loaded
+
+    def _store_partition_hashes(self, partitions: PartitionState) -> None:
+        """
+        Keeps the partition hashes of a full load in memory for the next incremental import.
+        """
+
+        self._stored_hashes = self._hash_map(self._content_hashes(partitions))
+
+    @staticmethod
+    def _hash_map(hashes: pd.DataFrame) -> Dict[Tuple[str, int, int], str]:
+        """
+        Maps the (plant_id, year, month) keys of partition hashes to their content hash.
+        """
+
+        return {
+            (row.plant_id, row.year, row.month): row.content_hash
+            for row in hashes.itertuples()
+        }
+
+    def _reset_rejects(self) -> None:
+        """
+        Clears the collected rejects and those kept from the last import.
+        """
+
+        super()._reset_rejects()
+        self.rejects = pd.DataFrame(columns=REJECT_COLUMNS)
+
+    def _write_rejects(self, batches: Iterable[pd.DataFrame]) -> None:
+        """
+        Keeps the rejects of the last import in memory instead of writing them out.
+        """
+
+        frames = list(batches)
+        if frames:
+            self.rejects = pd.concat(frames, ignore_index=True)
+
+    def generate_bom_report(
+        self, slices: Optional[Iterable[Tuple[str, int]]] = None
+    ) -> List[Any]:
+        """
+        Explodes the in-memory raw data and returns the report rows as dicts.
+        If (plant, year) slices are given, only those slices are re-exploded.
+        """
+
+        self.metrics = RunMetrics("bom_report")
+        self._where_used_index = None
+        if slices is None:
+            logger.info("Exploding BOM in memory...")
+            with self.metrics.stage("bom_calculation"):
+                self.report, self.diagnostics = self._explode(self.data)
+        else:
+            scope = list(set(slices))
+            if scope:
+                logger.info(f"Exploding BOM in memory for {len(scope)} slices...")
+                in_scope = pd.MultiIndex.from_frame(
+                    self.data[["plant_id", "year"]]
+                ).isin(scope)
+                with self.metrics.stage("bom_calculation"):
+                    report, diagnostics = self._explode(self.data[in_scope])
+                self.report = self._replace_slices(
+                    self.report, report, scope, REPORT_ORDER
+                )
+                self.diagnostics = self._replace_slices(
+                    self.diagnostics, diagnostics, scope, DIAGNOSTIC_ORDER
+                )
+
+        for row in self.diagnostics.itertuples():
+            logger.warning(
+                f"BOM {row.reason} in plant {row.plant}, year {row.year}, "
+                f"level {row.level}: {row.path}"
+            )
+
+        records = self.report.astype(object).where(self.report.notna(), None)
+        return records.to_dict(orient="records")
+
+    def scenario_service(self) -> ScenarioService:
+        """
+        Returns a scenario service on the current in-memory raw data.
+        """
+
+        return ScenarioService(aggregate_yearly(self.data))
+
+    def where_used(
+        self,
+        component_id: str,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Looks the component up in a component-sorted copy of the last report, built on first
+        use after every explosion, so repeated queries do not scan the report.
+        """
+
+        if self._where_used_index is None:
+            logger.debug("Building where-used index...")
+            self._where_used_index = self.report.set_index("component_id").sort_index()
+
+        index = self._where_used_index
+        if component_id not in index.index:
+            return pd.DataFrame(columns=WHERE_USED_COLUMNS)
+
+        rows = index.loc[[component_id], WHERE_USED_COLUMNS]
+        if plant is not None:
+            rows = rows[rows["plant"] == plant]
+        if year is not None:
+            rows = rows[rows["year"] == year]
+        return rows.sort_values(WHERE_USED_ORDER).reset_index(drop=True)
+
+    def iter_bom_report(
+        self, batch_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the last exploded report in DataFrame batches of up to batch_size rows.
+        """
+
+        batch_size = batch_size or settings.REPORT_BATCH_SIZE
+        for start in range(0, len(self.report), batch_size):
+            stop = start + batch_size
+            yield self.report.iloc[start:stop].reset_index(drop=True)
+
+    def _report_csv(self) -> Optional[Iterator[bytes]]:
+        """
+        Exports from the in-memory report, never from the database.
+        """
+
+        return None
+
+    def _concat(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenates cleaned frames. Categoricals with different categories concatenate
+        to plain objects, so the result is compacted again.
+        """
+
+        if not frames:
+            return pd.DataFrame()
+
+        data = pd.concat(frames, ignore_index=True)
+        return self._compact_dtypes(data) if settings.COMPACT_DTYPES else data
+
+    @staticmethod
+    def _explode(data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Explodes raw rows into report rows and diagnostics with the configured workers and depth.
+        """
+
+        return explode_yearly(
+            aggregate_yearly(data), settings.BOM_WORKERS, settings.BOM_MAX_DEPTH
+        )
+
+    @staticmethod
+    def _replace_slices(
+        current: pd.DataFrame,
+        fresh: pd.DataFrame,
+        scope: List[Tuple[str, int]],
+        order: List[str],
+    ) -> pd.DataFrame:
+        """
+        Swaps the rows of the given (plant, year) slices in a result frame for fresh ones.
+        """
+
+        stale = pd.MultiIndex.from_frame(current[["plant", "year"]]).isin(scope)
+        return (
+            pd.concat([current[~stale], fresh], ignore_index=True)
+            .sort_values(order, kind="stable")
+            .reset_index(drop=True)
+        )
@@ -1,14 +1,72 @@
+import asyncio
+import glob
+import hashlib
+import os
+import queue
+import struct
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from loguru import logger
+from pandas.api.types import is_numeric_dtype
 from sqlalchemy import text
 
 from config import settings
+from core.database import Database, get_database
+from core.dtypes import compact_frame, decode_frame, memory_usage
+from core.models.raw_data import RawFactoryData
+from core.repositories.async_raw_repository import AsyncRawDataRepository
 from core.repositories.base import BaseRepository
+from core.repositories.raw_repository import RawDataRepository
 from core.services.base import BaseMaterialService
+from core.services.bom_engine import (
+    GROUP_COLUMNS,
+    REPORT_COLUMNS,
+    WHERE_USED_COLUMNS,
+    explode_yearly,
+)
+from core.services.data_quality import (
+    CHECKS,
+    REJECT_RULES,
+    REJECT_SCHEMA,
+    finish_rejects,
+    reject_rows,
+)
+from core.services.metrics import RunMetrics
+from core.services.report_parquet import write_report, write_report_csv
+from core.services.scenario_service import ScenarioService
+
+ID_DTYPE = "string[pyarrow]"
+PARTITION_KEYS = ["plant_id", "year", "month"]
+# Running (sum of row hashes modulo 2**64, row count) of every (plant_id, year, month) partition
+PartitionState = Dict[Tuple[str, int, int], Tuple[int, int]]
+HASH_MASK = 2**64 - 1
+SERVICE_COLUMNS = ["id", "created_at", "updated_at"]
+PARQUET_SUFFIXES = [".parquet", ".pq"]
+ARROW_SUFFIXES = [".arrow", ".feather", ".ipc"]
+QUANTITY_COLUMNS = ["produced_material_quantity", "component_material_quantity"]
+REPORT_KEYSET = ["plant", "year", "fin_material_id", "component_id", "id"]
 
 
 class MaterialETLService(BaseMaterialService):
@@ -16,27 +74,164 @@ class MaterialETLService(BaseMaterialService):
     Implements ETL operations for raw material data and BOM reporting.
     """
 
-    def __init__(self, repository: BaseRepository):
+    def __init__(
+        self,
+        repository: BaseRepository,
+        async_repository: Optional[AsyncRawDataRepository] = None,
+    ):
         """
         Initializes the service with a repository for database operations.
+        The async repository is only needed by run_async_import.
+        Each pipeline run replaces self.metrics with the timings of that run.
         """
 
         self.repository = repository
+        self.async_repository = async_repository
+        self.changed_slices: Optional[Set[Tuple[str, int]]] = None
+        self._slice_base: Optional[int] = None
+        self.metrics = RunMetrics()
+        self._rejects: List[pd.DataFrame] = []
+        self._reject_spool: Optional[pq.ParquetWriter] = None
+        self._reject_spool_path: Optional[Path] = None
 
     def _read_csv(self, file_path: Path) -> pd.DataFrame:
         """
-        Reads a CSV file into a DataFrame and strips whitespace from column names.
+        Reads a raw data file into a DataFrame and strips whitespace from column names.
+        The format is taken from the suffix: CSV, Parquet or Arrow IPC. Only the columns
+        the pipeline loads are read; Parquet and Arrow keep their types.
+        """
+
+        self._check_exists(file_path)
+        source_format = self._source_format(file_path)
+        columns = self._source_columns()
+
+        logger.debug(f"Reading {source_format} file: {file_path}")
+        if source_format == "parquet":
+            schema = pq.read_schema(file_path)
+            table = pq.read_table(
+                file_path, columns=[col for col in schema.names if col in columns]
+            )
+            df = self._arrow_to_pandas(table)
+        elif source_format == "arrow":
+            df = self._arrow_to_pandas(self._read_arrow(file_path, columns))
+        else:
+            df = pd.read_csv(file_path, usecols=lambda col: col.strip() in columns)
+
+        df.columns = df.columns.str.strip()
+        return df
+
+    def _read_csv_chunks(
+        self, file_path: Path, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lazily reads a raw data file in fixed-size chunks and strips whitespace from column names.
+        Accepts the same formats and projects the same columns as _read_csv.
+        """
+
+        self._check_exists(file_path)
+        source_format = self._source_format(file_path)
+        columns = self._source_columns()
+
+        logger.debug(
+            f"Streaming {source_format} file: {file_path} (chunk size: {chunk_size})"
+        )
+        if source_format == "parquet":
+            parquet = pq.ParquetFile(file_path)
+            batches = parquet.iter_batches(
+                batch_size=chunk_size,
+                columns=[col for col in parquet.schema_arrow.names if col in columns],
+            )
+            yield from self._number_batches(batches)
+        elif source_format == "arrow":
+            table = self._read_arrow(file_path, columns)
+            yield from self._number_batches(table.to_batches(max_chunksize=chunk_size))
+        else:
+            with pd.read_csv(
+                file_path,
+                chunksize=chunk_size,
+                usecols=lambda col: col.strip() in columns,
+            ) as reader:
+                for chunk in reader:
+                    chunk.columns = chunk.columns.str.strip()
+                    yield chunk
+
+    def _number_batches(
+        self, batches: Iterable[pa.RecordBatch]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Converts Arrow batches to DataFrames whose index continues across batches, as the
+        CSV reader's does, so rejected rows keep their position in the file.
+        """
+
+        offset = 0
+        for batch in batches:
+            df = self._arrow_to_pandas(pa.Table.from_batches([batch]))
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+
+    @staticmethod
+    def _check_exists(file_path: Path) -> None:
+        """
+        Raises FileNotFoundError if the input file is missing.
         """
 
         if not file_path.exists():
             logger.error(f"File not found: {file_path}")
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        logger.debug(f"Reading CSV file: {file_path}")
-        df = pd.read_csv(file_path)
+    @staticmethod
+    def _source_format(file_path: Path) -> str:
+        """
+        Detects the input format from the file suffix. Anything unknown is read as CSV.
+        """
 
-        df.columns = df.columns.str.strip()
-        return df
+        suffix = file_path.suffix.lower()
+        if suffix in PARQUET_SUFFIXES:
+            return "parquet"
+        if suffix in ARROW_SUFFIXES:
+            return "arrow"
+        return "csv"
+
+    @staticmethod
+    def _source_columns() -> Set[str]:
+        """
+        Returns the input column names the pipeline uses: the raw_factory_data columns
+        under their names both before and after settings.RENAME_MAP is applied, so files
+        that already use the table names are read as well.
+        """
+
+        columns = {
+            col.name
+            for col in RawFactoryData.__table__.columns
+            if col.name not in SERVICE_COLUMNS
+        }
+        return columns | {
+            old for old, new in settings.RENAME_MAP.items() if new in columns
+        }
+
+    @staticmethod
+    def _read_arrow(file_path: Path, columns: Set[str]) -> pa.Table:
+        """
+        Reads an Arrow IPC file through a memory map, so the projected columns are not copied.
+        """
+
+        with pa.memory_map(str(file_path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.select([col for col in table.column_names if col in columns])
+
+    @staticmethod
+    def _arrow_to_pandas(table: pa.Table) -> pd.DataFrame:
+        """
+        Converts an Arrow table to pandas, keeping strings Arrow-backed as ID_DTYPE.
+        """
+
+        return table.to_pandas(
+            types_mapper={
+                pa.string(): pd.StringDtype("pyarrow"),
+                pa.large_string(): pd.StringDtype("pyarrow"),
+            }.get
+        )
 
     def _transform_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -55,6 +250,9 @@ class MaterialETLService(BaseMaterialService):
     def _clean_data_types(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Cleans data types: converts IDs to strings, quantities to floats, handles NaNs.
+        All conversions are vectorized and missing values stay as NA until the load step.
+        Rows failing a rule of data_quality.REJECT_RULES are dropped or defaulted and
+        collected as rejects, to be written by _flush_rejects once the source is loaded.
         """
 
         logger.debug("Cleaning data types...")
@@ -73,113 +271,1133 @@ class MaterialETLService(BaseMaterialService):
             ],
         )
 
+        # Row filters are collected into one mask and applied once at the end.
+        # parsed keeps the converted values before defaults are filled in, for the rules.
+        keep = pd.Series(True, index=df.index)
+        cleaned = {}
+        parsed = {}
+
         for col in id_cols:
             if col in df.columns:
+                parsed[col] = self._to_string(df[col])
+                cleaned[col] = parsed[col].fillna("")
 
-                df[col] = df[col].fillna("").astype(str)
+        for col in settings.TYPE_COLUMNS:
+            if col in df.columns and col not in cleaned:
+                cleaned[col] = self._to_string(df[col]).astype("category")
 
-                mask_bad = df[col].str.lower().isin(["nan", "none", "null", ""])
+        for col in QUANTITY_COLUMNS:
+            if col in df.columns:
+                parsed[col] = self._to_float(df[col])
+                cleaned[col] = parsed[col].fillna(0.0)
 
-                if col in ["produced_material_id", "plant_id"]:
-                    if mask_bad.any():
-                        count = mask_bad.sum()
-                        logger.warning(
-                            f"Column '{col}': removed {count} empty/invalid rows."
-                        )
-                        df = df[~mask_bad]
+        if "month" in df.columns:
+            parsed["month"] = pd.to_numeric(df["month"], errors="coerce")
+            cleaned["month"] = parsed["month"].fillna(0).astype(int)
 
-        numeric_cols = ["produced_material_quantity", "component_material_quantity"]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = (
-                    df[col]
-                    .astype(str)
-                    .str.replace(",", "", regex=False)
-                    .apply(pd.to_numeric, errors="coerce")
-                    .fillna(0.0)
+        for rule in REJECT_RULES:
+            if rule.column not in parsed:
+                continue
+            failed = CHECKS[rule.check](df[rule.column], parsed[rule.column])
+            if failed.any():
+                action = "removed" if rule.drop else "set to defaults"
+                logger.warning(
+                    f"Column '{rule.column}': {failed.sum()} rows {action} "
+                    f"({rule.reason})."
                 )
+                self._rejects.append(reject_rows(df, failed, rule))
+                if rule.drop:
+                    keep &= ~failed
 
-        if "month" in df.columns:
-            df["month"] = (
-                pd.to_numeric(df["month"], errors="coerce").fillna(0).astype(int)
-            )
-            if (df["month"] == 0).any():
-                logger.warning("Found rows with invalid 'month'. Removing them.")
-                df = df[df["month"] > 0]
+        df = df.assign(**cleaned)
+        if not keep.all():
+            df = df[keep]
 
-        df = df.replace({np.nan: None})
+        if settings.COMPACT_DTYPES:
+            df = self._compact_dtypes(df)
 
         return df
 
-    def run_import_pipeline(self, file_path: Path = settings.INPUT_CSV_PATH) -> int:
+    @staticmethod
+    def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Switches a cleaned frame to the compact in-memory layout (see core.dtypes.compact_frame)
+        and logs its memory footprint before and after. Loaders decode it again.
+        """
+
+        before = memory_usage(df)
+        df = compact_frame(
+            df,
+            [*settings.ID_COLUMNS, *settings.TYPE_COLUMNS],
+            QUANTITY_COLUMNS,
+            settings.QUANTITY_DTYPE,
+        )
+        after = memory_usage(df)
+        logger.info(
+            f"Compact dtypes: {len(df)} rows, {before / 2**20:.1f} MiB -> "
+            f"{after / 2**20:.1f} MiB"
+        )
+        return df
+
+    @staticmethod
+    def _to_string(values: pd.Series) -> pd.Series:
+        """
+        Converts a column to Arrow-backed strings in a single Arrow cast.
+        Numbers are cast the way PostgreSQL stores them in text columns (8002.0 -> "8002").
+        Columns that are already Arrow-backed strings, e.g. from Parquet input, are kept as is.
+        """
+
+        if values.dtype == ID_DTYPE:
+            return values
+
+        try:
+            array = pc.cast(pa.array(values, from_pandas=True), pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return values.astype(ID_DTYPE)
+
+        return pd.Series(pd.array(array, dtype=ID_DTYPE), index=values.index)
+
+    @staticmethod
+    def _to_float(values: pd.Series) -> pd.Series:
+        """
+        Parses a quantity column to float64 with one vectorized cast, dropping thousands separators.
+        Unparseable values become NaN.
+        """
+
+        if is_numeric_dtype(values):
+            return values.astype("float64")
+
+        text = MaterialETLService._to_string(values).str.replace(",", "", regex=False)
+        try:
+            return pd.Series(
+                pc.cast(pa.array(text), pa.float64()).to_numpy(zero_copy_only=False),
+                index=values.index,
+            )
+        except pa.ArrowInvalid:
+            return pd.to_numeric(text, errors="coerce").astype("float64")
+
+    def _validate_columns(
+        self,
+        df: pd.DataFrame,
+        required_cols: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Ensures that the columns required by the load step are present.
+        """
+
+        required_cols = required_cols or ["produced_material_id", "month", "year"]
+        missing = [col for col in required_cols if col not in df.columns]
+        if missing:
+            msg = f"Validation Error: Columns {missing} are missing."
+            logger.critical(msg)
+            raise ValueError(msg)
+
+    def _reset_rejects(self) -> None:
+        """
+        Discards rejects collected or spilled by an earlier, failed run.
+        """
+
+        self._rejects = []
+        self._discard_reject_spool()
+
+    def _discard_reject_spool(self) -> None:
+        """
+        Closes and deletes the temporary reject spool file, if one was started.
+        """
+
+        if self._reject_spool is not None:
+            self._reject_spool.close()
+            self._reject_spool = None
+        if self._reject_spool_path is not None:
+            self._reject_spool_path.unlink(missing_ok=True)
+            self._reject_spool_path = None
+
+    def _take_rejects(self, file_path: Optional[Path] = None) -> pd.DataFrame:
+        """
+        Returns the rejects collected since the last call and clears them. Rejects without
+        a source are attributed to file_path, with CSV header lines counted in source_line.
+        """
+
+        frames, self._rejects = self._rejects, []
+        header_lines = 0
+        if file_path is not None and self._source_format(file_path) == "csv":
+            header_lines = 1
+        return finish_rejects(
+            frames, file_path.name if file_path else None, header_lines
+        )
+
+    def _spill_rejects(self, file_path: Optional[Path] = None) -> None:
+        """
+        Moves the collected rejects into a temporary Parquet spool file, so streaming runs
+        hold at most one chunk of rejects in memory until _flush_rejects writes them out.
+        """
+
+        rejects = self._take_rejects(file_path)
+        if rejects.empty:
+            return
+
+        if self._reject_spool is None:
+            handle, name = tempfile.mkstemp(prefix="rejects-", suffix=".parquet")
+            os.close(handle)
+            self._reject_spool_path = Path(name)
+            self._reject_spool = pq.ParquetWriter(name, REJECT_SCHEMA)
+        self._reject_spool.write_table(
+            pa.Table.from_pandas(rejects, schema=REJECT_SCHEMA, preserve_index=False)
+        )
+
+    def _iter_rejects(self, file_path: Optional[Path] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields the spilled rejects in batches, then the ones still in memory.
+        """
+
+        rejects = self._take_rejects(file_path)
+        if self._reject_spool is not None:
+            self._reject_spool.close()
+            self._reject_spool = None
+            spool = pq.ParquetFile(self._reject_spool_path)
+            for batch in spool.iter_batches(batch_size=settings.REPORT_BATCH_SIZE):
+                yield batch.to_pandas()
+        if not rejects.empty:
+            yield rejects
+
+    def _flush_rejects(self, file_path: Optional[Path] = None) -> int:
+        """
+        Writes the collected rejects to the sink in settings.REJECTS_SINK, batch by batch.
+        Returns the number of rejects.
+        """
+
+        if not self._rejects and self._reject_spool is None:
+            return 0
+
+        counts: Dict[str, int] = {}
+
+        def counted(batches: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+            for batch in batches:
+                for reason, count in batch["reason"].value_counts().items():
+                    counts[reason] = counts.get(reason, 0) + int(count)
+                yield batch
+
+        try:
+            with self.metrics.stage("rejects"):
+                self._write_rejects(counted(self._iter_rejects(file_path)))
+        finally:
+            self._discard_reject_spool()
+
+        total = sum(counts.values())
+        if total:
+            logger.info(f"Wrote {total} rejects to '{settings.REJECTS_SINK}': {counts}")
+            self.metrics.add_rows("rejects", total)
+        return total
+
+    def _write_rejects(self, batches: Iterable[pd.DataFrame]) -> None:
+        """
+        Appends reject batches to the rejects table or to a new Parquet file
+        in settings.REJECTS_PATH.
+        """
+
+        if settings.REJECTS_SINK == "table":
+            for batch in batches:
+                self.repository.insert_rejects(batch)
+        elif settings.REJECTS_SINK == "parquet":
+            writer = None
+            for batch in batches:
+                if writer is None:
+                    settings.REJECTS_PATH.mkdir(parents=True, exist_ok=True)
+                    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+                    name = f"{self.metrics.run or 'rejects'}-{stamp}.parquet"
+                    writer = pq.ParquetWriter(
+                        settings.REJECTS_PATH / name, REJECT_SCHEMA
+                    )
+                writer.write_table(
+                    pa.Table.from_pandas(
+                        batch, schema=REJECT_SCHEMA, preserve_index=False
+                    )
+                )
+            if writer is not None:
+                writer.close()
+                logger.debug(f"Rejects written to {writer.where}")
+        elif settings.REJECTS_SINK == "none":
+            for _ in batches:
+                pass
+        else:
+            msg = f"Unknown rejects sink: {settings.REJECTS_SINK}"
+            logger.critical(msg)
+            raise ValueError(msg)
+
+    def run_import_pipeline(
+        self,
+        file_path: Path = settings.INPUT_CSV_PATH,
+        chunk_size: Optional[int] = None,
+    ) -> int:
         """
         Executes the full ETL pipeline: extract, transform, clean, and load raw data.
-        Aggregation happens later in SQL.
+        The yearly aggregate read by the BOM script is rebuilt in SQL after the load.
+        If chunk_size is set, the file is processed in streaming mode instead.
         """
 
+        if chunk_size:
+            return self._run_streaming_import(file_path, chunk_size)
+
         logger.info("Starting ETL pipeline...")
+        self.metrics = RunMetrics("import")
+        self._reset_rejects()
 
         try:
             # 1. Extract
             logger.info("Step 1: Extract")
-            df = self._read_csv(file_path)
+            with self.metrics.stage("extract"):
+                df = self._read_csv(file_path)
+            self.metrics.add_rows("extract", len(df))
 
             # 2. Transform & Clean
             logger.info("Step 2: Transform & Clean")
-            df = self._transform_columns(df)
-            df = self._clean_data_types(df)
-
-            required_cols = ["produced_material_id", "month", "year"]
-            missing = [col for col in required_cols if col not in df.columns]
-            if missing:
-                msg = f"Validation Error: Columns {missing} are missing."
-                logger.critical(msg)
-                raise ValueError(msg)
+            with self.metrics.stage("transform"):
+                df = self._transform_columns(df)
+                df = self._clean_data_types(df)
+                self._validate_columns(df)
+            self.metrics.add_rows("transform", len(df))
 
             # 3. Load
-            records = df.to_dict(orient="records")
-            logger.info(f"Step 3: Load ({len(records)} raw rows)")
+            logger.info(f"Step 3: Load ({len(df)} raw rows)")
 
-            self.repository.truncate_table()
-            self.repository.bulk_insert(records)
+            with self.metrics.stage("load"):
+                self.repository.truncate_table()
+                self.repository.reset_partition_hashes()
+                self.changed_slices = None
+                self._slice_base = None
+                loaded = self._load(df)
+                partitions: PartitionState = {}
+                self._collect_row_hashes(df, partitions)
+                self._store_partition_hashes(partitions)
+            self.metrics.add_rows("load", loaded)
 
-            logger.success(f"ETL finished successfully. Rows loaded: {len(records)}")
-            return len(records)
+            with self.metrics.stage("aggregate"):
+                self.repository.refresh_yearly_aggregate([])
+            self._flush_rejects(file_path)
+
+            logger.success(f"ETL finished successfully. Rows loaded: {loaded}")
+            return loaded
 
         except Exception as e:
             logger.exception("Critical error in ETL pipeline")
             raise e
 
-    def generate_bom_report(self) -> List[Any]:
+    def _partition_hashes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Computes an order-independent content hash and the row count
+        of every (plant_id, year, month) partition of a cleaned DataFrame.
         """
-        1. Reads and executes the SQL BOM script (calculation & insertion).
+
+        partitions: PartitionState = {}
+        self._fold_row_hashes(self._row_hashes(df), partitions)
+        return self._content_hashes(partitions)
+
+    @staticmethod
+    def _row_hashes(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Hashes every row of a cleaned DataFrame, with columns in name order,
+        next to its (plant_id, year, month) keys.
+        """
+
+        row_hashes = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False)
+        return decode_frame(df[PARTITION_KEYS]).assign(row_hash=row_hashes.to_numpy())
+
+    @staticmethod
+    def _fold_row_hashes(row_hashes: pd.DataFrame, partitions: PartitionState) -> None:
+        """
+        Adds row hashes to the running hash sum and row count of their partitions.
+        The sum commutes, so the result does not depend on row order or chunking,
+        and the state stays one entry per partition however many rows are folded in.
+        """
+
+        folded = row_hashes.groupby(PARTITION_KEYS, sort=False, observed=True)[
+            "row_hash"
+        ].agg(hash_sum="sum", row_count="size")
+        for (plant_id, year, month), hash_sum, row_count in zip(
+            folded.index, folded["hash_sum"], folded["row_count"]
+        ):
+            key = (plant_id, int(year), int(month))
+            total, count = partitions.get(key, (0, 0))
+            partitions[key] = (
+                (total + int(hash_sum)) & HASH_MASK,
+                count + int(row_count),
+            )
+
+    @staticmethod
+    def _content_hashes(partitions: PartitionState) -> pd.DataFrame:
+        """
+        Turns the folded state into the content hash and row count of every partition,
+        ordered by (plant_id, year, month).
+        """
+
+        return pd.DataFrame(
+            [
+                (
+                    plant_id,
+                    year,
+                    month,
+                    hashlib.sha256(struct.pack("<QQ", hash_sum, row_count)).hexdigest(),
+                    row_count,
+                )
+                for (plant_id, year, month), (hash_sum, row_count) in sorted(
+                    partitions.items()
+                )
+            ],
+            columns=[*PARTITION_KEYS, "content_hash", "row_count"],
+        )
+
+    def _store_partition_hashes(self, partitions: PartitionState) -> None:
+        """
+        Stores the partition hashes of a full load, so the next incremental import
+        only replaces the partitions that changed since.
+        """
+
+        if not partitions:
+            return
+        hashes = self._content_hashes(partitions)
+        logger.debug(f"Storing hashes of {len(hashes)} partitions...")
+        self.repository.store_partition_hashes(hashes.to_dict(orient="records"))
+
+    def _with_row_hashes(
+        self, frames: Iterable[pd.DataFrame], partitions: PartitionState
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Passes frames through, folding the row hashes of each one into the partition state.
+        """
+
+        for frame in frames:
+            self._collect_row_hashes(frame, partitions)
+            yield frame
+
+    def _collect_row_hashes(
+        self, frame: pd.DataFrame, partitions: PartitionState
+    ) -> None:
+        """
+        Folds the row hashes of a frame into the partition state,
+        unless it lacks a partition key column.
+        """
+
+        if all(col in frame.columns for col in PARTITION_KEYS):
+            self._fold_row_hashes(self._row_hashes(frame), partitions)
+
+    def _changed_partitions(
+        self, hashes: pd.DataFrame, stored: Dict[Tuple[str, int, int], str]
+    ) -> pd.DataFrame:
+        """
+        Keeps the partitions whose hash differs from the stored one
+        and records their (plant, year) slices in changed_slices.
+        """
+
+        is_changed = [
+            stored.get((plant_id, year, month)) != content_hash
+            for plant_id, year, month, content_hash in zip(
+                hashes["plant_id"],
+                hashes["year"],
+                hashes["month"],
+                hashes["content_hash"],
+            )
+        ]
+        changed = hashes[is_changed]
+
+        self.changed_slices = {
+            (plant_id, int(year))
+            for plant_id, year in zip(changed["plant_id"], changed["year"])
+        }
+        return changed
+
+    def run_incremental_import(self, file_path: Path = settings.INPUT_CSV_PATH) -> int:
+        """
+        Executes the ETL pipeline in delta mode: only (plant_id, year, month) partitions whose
+        content hash differs from the stored one are replaced, unchanged partitions are skipped.
+        Partitions absent from the file are kept as they are.
+        """
+
+        logger.info("Starting incremental ETL pipeline...")
+        self.metrics = RunMetrics("incremental_import")
+        self._reset_rejects()
+
+        try:
+            logger.info("Step 1: Extract")
+            with self.metrics.stage("extract"):
+                df = self._read_csv(file_path)
+            self.metrics.add_rows("extract", len(df))
+
+            logger.info("Step 2: Transform & Clean")
+            with self.metrics.stage("transform"):
+                df = self._transform_columns(df)
+                df = self._clean_data_types(df)
+                self._validate_columns(df, ["produced_material_id", *PARTITION_KEYS])
+            self.metrics.add_rows("transform", len(df))
+            self._flush_rejects(file_path)
+
+            logger.info("Step 3: Detect changed partitions")
+            with self.metrics.stage("detect"):
+                hashes = self._partition_hashes(df)
+                changed = self._changed_partitions(
+                    hashes, self.repository.get_partition_hashes()
+                )
+                raw_version, report_version = self.repository.get_data_versions()
+                self._slice_base = (
+                    raw_version if raw_version == report_version else None
+                )
+
+            if changed.empty:
+                logger.success(
+                    f"All {len(hashes)} partitions are unchanged. Nothing to load."
+                )
+                return 0
+
+            in_changed = pd.MultiIndex.from_frame(df[PARTITION_KEYS]).isin(
+                pd.MultiIndex.from_frame(changed[PARTITION_KEYS])
+            )
+            logger.info(
+                f"Step 4: Load ({len(changed)} of {len(hashes)} partitions changed, "
+                f"{in_changed.sum()} raw rows)"
+            )
+            with self.metrics.stage("load"):
+                loaded = self.repository.replace_partitions(
+                    df[in_changed], changed.to_dict(orient="records")
+                )
+            self.metrics.add_rows("load", loaded)
+
+            logger.success(
+                f"Incremental ETL finished successfully. Rows loaded: {loaded}"
+            )
+            return loaded
+
+        except Exception as e:
+            logger.exception("Critical error in incremental ETL pipeline")
+            raise e
+
+    def _load(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> int:
+        """
+        Hands cleaned data to the repository, through COPY when enabled in settings
+        or as ORM bulk inserts otherwise. Returns the number of rows loaded.
+        """
+
+        if settings.USE_COPY_LOADER:
+            return self.repository.copy_insert(data)
+
+        frames = [data] if isinstance(data, pd.DataFrame) else data
+        total = 0
+        for frame in frames:
+            records = decode_frame(frame)
+            records = records.astype(object).where(records.notna(), None)
+            records = records.to_dict(orient="records")
+            self.repository.bulk_insert(records)
+            total += len(records)
+        return total
+
+    def _iter_clean_chunks(
+        self, file_path: Path, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Reads, transforms and cleans the CSV file chunk by chunk, skipping chunks left empty.
+        """
+
+        chunks = self._read_csv_chunks(file_path, chunk_size)
+        for number, chunk in enumerate(chunks, start=1):
+            chunk = self._clean_chunk(chunk, number)
+            self._spill_rejects(file_path)
+            if not chunk.empty:
+                yield chunk
+
+    def _clean_chunk(self, chunk: pd.DataFrame, number: int) -> pd.DataFrame:
+        """
+        Transforms, cleans and validates one chunk, logging how many rows are left.
+        """
+
+        chunk = self._transform_columns(chunk)
+        chunk = self._clean_data_types(chunk)
+        self._validate_columns(chunk)
+
+        if chunk.empty:
+            logger.warning(f"Chunk {number}: no valid rows left after cleaning.")
+        else:
+            logger.info(f"Chunk {number}: loading {len(chunk)} rows")
+        return chunk
+
+    def _run_streaming_import(self, file_path: Path, chunk_size: int) -> int:
+        """
+        Streams the CSV file in chunks: each chunk is transformed, cleaned and loaded
+        as soon as it is read, so peak memory is bounded by the chunk size.
+        """
+
+        logger.info(f"Starting streaming ETL pipeline (chunk size: {chunk_size})...")
+        self.metrics = RunMetrics("streaming_import")
+        self._reset_rejects()
+
+        if not file_path.exists():
+            logger.error(f"File not found: {file_path}")
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        try:
+            self.repository.truncate_table()
+            self.repository.reset_partition_hashes()
+            self.changed_slices = None
+            self._slice_base = None
+            partitions: PartitionState = {}
+            with self.metrics.stage("load"):
+                chunks = self._iter_clean_chunks(file_path, chunk_size)
+                total = self._load(self._with_row_hashes(chunks, partitions))
+                self._store_partition_hashes(partitions)
+            self.metrics.add_rows("load", total)
+
+            with self.metrics.stage("aggregate"):
+                self.repository.refresh_yearly_aggregate([])
+            self._flush_rejects(file_path)
+
+            logger.success(f"Streaming ETL finished successfully. Rows loaded: {total}")
+            return total
+
+        except Exception as e:
+            logger.exception("Critical error in streaming ETL pipeline")
+            raise e
+
+    async def run_async_import(
+        self,
+        file_path: Path = settings.INPUT_CSV_PATH,
+        chunk_size: Optional[int] = None,
+        in_flight: Optional[int] = None,
+    ) -> int:
+        """
+        Fully reloads raw data with overlapped stages: reading, cleaning and loading run
+        concurrently and hand chunks over through queues of at most in_flight chunks.
+        A slow stage applies backpressure to the ones before it, so wall-clock time
+        approaches that of the slowest stage. Loading goes through the async repository.
+        """
+
+        if self.async_repository is None:
+            msg = "run_async_import requires an async repository."
+            logger.critical(msg)
+            raise ValueError(msg)
+
+        self._check_exists(file_path)
+        chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        in_flight = in_flight or settings.IMPORT_IN_FLIGHT
+        logger.info(
+            f"Starting async ETL pipeline (chunk size: {chunk_size}, "
+            f"in flight: {in_flight})..."
+        )
+
+        self.metrics = RunMetrics("async_import")
+        self._reset_rejects()
+        raw_chunks: asyncio.Queue = asyncio.Queue(maxsize=in_flight)
+        clean_chunks: asyncio.Queue = asyncio.Queue(maxsize=in_flight)
+        partitions: PartitionState = {}
+
+        async def extract() -> None:
+            chunks = self._read_csv_chunks(file_path, chunk_size)
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                await raw_chunks.put(chunk)
+            await raw_chunks.put(None)
+
+        async def transform() -> None:
+            number = 0
+            while (chunk := await raw_chunks.get()) is not None:
+                number += 1
+                chunk = await asyncio.to_thread(self._clean_chunk, chunk, number)
+                self._spill_rejects(file_path)
+                if not chunk.empty:
+                    await clean_chunks.put(chunk)
+            await clean_chunks.put(None)
+
+        async def cleaned() -> AsyncIterator[pd.DataFrame]:
+            while (chunk := await clean_chunks.get()) is not None:
+                await asyncio.to_thread(self._collect_row_hashes, chunk, partitions)
+                yield chunk
+
+        try:
+            with self.metrics.stage("pipeline"):
+                async with asyncio.TaskGroup() as group:
+                    group.create_task(extract())
+                    group.create_task(transform())
+                    load = group.create_task(
+                        self.async_repository.replace_all(cleaned())
+                    )
+
+            self.changed_slices = None
+            self._slice_base = None
+            total = load.result()
+            self.metrics.add_rows("pipeline", total)
+            self._store_partition_hashes(partitions)
+            self._flush_rejects(file_path)
+
+            logger.success(f"Async ETL finished successfully. Rows loaded: {total}")
+            return total
+
+        except ExceptionGroup as group:
+            logger.exception("Critical error in async ETL pipeline")
+            raise group.exceptions[0]
+
+    def run_multi_file_import(
+        self,
+        source: Union[Path, str] = settings.DATA_DIR,
+        workers: Optional[int] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Fully reloads raw data from every file in a directory or matching a glob pattern.
+        Files are parsed and cleaned concurrently in a process pool, and one loader feeds
+        the cleaned frames from a bounded queue into the repository.
+        Returns the loaded and rejected row counts per file.
+        """
+
+        files = self._resolve_files(source)
+        logger.info(f"Starting multi-file ETL pipeline ({len(files)} files)...")
+        self.metrics = RunMetrics("multi_file_import")
+        self._reset_rejects()
+
+        try:
+            self.repository.truncate_table()
+            self.repository.reset_partition_hashes()
+            self.changed_slices = None
+            self._slice_base = None
+
+            stats: Dict[str, Dict[str, int]] = {}
+            partitions: PartitionState = {}
+            with self.metrics.stage("load"):
+                frames = self._iter_clean_files(files, workers, stats)
+                total = self._load(self._with_row_hashes(frames, partitions))
+                self._store_partition_hashes(partitions)
+            self.metrics.add_rows("load", total)
+
+            with self.metrics.stage("aggregate"):
+                self.repository.refresh_yearly_aggregate([])
+            self._flush_rejects()
+
+            logger.success(
+                f"Multi-file ETL finished successfully. Rows loaded: {total}"
+            )
+            return stats
+
+        except Exception as e:
+            logger.exception("Critical error in multi-file ETL pipeline")
+            raise e
+
+    def _resolve_files(self, source: Union[Path, str]) -> List[Path]:
+        """
+        Expands a directory into its CSV, Parquet and Arrow files, or a glob pattern
+        into the matching files, in name order.
+        """
+
+        path = Path(source)
+        if path.is_dir():
+            suffixes = {".csv", *PARQUET_SUFFIXES, *ARROW_SUFFIXES}
+            files = [
+                file
+                for file in path.iterdir()
+                if file.is_file() and file.suffix.lower() in suffixes
+            ]
+        else:
+            files = [
+                Path(file) for file in glob.glob(str(source)) if Path(file).is_file()
+            ]
+
+        if not files:
+            logger.error(f"No input files found: {source}")
+            raise FileNotFoundError(f"No input files found: {source}")
+
+        return sorted(files)
+
+    def _iter_clean_files(
+        self,
+        files: List[Path],
+        workers: Optional[int],
+        stats: Dict[str, Dict[str, int]],
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields cleaned frames as worker processes finish their files. A feeder thread moves
+        results into a queue bounded by settings.IMPORT_QUEUE_SIZE, so parsing runs ahead of
+        the loader by at most that many frames. Files are submitted in a sliding window of
+        workers + IMPORT_QUEUE_SIZE tasks, and each result is dropped once it is queued.
+        Per-file counts are recorded in stats.
+        """
+
+        workers = min(workers or settings.IMPORT_WORKERS, len(files))
+        window = workers + settings.IMPORT_QUEUE_SIZE
+        frames: queue.Queue = queue.Queue(maxsize=settings.IMPORT_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def feed() -> None:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    remaining = iter(files)
+                    pending: Set[Future] = set()
+                    while True:
+                        while len(pending) < window:
+                            file = next(remaining, None)
+                            if file is None:
+                                break
+                            pending.add(pool.submit(_clean_file, file))
+                        if not pending:
+                            break
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        while done:
+                            if stop.is_set():
+                                for future in pending:
+                                    future.cancel()
+                                return
+                            file_path, df, read, rejects = done.pop().result()
+                            self._rejects.append(rejects)
+                            self._spill_rejects()
+                            stats[str(file_path)] = {
+                                "rows": len(df),
+                                "rejected": read - len(df),
+                            }
+                            logger.info(
+                                f"{file_path.name}: {len(df)} rows cleaned, "
+                                f"{read - len(df)} rejected"
+                            )
+                            put(df)
+            except BaseException as error:
+                put(error)
+            else:
+                put(None)
+
+        logger.debug(f"Parsing {len(files)} files on {workers} workers...")
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            while True:
+                item = frames.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                if not item.empty:
+                    yield item
+        finally:
+            stop.set()
+            feeder.join()
+
+    def generate_bom_report(
+        self,
+        slices: Optional[Iterable[Tuple[str, int]]] = None,
+        force: bool = False,
+    ) -> List[Any]:
+        """
+        1. Recalculates the report with refresh_bom_report.
         2. Selects and returns the calculated data from 'bom_reports' table.
         """
 
+        self.refresh_bom_report(slices, force)
+        return self._fetch_bom_report()
+
+    def refresh_bom_report(
+        self,
+        slices: Optional[Iterable[Tuple[str, int]]] = None,
+        force: bool = False,
+    ) -> None:
+        """
+        Reads and executes the SQL BOM script, which calculates and inserts the report.
+        If (plant, year) slices are given, only those slices are deleted and re-exploded,
+        unless the report was already stale before the import that changed them; then
+        the whole report is rebuilt.
+        A full calculation is skipped when the stored report was already built from the
+        current raw data version, unless force is set.
+        With settings.BOM_ENGINE set to "parallel", the explosion runs in a process pool
+        instead of the SQL script, and the result is written back in one transaction.
+        """
+
+        self.metrics = RunMetrics("bom_report")
+        raw_version, report_version = self.repository.get_data_versions()
+        if slices is not None and not self._slices_refreshable(
+            raw_version, report_version
+        ):
+            logger.warning(
+                "BOM report was not current before the last import, "
+                "refreshing all slices instead."
+            )
+            slices = None
+
+        scope = sorted(set(slices)) if slices is not None else []
+        if slices is not None and not scope:
+            logger.info("No changed slices, BOM calculation skipped.")
+            return
+
+        if slices is None and not force and raw_version == report_version:
+            logger.info(
+                f"BOM report is up to date with data version {raw_version}, "
+                f"calculation skipped."
+            )
+            return
+
+        if settings.BOM_ENGINE == "parallel":
+            self._refresh_bom_report_parallel(scope, raw_version)
+            return
+        if settings.BOM_ENGINE != "sql":
+            msg = f"Unknown BOM engine: {settings.BOM_ENGINE}"
+            logger.critical(msg)
+            raise ValueError(msg)
+
         if not settings.SQL_BOM_SCRIPT_PATH.exists():
             logger.error(f"SQL file not found: {settings.SQL_BOM_SCRIPT_PATH}")
             raise FileNotFoundError("SQL script not found")
 
-        logger.info(f"Reading SQL script: {settings.SQL_BOM_SCRIPT_PATH.name}")
-        with open(settings.SQL_BOM_SCRIPT_PATH, "r", encoding="utf-8") as f:
-            calc_query = f.read()
+        calc_query = _read_sql_script(settings.SQL_BOM_SCRIPT_PATH)
 
         try:
 
-            logger.info("Executing BOM calculation script...")
-            self.repository.session.execute(text(calc_query))
-            self.repository.session.commit()
+            if scope:
+                logger.info(f"Executing BOM calculation for {len(scope)} slices...")
+            else:
+                logger.info("Executing BOM calculation script...")
+            self.repository.set_bom_refresh_scope(scope)
+            self.repository.clear_bom_reports(scope)
+            self.repository.set_bom_max_depth(settings.BOM_MAX_DEPTH)
+            self.repository.set_report_version(raw_version)
+            with self.metrics.stage("bom_calculation"):
+                self.repository.session.execute(text(calc_query))
+                self.repository.session.commit()
 
-            logger.info("Fetching generated BOM report...")
-            select_query = """
-                SELECT * 
-                FROM bom_reports 
-                ORDER BY plant, year, fin_material_id, component_id
-            """
-
-            return self.repository.execute_raw_sql(select_query)
+            self._report_bom_diagnostics()
 
         except Exception as e:
             logger.exception("Error generating BOM report")
             self.repository.session.rollback()
             raise e
+
+    def _slices_refreshable(
+        self, raw_version: int, report_version: Optional[int]
+    ) -> bool:
+        """
+        Checks whether refreshing only the changed slices brings the report up to date:
+        the report is current, or it was current before the last incremental import
+        of this service and nothing else changed the raw data since.
+        """
+
+        if report_version == raw_version:
+            return True
+        if self._slice_base is None:
+            return False
+        return (report_version, raw_version) == (
+            self._slice_base,
+            self._slice_base + 1,
+        )
+
+    def _refresh_bom_report_parallel(
+        self, scope: List[Tuple[str, int]], raw_version: int
+    ) -> None:
+        """
+        Reads the yearly aggregate of the scope, explodes its (plant, year) partitions
+        on settings.BOM_WORKERS processes with the pandas/NumPy engine and replaces
+        the report and diagnostics rows of the scope with the sorted result.
+        """
+
+        logger.info(
+            f"Exploding BOM for {len(scope) or 'all'} slices "
+            f"on {settings.BOM_WORKERS} workers..."
+        )
+        try:
+            with self.metrics.stage("bom_calculation"):
+                frames = list(
+                    self.repository.stream_yearly(
+                        scope, batch_size=settings.REPORT_BATCH_SIZE
+                    )
+                )
+                yearly = (
+                    pd.concat(frames, ignore_index=True)
+                    if frames
+                    else pd.DataFrame(columns=GROUP_COLUMNS + QUANTITY_COLUMNS)
+                )
+                report, diagnostics = explode_yearly(
+                    yearly, settings.BOM_WORKERS, settings.BOM_MAX_DEPTH
+                )
+
+            with self.metrics.stage("bom_write"):
+                self.repository.replace_bom_reports(
+                    report, diagnostics, scope, raw_version
+                )
+            self.metrics.add_rows("bom_write", len(report))
+
+        except Exception as e:
+            logger.exception("Error generating BOM report")
+            raise e
+
+        self._report_bom_diagnostics()
+
+    def _report_bom_diagnostics(self) -> None:
+        """
+        Logs the cycles and depth-limited paths the BOM calculation recorded in 'bom_diagnostics'.
+        """
+
+        diagnostics = self.repository.get_bom_diagnostics()
+        for row in diagnostics:
+            logger.warning(
+                f"BOM {row.reason} in plant {row.plant}, year {row.year}, "
+                f"level {row.level}: {row.path}"
+            )
+
+    def _fetch_bom_report(self) -> List[Any]:
+        """
+        Selects the calculated data from 'bom_reports' table.
+        """
+
+        logger.info("Fetching generated BOM report...")
+        select_query = """
+            SELECT * 
+            FROM bom_reports 
+            ORDER BY plant, year, fin_material_id, component_id
+        """
+
+        with self.metrics.stage("fetch"):
+            rows = self.repository.execute_raw_sql(select_query)
+        self.metrics.add_rows("fetch", len(rows))
+        return rows
+
+    def count_bom_report(self) -> int:
+        """
+        Counts the rows of the 'bom_reports' table without fetching them.
+        """
+
+        return self.repository.execute_raw_sql("SELECT COUNT(*) FROM bom_reports")[0][0]
+
+    def scenario_service(self) -> ScenarioService:
+        """
+        Returns a scenario service on a snapshot of the yearly aggregate. The snapshot is read
+        once; scenarios are evaluated in memory and never touch the report tables.
+        """
+
+        logger.info("Loading yearly aggregate for scenarios...")
+        frames = list(
+            self.repository.stream_raw_sql(
+                f"SELECT {', '.join(GROUP_COLUMNS + QUANTITY_COLUMNS)} "
+                f"FROM raw_factory_yearly",
+                batch_size=settings.REPORT_BATCH_SIZE,
+            )
+        )
+        yearly = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return ScenarioService(yearly)
+
+    def where_used(
+        self,
+        component_id: str,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns every finished good that consumes the component, directly or through
+        intermediate materials, with the path, level and rolled-up requirement of each use.
+        """
+
+        rows = self.repository.get_where_used(component_id, plant, year)
+        return pd.DataFrame(rows, columns=WHERE_USED_COLUMNS)
+
+    def iter_bom_report(
+        self, batch_size: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the calculated 'bom_reports' rows as DataFrames of up to batch_size rows.
+        Pages are read with keyset pagination over the report order (plus id as a tiebreaker),
+        each on a server-side cursor, so memory stays constant however large the report is.
+        """
+
+        batch_size = batch_size or settings.REPORT_BATCH_SIZE
+        keyset = ", ".join(REPORT_KEYSET)
+        last: Optional[Dict[str, Any]] = None
+
+        logger.info(f"Streaming BOM report in batches of {batch_size}...")
+        while True:
+            after = (
+                f"WHERE ({keyset}) > ({', '.join(':' + col for col in REPORT_KEYSET)})"
+                if last
+                else ""
+            )
+            query = (
+                f"SELECT * FROM bom_reports {after} "
+                f"ORDER BY {keyset} LIMIT :batch_size"
+            )
+            params = {**(last or {}), "batch_size": batch_size}
+
+            fetched = 0
+            for frame in self.repository.stream_raw_sql(query, params, batch_size):
+                if frame.empty:
+                    continue
+                fetched += len(frame)
+                last = frame[REPORT_KEYSET].tail(1).to_dict(orient="records")[0]
+                yield frame
+
+            if fetched < batch_size:
+                return
+
+    def _report_csv(self) -> Optional[Iterator[bytes]]:
+        """
+        Returns the BOM report as a CSV byte stream exported by the database,
+        or None when the repository cannot export it natively.
+        """
+
+        return self.repository.copy_out_csv(
+            f"SELECT {', '.join(REPORT_COLUMNS)} FROM bom_reports "
+            f"ORDER BY {', '.join(REPORT_KEYSET)}"
+        )
+
+    def export_bom_report(self, path: Path = settings.REPORT_PARQUET_PATH) -> int:
+        """
+        Exports the BOM report to a Parquet dataset partitioned by plant and year,
+        replacing the whole dataset. On PostgreSQL with psycopg 3 the report is streamed with COPY TO STDOUT and parsed
+        by pyarrow; otherwise batches come from iter_bom_report. Either way the report is
+        never held in memory whole.
+        """
+
+        logger.info(f"Exporting BOM report to {path}...")
+        chunks = self._report_csv()
+        if chunks is not None:
+            written = write_report_csv(chunks, path)
+        else:
+            written = write_report(self.iter_bom_report(), path)
+        logger.success(f"BOM report exported. Rows written: {written}")
+        return written
+
+
+def _clean_file(file_path: Path) -> Tuple[Path, pd.DataFrame, int, pd.DataFrame]:
+    """
+    Reads, transforms, cleans and validates one file in a worker process.
+    Returns the path, the cleaned rows, the number of rows read and the rejects.
+    """
+
+    service = MaterialETLService(repository=None)
+    df = service._read_csv(file_path)
+    read = len(df)
+
+    df = service._transform_columns(df)
+    df = service._clean_data_types(df)
+    service._validate_columns(df)
+    return file_path, df, read, service._take_rejects(file_path)
+
+
+@lru_cache(maxsize=None)
+def _read_sql_script(path: Path) -> str:
+    """
+    Reads an SQL script once per process and keeps its text in memory.
+    """
+
+    logger.info(f"Reading SQL script: {path.name}")
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@contextmanager
+def material_service_scope(
+    database: Optional[Database] = None,
+) -> Iterator[MaterialETLService]:
+    """
+    Provides a MaterialETLService for one job on a pooled session of the shared Database.
+    PostgreSQL databases also get an async repository on the shared async engine.
+    """
+
+    database = database or get_database()
+    with database.session_scope() as session:
+        async_repository = (
+            AsyncRawDataRepository(database.async_engine)
+            if database.backend == "postgresql"
+            else None
+        )
+        yield MaterialETLService(RawDataRepository(session), async_repository)
@@ -0,0 +1,137 @@
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional
+
+from config import settings
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+METRIC_PREFIX = "bom_pipeline"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Returns the peak resident set size of the process so far, or None if unavailable.
+    """
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunMetrics:
+    """
+    Collects per-stage timings, row counts and the memory high-water mark of one pipeline run.
+    When disabled, stages and counters are no-ops.
+    """
+
+    def __init__(self, run: str = "run", enabled: Optional[bool] = None):
+        """
+        Initializes an empty run. Collection follows settings.METRICS_ENABLED unless
+        enabled is given explicitly.
+        """
+
+        self.run = run
+        self.enabled = settings.METRICS_ENABLED if enabled is None else enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.peak_rss: Optional[int] = None
+        self._started = time.perf_counter()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """
+        Times a block as the given stage. Repeated stages accumulate their time.
+        """
+
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        """
+        Adds the wall-clock time of the block to the stage and refreshes the peak RSS.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self._entry(name)
+            entry["seconds"] += time.perf_counter() - started
+            entry["calls"] += 1
+            self.peak_rss = peak_rss_bytes()
+
+    def add_rows(self, name: str, rows: int) -> None:
+        """
+        Adds processed rows to the stage counter.
+        """
+
+        if self.enabled:
+            self._entry(name)["rows"] += rows
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        """
+        Returns the counters of a stage, creating them on first use.
+        """
+
+        return self.stages.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns the run as a plain dict: total time, peak RSS and, per stage, time, calls,
+        rows and rows per second.
+        """
+
+        stages = {
+            name: {
+                **entry,
+                "rows_per_sec": (
+                    entry["rows"] / entry["seconds"] if entry["seconds"] else None
+                ),
+            }
+            for name, entry in self.stages.items()
+        }
+        return {
+            "run": self.run,
+            "enabled": self.enabled,
+            "total_seconds": time.perf_counter() - self._started,
+            "peak_rss_bytes": self.peak_rss,
+            "stages": stages,
+        }
+
+    def samples(self) -> List[str]:
+        """
+        Returns the run as Prometheus sample lines, labelled with the run and stage names.
+        """
+
+        lines = []
+        for name, entry in self.stages.items():
+            labels = f'{{run="{self.run}",stage="{name}"}}'
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{labels} {entry['seconds']}")
+            lines.append(f"{METRIC_PREFIX}_stage_rows{labels} {entry['rows']}")
+        if self.peak_rss is not None:
+            lines.append(
+                f'{METRIC_PREFIX}_peak_rss_bytes{{run="{self.run}"}} {self.peak_rss}'
+            )
+        return lines
+
+
+def to_prometheus(runs: Iterable[RunMetrics]) -> str:
+    """
+    Renders runs in the Prometheus text exposition format.
+    """
+
+    lines = [
+        f"# TYPE {METRIC_PREFIX}_stage_seconds gauge",
+        f"# TYPE {METRIC_PREFIX}_stage_rows gauge",
+        f"# TYPE {METRIC_PREFIX}_peak_rss_bytes gauge",
+    ]
+    for run in runs:
+        lines.extend(run.samples())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,222 @@
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+from loguru import logger
+
+from core.services.bom_engine import REPORT_COLUMNS
+
+LABEL = pa.dictionary(pa.int32(), pa.string())
+
+REPORT_SCHEMA = pa.schema(
+    [
+        ("plant", pa.string()),
+        ("year", pa.int32()),
+        ("fin_material_id", LABEL),
+        ("fin_material_release_type", LABEL),
+        ("fin_material_production_type", LABEL),
+        ("fin_production_quantity", pa.float64()),
+        ("prod_material_id", LABEL),
+        ("prod_material_release_type", LABEL),
+        ("prod_material_production_type", LABEL),
+        ("prod_material_production_quantity", pa.float64()),
+        ("component_id", LABEL),
+        ("component_material_release_type", LABEL),
+        ("component_material_production_type", LABEL),
+        ("component_consumption_quantity", pa.float64()),
+        ("level", pa.int32()),
+        ("unit_requirement", pa.float64()),
+        ("total_requirement", pa.float64()),
+        ("path", pa.string()),
+    ]
+)
+CSV_BUFFER_SIZE = 1 << 20
+PARTITIONING = ds.partitioning(
+    pa.schema([("plant", pa.string()), ("year", pa.int32())]), flavor="hive"
+)
+
+
+def _to_record_batches(frames: Iterable[pd.DataFrame]) -> Iterable[pa.RecordBatch]:
+    """
+    Converts report DataFrame batches to Arrow record batches with the report schema.
+    Material IDs and types are dictionary-encoded per batch.
+    """
+
+    for frame in frames:
+        frame = frame.reindex(columns=REPORT_COLUMNS)
+        arrays = [
+            (
+                pa.array(frame[field.name].astype("string")).dictionary_encode()
+                if pa.types.is_dictionary(field.type)
+                else pa.array(frame[field.name], type=field.type, from_pandas=True)
+            )
+            for field in REPORT_SCHEMA
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, schema=REPORT_SCHEMA)
+
+
+class _ChunkStream(io.RawIOBase):
+    """
+    Exposes an iterator of byte chunks as a raw binary file. Reads may return less than
+    requested, so it is wrapped in a BufferedReader before it is handed to pyarrow.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        """
+        Initializes the stream on the chunk iterator.
+        """
+
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._pending = b""
+
+    def readable(self) -> bool:
+        """
+        Marks the stream as readable.
+        """
+
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Fills the buffer from the pending chunk, pulling the next one when it is used up.
+        """
+
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = bytes(chunk)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _csv_record_batches(chunks: Iterable[bytes]) -> Iterable[pa.RecordBatch]:
+    """
+    Parses a CSV stream with a header row, as written by COPY ... TO STDOUT WITH CSV HEADER,
+    into record batches with the report schema. Unquoted empty values are NULL and
+    quoted ones empty strings, as in PostgreSQL.
+    """
+
+    reader = pv.open_csv(
+        io.BufferedReader(_ChunkStream(chunks), buffer_size=CSV_BUFFER_SIZE),
+        convert_options=pv.ConvertOptions(
+            column_types={field.name: field.type for field in REPORT_SCHEMA},
+            include_columns=REPORT_SCHEMA.names,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    yield from reader
+
+
+def write_report(frames: Iterable[pd.DataFrame], path: Path, full: bool = True) -> int:
+    """
+    Streams report batches into a Parquet dataset partitioned by plant and year
+    (hive layout: plant=<id>/year=<yyyy>). A full export replaces the whole dataset;
+    otherwise only the partitions present in the batches are replaced and the other
+    partitions already in the directory are kept. Returns the number of rows written.
+    """
+
+    return _write_batches(_to_record_batches(frames), path, full)
+
+
+def write_report_csv(chunks: Iterable[bytes], path: Path, full: bool = True) -> int:
+    """
+    Like write_report, but parses a CSV byte stream with pyarrow instead of converting
+    DataFrames, so rows exported by the database never become Python objects.
+    """
+
+    return _write_batches(_csv_record_batches(chunks), path, full)
+
+
+def _write_batches(batches: Iterable[pa.RecordBatch], path: Path, full: bool) -> int:
+    """
+    Writes record batches with the report schema to the partitioned Parquet dataset
+    and returns the number of rows written. A full export is written to a fresh sibling
+    directory that is swapped in once complete, so slices no longer in the report
+    disappear and readers never see a half-written dataset.
+    """
+
+    if not full:
+        return _write_dataset(batches, path, "delete_matching")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{path.name}-", dir=path.parent))
+    try:
+        written = _write_dataset(batches, staging, "overwrite_or_ignore")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if path.exists():
+        previous = staging.with_name(f"{staging.name}-previous")
+        path.rename(previous)
+        staging.rename(path)
+        shutil.rmtree(previous)
+    else:
+        staging.rename(path)
+    return written
+
+
+def _write_dataset(
+    batches: Iterable[pa.RecordBatch], path: Path, existing_data_behavior: str
+) -> int:
+    """
+    Writes record batches into the partitioned dataset directory and returns the number
+    of rows written.
+    """
+
+    written = 0
+
+    def counted(batches: Iterable[pa.RecordBatch]) -> Iterable[pa.RecordBatch]:
+        nonlocal written
+        for batch in batches:
+            written += batch.num_rows
+            yield batch
+
+    logger.debug(f"Writing BOM report Parquet dataset to {path}...")
+    ds.write_dataset(
+        counted(batches),
+        path,
+        schema=REPORT_SCHEMA,
+        format="parquet",
+        partitioning=PARTITIONING,
+        existing_data_behavior=existing_data_behavior,
+        basename_template="part-{i}.parquet",
+    )
+    return written
+
+
+def read_report(
+    path: Path,
+    plants: Optional[List[str]] = None,
+    years: Optional[List[int]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Reads an exported report dataset. Plant and year filters are pushed down to the
+    partition directories, so only the matching slices are opened.
+    """
+
+    if not path.exists():
+        logger.error(f"Report dataset not found: {path}")
+        raise FileNotFoundError(f"Report dataset not found: {path}")
+
+    condition = None
+    if plants is not None:
+        condition = ds.field("plant").isin(plants)
+    if years is not None:
+        by_year = ds.field("year").isin(years)
+        condition = by_year if condition is None else condition & by_year
+
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
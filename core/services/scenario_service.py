@@ -0,0 +1,322 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from config import settings
+from core.dtypes import decode_frame
+from core.services.bom_engine import (
+    DIAGNOSTIC_ORDER,
+    GROUP_COLUMNS,
+    QUANTITY_COLUMNS,
+    REPORT_ORDER,
+    REQUIREMENT_KEYS,
+    explode_yearly,
+    rollup_requirements,
+)
+
+ROOT_KEYS = ["plant_id", "year", "produced_material_id"]
+
+
+class Scenario:
+    """
+    Describes a what-if variant of the yearly BOM data as an ordered list of overrides.
+    Scenarios are immutable: every override returns a new scenario, and scenarios with the
+    same overrides share one cached result.
+    """
+
+    def __init__(self, overrides: Tuple[tuple, ...] = ()):
+        """
+        Initializes a scenario from override tuples; use the builder methods instead.
+        """
+
+        self.overrides = overrides
+
+    def set_quantity(
+        self,
+        material_id: str,
+        quantity: Optional[float] = None,
+        factor: Optional[float] = None,
+        component_id: Optional[str] = None,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> "Scenario":
+        """
+        Sets or scales a quantity: the consumption of one component if component_id is given,
+        otherwise the production quantity of the material.
+        """
+
+        if (quantity is None) == (factor is None):
+            raise ValueError("Pass exactly one of quantity or factor.")
+        return self._with(
+            ("quantity", material_id, component_id, quantity, factor, plant, year)
+        )
+
+    def substitute(
+        self,
+        component_id: str,
+        substitute_id: str,
+        material_id: Optional[str] = None,
+        plant: Optional[str] = None,
+        year: Optional[int] = None,
+    ) -> "Scenario":
+        """
+        Replaces a component with another one, in every BOM or only in that of material_id.
+        The substitute brings its own BOM if it has one in the same plant and year.
+        """
+
+        return self._with(
+            ("substitute", component_id, substitute_id, material_id, plant, year)
+        )
+
+    def remove_plant(self, plant: str) -> "Scenario":
+        """
+        Drops all data of a plant.
+        """
+
+        return self._with(("remove_plant", plant))
+
+    def _with(self, override: tuple) -> "Scenario":
+        """
+        Returns a new scenario with one more override.
+        """
+
+        return Scenario(self.overrides + (override,))
+
+    def __hash__(self) -> int:
+        return hash(self.overrides)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Scenario) and self.overrides == other.overrides
+
+    def __repr__(self) -> str:
+        return f"Scenario({list(self.overrides)})"
+
+
+class ScenarioService:
+    """
+    Evaluates what-if scenarios on a read-only copy of the yearly BOM data with the in-memory
+    engine. The base report is exploded once on first use; a scenario re-explodes only the
+    finished goods whose trees contain an overridden material and reuses all other rows.
+    Results are cached per scenario. Nothing is written to the database.
+    """
+
+    def __init__(
+        self, yearly: pd.DataFrame, cache_size: int = settings.SCENARIO_CACHE_SIZE
+    ):
+        """
+        Initializes the service with yearly aggregated rows (raw_factory_yearly layout).
+        """
+
+        self.yearly = decode_frame(
+            yearly.reindex(columns=GROUP_COLUMNS + QUANTITY_COLUMNS)
+        ).reset_index(drop=True)
+        self.cache_size = cache_size
+        self._base: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+        self._cache: "OrderedDict[Scenario, Tuple[pd.DataFrame, pd.DataFrame]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def base(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Returns the report and diagnostics of the unchanged data, exploding them on first use.
+        """
+
+        if self._base is None:
+            logger.info(f"Exploding scenario base ({len(self.yearly)} yearly rows)...")
+            self._base = self._explode(self.yearly)
+        return self._base
+
+    def evaluate(self, scenario: Scenario) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Returns the report and diagnostics of a scenario, from the cache when it was
+        evaluated before.
+        """
+
+        with self._lock:
+            if scenario in self._cache:
+                self._cache.move_to_end(scenario)
+                return self._cache[scenario]
+
+        result = self._evaluate(scenario)
+
+        with self._lock:
+            self._cache[scenario] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def compare(self, scenario: Scenario) -> pd.DataFrame:
+        """
+        Returns the rolled-up requirement per (plant, year, finished good, component)
+        in the base data and in the scenario, with the difference.
+        """
+
+        base = rollup_requirements(self.base()[0])
+        variant = rollup_requirements(self.evaluate(scenario)[0])
+
+        merged = base.merge(
+            variant,
+            on=REQUIREMENT_KEYS,
+            how="outer",
+            suffixes=("_base", "_scenario"),
+        )
+        merged["total_requirement_delta"] = merged["total_requirement_scenario"].fillna(
+            0.0
+        ) - merged["total_requirement_base"].fillna(0.0)
+        return merged.sort_values(REQUIREMENT_KEYS).reset_index(drop=True)
+
+    def _evaluate(self, scenario: Scenario) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Applies the overrides and re-explodes the finished goods they reach.
+        """
+
+        report, diagnostics = self.base()
+        yearly, changed, removed = self._apply(scenario)
+
+        if removed:
+            report = report[~report["plant"].isin(removed)]
+            diagnostics = diagnostics[~diagnostics["plant"].isin(removed)]
+
+        roots = self._affected_roots(report, yearly, changed)
+        if len(roots):
+            logger.info(f"Re-exploding {len(roots)} finished goods for {scenario}...")
+            in_slices = pd.MultiIndex.from_frame(yearly[["plant_id", "year"]]).isin(
+                roots.droplevel("produced_material_id").unique()
+            )
+            fresh_report, fresh_diagnostics = self._explode(yearly[in_slices], roots)
+            report = pd.concat(
+                [report[~self._in_roots(report, roots)], fresh_report],
+                ignore_index=True,
+            )
+            diagnostics = pd.concat(
+                [diagnostics[~self._in_roots(diagnostics, roots)], fresh_diagnostics],
+                ignore_index=True,
+            )
+
+        return (
+            report.sort_values(REPORT_ORDER, kind="stable").reset_index(drop=True),
+            diagnostics.sort_values(DIAGNOSTIC_ORDER, kind="stable").reset_index(
+                drop=True
+            ),
+        )
+
+    def _apply(self, scenario: Scenario) -> Tuple[pd.DataFrame, pd.DataFrame, list]:
+        """
+        Applies the overrides to a copy of the yearly rows. Returns the rows, the
+        (plant_id, year, produced_material_id) keys whose BOM changed and the removed plants.
+        """
+
+        yearly = self.yearly.copy()
+        changed = pd.Series(False, index=yearly.index)
+        removed = []
+
+        for override in scenario.overrides:
+            kind, *args = override
+            if kind == "remove_plant":
+                removed.append(args[0])
+                continue
+
+            if kind == "quantity":
+                material_id, component_id, quantity, factor, plant, year = args
+                rows = self._match(yearly, material_id, plant, year)
+                if component_id is not None:
+                    rows &= yearly["component_material_id"] == component_id
+                col = (
+                    "component_material_quantity"
+                    if component_id is not None
+                    else "produced_material_quantity"
+                )
+                yearly.loc[rows, col] = (
+                    quantity if factor is None else yearly.loc[rows, col] * factor
+                )
+            elif kind == "substitute":
+                component_id, substitute_id, material_id, plant, year = args
+                rows = self._match(yearly, material_id, plant, year)
+                rows &= yearly["component_material_id"] == component_id
+                yearly.loc[rows, "component_material_id"] = substitute_id
+            else:
+                raise ValueError(f"Unknown scenario override: {kind}")
+
+            changed |= rows
+
+        if removed:
+            kept = ~yearly["plant_id"].isin(removed)
+            yearly, changed = yearly[kept], changed[kept]
+
+        return yearly, yearly.loc[changed, ROOT_KEYS].drop_duplicates(), removed
+
+    @staticmethod
+    def _match(
+        yearly: pd.DataFrame,
+        material_id: Optional[str],
+        plant: Optional[str],
+        year: Optional[int],
+    ) -> pd.Series:
+        """
+        Selects the rows of a produced material (all if None), optionally in one plant or year.
+        """
+
+        rows = pd.Series(True, index=yearly.index)
+        if material_id is not None:
+            rows &= yearly["produced_material_id"] == material_id
+        if plant is not None:
+            rows &= yearly["plant_id"] == plant
+        if year is not None:
+            rows &= yearly["year"] == year
+        return rows
+
+    @staticmethod
+    def _affected_roots(
+        report: pd.DataFrame, yearly: pd.DataFrame, changed: pd.DataFrame
+    ) -> pd.MultiIndex:
+        """
+        Finds the finished goods whose exploded tree contains a material with a changed BOM,
+        using the prod_material_id column of the base report, plus changed finished goods.
+        """
+
+        if changed.empty:
+            return pd.MultiIndex.from_arrays([[], [], []], names=ROOT_KEYS)
+
+        changed_keys = pd.MultiIndex.from_frame(changed)
+        uses = pd.MultiIndex.from_frame(
+            report[["plant", "year", "prod_material_id"]]
+        ).isin(changed_keys)
+        roots = report.loc[uses, ["plant", "year", "fin_material_id"]]
+
+        fins = yearly.loc[
+            yearly["produced_material_release_type"].eq("FIN").fillna(False), ROOT_KEYS
+        ]
+        direct = fins[pd.MultiIndex.from_frame(fins).isin(changed_keys)]
+
+        return pd.MultiIndex.from_frame(
+            pd.concat([roots.set_axis(ROOT_KEYS, axis=1), direct], ignore_index=True)
+            .drop_duplicates()
+            .astype({"year": np.int64})
+        )
+
+    @staticmethod
+    def _in_roots(frame: pd.DataFrame, roots: pd.MultiIndex) -> np.ndarray:
+        """
+        Marks the report or diagnostics rows that belong to one of the given finished goods.
+        """
+
+        return pd.MultiIndex.from_frame(
+            frame[["plant", "year", "fin_material_id"]].astype({"year": np.int64})
+        ).isin(roots)
+
+    @staticmethod
+    def _explode(
+        yearly: pd.DataFrame, roots: Optional[pd.MultiIndex] = None
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Explodes yearly rows with the configured workers and depth.
+        """
+
+        return explode_yearly(
+            yearly, settings.BOM_WORKERS, settings.BOM_MAX_DEPTH, roots
+        )
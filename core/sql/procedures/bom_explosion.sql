@@ -1,23 +1,27 @@
+-- raw_factory_yearly holds the monthly raw data rolled up to years; every import keeps it current.
+-- bom_refresh_scope holds the (plant, year) slices to recalculate.
+-- It is filled by the repository in the same transaction; when empty, everything is recalculated.
+-- bom.max_depth is a transaction-local setting with the deepest hierarchy level to expand.
+-- Every hierarchy row carries the materials on its path: a component that is already on the path
+-- closes a cycle and is not expanded further. Cycles and paths cut at max depth go to bom_diagnostics.
+-- unit_requirement multiplies the consumption per produced unit of every edge down the path, giving
+-- the component needed per unit of the finished good; total_requirement scales it to the FIN output.
+-- When bom_reports is partitioned by year and plant, the repository truncates the partitions in scope
+-- (or recreates all of them) and sets bom.reports_cleared, so the DELETE below is skipped. The rows
+-- are then routed straight into the (plant, year) partitions.
 
-DELETE FROM bom_reports;
+DELETE FROM bom_reports
+WHERE current_setting('bom.reports_cleared', true) IS DISTINCT FROM 'on'
+    AND (
+        NOT EXISTS (SELECT 1 FROM bom_refresh_scope)
+        OR (plant, year) IN (SELECT plant_id, year FROM bom_refresh_scope)
+    );
+
+DELETE FROM bom_diagnostics
+WHERE NOT EXISTS (SELECT 1 FROM bom_refresh_scope)
+    OR (plant, year) IN (SELECT plant_id, year FROM bom_refresh_scope);
 
 
-INSERT INTO bom_reports (
-    plant,
-    year,
-    fin_material_id,
-    fin_material_release_type,
-    fin_material_production_type,
-    fin_production_quantity,
-    prod_material_id,
-    prod_material_release_type,
-    prod_material_production_type,
-    prod_material_production_quantity,
-    component_id,
-    component_material_release_type,
-    component_material_production_type,
-    component_consumption_quantity
-)
 WITH RECURSIVE aggregated_bom AS (
     SELECT
         plant_id,
@@ -25,22 +29,16 @@ WITH RECURSIVE aggregated_bom AS (
         produced_material_id,
         produced_material_release_type,
         produced_material_production_type,
-        SUM(produced_material_quantity) as produced_material_quantity,
+        produced_material_quantity,
         component_material_id,
         component_material_release_type,
         component_material_production_type,
-        SUM(component_material_quantity) as component_material_quantity
+        component_material_quantity
     FROM
-        raw_factory_data
-    GROUP BY
-        plant_id,
-        year,
-        produced_material_id,
-        produced_material_release_type,
-        produced_material_production_type,
-        component_material_id,
-        component_material_release_type,
-        component_material_production_type
+        raw_factory_yearly
+    WHERE
+        NOT EXISTS (SELECT 1 FROM bom_refresh_scope)
+        OR (plant_id, year) IN (SELECT plant_id, year FROM bom_refresh_scope)
 ),
 bom_hierarchy AS (
     SELECT
@@ -58,7 +56,14 @@ bom_hierarchy AS (
         r.component_material_release_type,
         r.component_material_production_type,
         r.component_material_quantity AS component_consumption_quantity,
-        1 AS level
+        1 AS level,
+        (
+            CASE WHEN r.produced_material_quantity > 0
+                THEN r.component_material_quantity / r.produced_material_quantity
+            END
+        )::double precision AS unit_requirement,
+        ARRAY[r.produced_material_id::text, r.component_material_id::text] AS path,
+        r.component_material_id = r.produced_material_id AS is_cycle
     FROM
         aggregated_bom r
     WHERE
@@ -81,7 +86,15 @@ bom_hierarchy AS (
         child.component_material_release_type,
         child.component_material_production_type,
         child.component_material_quantity,
-        parent.level + 1
+        parent.level + 1,
+        (
+            parent.unit_requirement
+            * CASE WHEN child.produced_material_quantity > 0
+                THEN child.component_material_quantity / child.produced_material_quantity
+            END
+        )::double precision,
+        parent.path || child.component_material_id::text,
+        child.component_material_id::text = ANY(parent.path)
     FROM
         aggregated_bom child
     JOIN
@@ -89,6 +102,53 @@ bom_hierarchy AS (
         ON child.produced_material_id = parent.component_id
         AND child.plant_id = parent.plant
         AND child.year = parent.year
+    WHERE
+        NOT parent.is_cycle
+        AND parent.level < current_setting('bom.max_depth')::int
+),
+diagnostics AS (
+    INSERT INTO bom_diagnostics (plant, year, fin_material_id, reason, level, path)
+    SELECT
+        h.plant,
+        h.year,
+        h.fin_material_id,
+        CASE WHEN h.is_cycle THEN 'cycle' ELSE 'max_depth' END,
+        h.level,
+        array_to_string(h.path, ' > ')
+    FROM
+        bom_hierarchy h
+    WHERE
+        h.is_cycle
+        OR (
+            h.level >= current_setting('bom.max_depth')::int
+            AND EXISTS (
+                SELECT 1
+                FROM aggregated_bom child
+                WHERE child.produced_material_id = h.component_id
+                    AND child.plant_id = h.plant
+                    AND child.year = h.year
+            )
+        )
+)
+INSERT INTO bom_reports (
+    plant,
+    year,
+    fin_material_id,
+    fin_material_release_type,
+    fin_material_production_type,
+    fin_production_quantity,
+    prod_material_id,
+    prod_material_release_type,
+    prod_material_production_type,
+    prod_material_production_quantity,
+    component_id,
+    component_material_release_type,
+    component_material_production_type,
+    component_consumption_quantity,
+    level,
+    unit_requirement,
+    total_requirement,
+    path
 )
 SELECT
     plant,
@@ -104,5 +164,9 @@ SELECT
     component_id,
     component_material_release_type,
     component_material_production_type,
-    component_consumption_quantity
-FROM bom_hierarchy;
\ No newline at end of file
+    component_consumption_quantity,
+    level,
+    unit_requirement,
+    unit_requirement * fin_production_quantity,
+    array_to_string(path, ' > ')
+FROM bom_hierarchy;
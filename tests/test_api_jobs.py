@@ -0,0 +1,168 @@
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from api import app as api_app
+from api.jobs import JobManager, ReportCache
+
+
+def wait(manager, job_id):
+    manager.shutdown()
+    return manager.get(job_id)
+
+
+def test_job_manager_records_result():
+    manager = JobManager(workers=1)
+
+    job = wait(manager, manager.submit("import", lambda: {"rows_loaded": 3}))
+
+    assert job["status"] == "done"
+    assert job["result"] == {"rows_loaded": 3}
+    assert job["finished_at"] is not None
+
+
+def test_job_manager_records_failure():
+    manager = JobManager(workers=1)
+
+    def boom():
+        raise RuntimeError("boom")
+
+    job = wait(manager, manager.submit("import", boom))
+
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert manager.get("missing") is None
+
+
+def test_job_manager_serializes_write_jobs():
+    manager = JobManager(workers=2)
+    running = threading.Event()
+    overlapped = []
+
+    def write():
+        overlapped.append(running.is_set())
+        running.set()
+        time.sleep(0.05)
+        running.clear()
+
+    job_ids = [manager.submit("import", write) for _ in range(3)]
+    manager.shutdown()
+
+    assert [manager.get(job_id)["status"] for job_id in job_ids] == ["done"] * 3
+    assert overlapped == [False, False, False]
+
+
+def test_report_cache_serves_same_version_from_memory():
+    cache = ReportCache()
+    source = MagicMock(side_effect=lambda: iter([b"a,b\n", b"1,2\n"]))
+
+    assert b"".join(cache.stream(1, source)) == b"a,b\n1,2\n"
+    assert b"".join(cache.stream(1, source)) == b"a,b\n1,2\n"
+    assert source.call_count == 1
+
+    list(cache.stream(2, source))
+    assert source.call_count == 2
+
+
+def test_report_cache_does_not_cache_unversioned_reports():
+    cache = ReportCache()
+    source = MagicMock(side_effect=lambda: iter([b"a,b\n"]))
+
+    assert b"".join(cache.stream(None, source)) == b"a,b\n"
+    assert b"".join(cache.stream(None, source)) == b"a,b\n"
+
+    assert source.call_count == 2
+    assert cache.version is None
+
+
+def test_get_report_keys_cache_on_report_version(mocker):
+    service = MagicMock()
+    service.repository.get_data_versions.return_value = (4, 3)
+
+    @contextmanager
+    def scope():
+        yield service
+
+    mocker.patch.object(api_app, "material_service_scope", scope)
+    stream = mocker.patch.object(api_app.report_cache, "stream")
+
+    api_app.get_report()
+
+    assert stream.call_args[0] == (3, api_app.report_csv)
+
+
+def test_report_cache_skips_oversized_reports():
+    cache = ReportCache(max_bytes=4)
+    source = MagicMock(side_effect=lambda: iter([b"a,b\n", b"1,2\n"]))
+
+    list(cache.stream(1, source))
+    list(cache.stream(1, source))
+
+    assert source.call_count == 2
+
+
+def test_run_import_incremental_refreshes_changed_slices(mocker):
+    service = MagicMock()
+    service.run_incremental_import.return_value = 2
+    service.changed_slices = {("P1", 2024)}
+    service.count_bom_report.return_value = 5
+
+    @contextmanager
+    def scope():
+        yield service
+
+    mocker.patch.object(api_app, "material_service_scope", scope)
+
+    result = api_app.run_import(Path("factory_data.csv"), "incremental")
+
+    assert result["rows_loaded"] == 2
+    assert result["report_rows"] == 5
+    assert len(result["metrics"]) == 2
+    service.refresh_bom_report.assert_called_once_with({("P1", 2024)})
+    service.generate_bom_report.assert_not_called()
+
+
+def test_run_import_deletes_uploaded_file(mocker, tmp_path):
+    service = MagicMock()
+    service.run_import_pipeline.side_effect = RuntimeError("boom")
+
+    @contextmanager
+    def scope():
+        yield service
+
+    mocker.patch.object(api_app, "material_service_scope", scope)
+    upload = tmp_path / "upload.csv"
+    upload.write_text("year\n")
+
+    with pytest.raises(RuntimeError):
+        api_app.run_import(upload, "full", uploaded=True)
+
+    assert not upload.exists()
+
+
+def test_get_where_used_lists_finished_goods(mocker):
+    service = MagicMock()
+    service.where_used.return_value = pd.DataFrame(
+        {
+            "fin_material_id": ["FIN-2", "FIN-1", "FIN-2"],
+            "path": ["FIN-2 > RM-1", "FIN-1 > RM-1", "FIN-2 > SEMI-1 > RM-1"],
+            "unit_requirement": [1.0, None, 2.0],
+        }
+    )
+
+    @contextmanager
+    def scope():
+        yield service
+
+    mocker.patch.object(api_app, "material_service_scope", scope)
+
+    result = api_app.get_where_used("RM-1", plant="P1")
+
+    service.where_used.assert_called_once_with("RM-1", "P1", None)
+    assert result["finished_goods"] == ["FIN-1", "FIN-2"]
+    assert result["uses"][1]["unit_requirement"] is None
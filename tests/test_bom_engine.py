@@ -0,0 +1,217 @@
+import pandas as pd
+import pytest
+
+from core.services.bom_engine import (
+    aggregate_yearly,
+    explode_bom,
+    explode_yearly,
+    rollup_requirements,
+)
+from core.services.in_memory_service import InMemoryMaterialService
+
+
+@pytest.fixture
+def raw_df():
+    return pd.DataFrame(
+        {
+            "plant_id": ["P1", "P1", "P1", "P1", "P2"],
+            "year": [2024, 2024, 2024, 2024, 2024],
+            "month": [1, 2, 1, 1, 1],
+            "produced_material_id": ["FIN-1", "FIN-1", "SEMI-1", "SEMI-1", "SEMI-1"],
+            "produced_material_release_type": ["FIN", "FIN", "PROD", "PROD", "FIN"],
+            "produced_material_production_type": ["8002", "8002", "8007", "8007", None],
+            "produced_material_quantity": [10.0, 5.0, 20.0, 20.0, 1.0],
+            "component_material_id": ["SEMI-1", "SEMI-1", "RM-1", "RM-2", "RM-3"],
+            "component_material_release_type": ["PROD", "PROD", "RM", "ADD", "RM"],
+            "component_material_production_type": ["8007", "8007", None, None, None],
+            "component_material_quantity": [12.0, 6.0, 30.0, 2.0, 4.0],
+        }
+    )
+
+
+def test_aggregate_yearly_sums_months(raw_df):
+    agg = aggregate_yearly(raw_df)
+
+    fin = agg[agg["produced_material_id"] == "FIN-1"]
+    assert len(agg) == 4
+    assert fin["produced_material_quantity"].tolist() == [15.0]
+    assert fin["component_material_quantity"].tolist() == [18.0]
+
+
+def test_explode_bom_walks_hierarchy(raw_df):
+    report = explode_bom(raw_df)
+
+    assert report[
+        ["plant", "fin_material_id", "prod_material_id", "component_id"]
+    ].values.tolist() == [
+        ["P1", "FIN-1", "SEMI-1", "RM-1"],
+        ["P1", "FIN-1", "SEMI-1", "RM-2"],
+        ["P1", "FIN-1", "FIN-1", "SEMI-1"],
+        ["P2", "SEMI-1", "SEMI-1", "RM-3"],
+    ]
+    assert report["level"].tolist() == [2, 2, 1, 1]
+    deep = report.iloc[0]
+    assert deep["fin_production_quantity"] == 15.0
+    assert deep["prod_material_production_quantity"] == 20.0
+    assert deep["component_consumption_quantity"] == 30.0
+
+
+def test_explode_bom_rolls_up_requirements(raw_df):
+    report = explode_bom(raw_df)
+
+    # FIN-1: 18 SEMI-1 per 15 produced; SEMI-1: 30 RM-1 per 20 produced
+    assert report["unit_requirement"].tolist() == pytest.approx([1.8, 0.12, 1.2, 4.0])
+    assert report["total_requirement"].tolist() == pytest.approx([27.0, 1.8, 18.0, 4.0])
+
+
+def test_explode_bom_records_paths(raw_df):
+    report = explode_bom(raw_df)
+
+    assert report["path"].tolist() == [
+        "FIN-1 > SEMI-1 > RM-1",
+        "FIN-1 > SEMI-1 > RM-2",
+        "FIN-1 > SEMI-1",
+        "SEMI-1 > RM-3",
+    ]
+
+
+def test_in_memory_where_used(raw_df, mocker):
+    service = InMemoryMaterialService()
+    mocker.patch.object(service, "_extract_clean", return_value=raw_df)
+    service.run_import_pipeline()
+    service.generate_bom_report()
+
+    uses = service.where_used("SEMI-1")
+
+    assert uses[["plant", "fin_material_id", "level"]].values.tolist() == [
+        ["P1", "FIN-1", 1]
+    ]
+    assert uses["unit_requirement"].tolist() == pytest.approx([1.2])
+    assert service.where_used("RM-3", plant="P1").empty
+    assert service.where_used("UNKNOWN").empty
+
+
+def test_in_memory_import_keeps_rejects(tmp_path):
+    path = tmp_path / "factory_data.csv"
+    path.write_text(
+        "year,month,plant_id,produced_material\n2024,1,P1,MAT-1\n2024,13,,MAT-2\n"
+    )
+    service = InMemoryMaterialService()
+
+    service.run_import_pipeline(path)
+
+    assert len(service.data) == 1
+    assert service.rejects[["source_line", "reason"]].values.tolist() == [
+        [3, "invalid_plant_id"]
+    ]
+
+    path.write_text("year,month,plant_id,produced_material\n2024,1,P1,MAT-1\n")
+    service.run_import_pipeline(path)
+    assert service.rejects.empty
+
+
+def test_rollup_requirements_sums_paths():
+    raw = pd.DataFrame(
+        {
+            "plant_id": ["P1"] * 4,
+            "year": [2024] * 4,
+            "produced_material_id": ["FIN-1", "FIN-1", "SEMI-1", "SEMI-2"],
+            "produced_material_release_type": ["FIN", "FIN", "PROD", "PROD"],
+            "produced_material_quantity": [10.0, 10.0, 5.0, 0.0],
+            "component_material_id": ["SEMI-1", "RM-1", "RM-1", "RM-1"],
+            "component_material_quantity": [20.0, 10.0, 15.0, 3.0],
+        }
+    )
+
+    report = explode_bom(raw)
+    totals = rollup_requirements(report).set_index("component_id")
+
+    # RM-1 directly (1 per unit) and through SEMI-1 (2 SEMI-1 x 3 RM-1)
+    assert totals.loc["RM-1", "unit_requirement"] == pytest.approx(7.0)
+    assert totals.loc["RM-1", "total_requirement"] == pytest.approx(70.0)
+    assert totals.loc["SEMI-1", "unit_requirement"] == pytest.approx(2.0)
+
+
+def test_explode_bom_empty():
+    report = explode_bom(pd.DataFrame())
+
+    assert report.empty
+    assert "fin_material_id" in report.columns
+
+
+def test_in_memory_service_refreshes_changed_slices(raw_df, mocker):
+    service = InMemoryMaterialService()
+    extract = mocker.patch.object(service, "_extract_clean", return_value=raw_df)
+
+    assert service.run_incremental_import() == 5
+    assert len(service.generate_bom_report()) == 4
+
+    extract.return_value = raw_df.assign(
+        component_material_quantity=[12.0, 6.0, 30.0, 2.0, 8.0]
+    )
+    assert service.run_incremental_import() == 1
+    assert service.changed_slices == {("P2", 2024)}
+
+    rows = service.generate_bom_report(service.changed_slices)
+
+    assert len(rows) == 4
+    p2 = [row for row in rows if row["plant"] == "P2"]
+    assert p2[0]["component_consumption_quantity"] == 8.0
+
+
+def test_explode_bom_parallel_matches_serial(raw_df, mocker):
+    mocker.patch("core.services.bom_engine.settings.BOM_PARALLEL_MIN_ROWS", 0)
+    data = pd.concat(
+        [raw_df.assign(plant_id=raw_df["plant_id"] + f"-{n}") for n in range(4)],
+        ignore_index=True,
+    )
+
+    serial = explode_bom(data)
+    parallel = explode_bom(data, workers=2)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def cyclic_agg(edges):
+    return aggregate_yearly(
+        pd.DataFrame(
+            {
+                "plant_id": "P1",
+                "year": 2024,
+                "produced_material_id": [parent for parent, _ in edges],
+                "produced_material_release_type": [
+                    "FIN" if parent == "FIN-1" else "PROD" for parent, _ in edges
+                ],
+                "produced_material_quantity": 1.0,
+                "component_material_id": [child for _, child in edges],
+                "component_material_quantity": 1.0,
+            }
+        )
+    )
+
+
+def test_explode_yearly_stops_at_cycles():
+    agg = cyclic_agg([("FIN-1", "A"), ("A", "B"), ("B", "A"), ("B", "RM-1")])
+
+    report, diagnostics = explode_yearly(agg)
+
+    assert report[["prod_material_id", "component_id", "level"]].values.tolist() == [
+        ["FIN-1", "A", 1],
+        ["B", "A", 3],
+        ["A", "B", 2],
+        ["B", "RM-1", 3],
+    ]
+    assert diagnostics[["reason", "level", "path"]].values.tolist() == [
+        ["cycle", 3, "FIN-1 > A > B > A"]
+    ]
+
+
+def test_explode_yearly_limits_depth():
+    agg = cyclic_agg([("FIN-1", "A"), ("A", "B"), ("B", "C"), ("C", "RM-1")])
+
+    report, diagnostics = explode_yearly(agg, max_depth=2)
+
+    assert report["level"].max() == 2
+    assert diagnostics[["reason", "level", "path"]].values.tolist() == [
+        ["max_depth", 2, "FIN-1 > A > B"]
+    ]
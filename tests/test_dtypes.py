@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from core.dtypes import compact_frame, decode_frame, memory_usage
+
+
+def test_compact_frame_shrinks_repeated_labels_and_numbers():
+    df = pd.DataFrame(
+        {
+            "plant_id": pd.array(["P1", "P2"] * 500, dtype="string[pyarrow]"),
+            "year": [2024] * 1000,
+            "month": [1, 2] * 500,
+            "produced_material_quantity": [1.5] * 1000,
+        }
+    )
+
+    compact = compact_frame(df, ["plant_id"], ["produced_material_quantity"], "float32")
+
+    assert isinstance(compact["plant_id"].dtype, pd.CategoricalDtype)
+    assert compact["year"].dtype == np.int16
+    assert compact["month"].dtype == np.int8
+    assert compact["produced_material_quantity"].dtype == np.float32
+    assert memory_usage(compact) < memory_usage(df)
+
+
+def test_decode_frame_restores_plain_types():
+    df = pd.DataFrame(
+        {
+            "plant_id": pd.Series(["P1", None], dtype="category"),
+            "month": pd.Series([1, 2], dtype="int8"),
+            "quantity": pd.Series([2843.17, np.nan], dtype="float32"),
+        }
+    )
+
+    decoded = decode_frame(df)
+
+    assert decoded["month"].dtype == np.int64
+    assert decoded["quantity"].tolist()[0] == 2843.17
+    assert np.isnan(decoded["quantity"].tolist()[1])
+    records = decoded.astype(object).where(decoded.notna(), None)
+    assert records.to_dict(orient="records")[1]["plant_id"] is None
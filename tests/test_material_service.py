@@ -1,17 +1,25 @@
+import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
 
+from core.models import Base, BomReport
 from core.repositories.raw_repository import RawDataRepository
 from core.services.material_service import MaterialETLService
+from core.services.scenario_service import Scenario
 
 
 @pytest.fixture
 def mock_repo():
     repo = MagicMock(spec=RawDataRepository)
     repo.session = MagicMock()
+    repo.get_data_versions.return_value = (1, None)
     return repo
 
 
@@ -66,6 +74,44 @@ def test_etl_transformations(service, sample_df, mocker):
     assert df_cleaned.iloc[1]["month"] == 2
 
 
+def test_clean_data_types_dtypes(service):
+    df = pd.DataFrame(
+        {
+            "plant_id": ["P1", "null", "P1"],
+            "produced_material_id": [10000, 10001, 10002],
+            "component_material_id": ["C1", None, "C3"],
+            "produced_material_production_type": [8002.0, None, 8007.0],
+            "component_material_release_type": ["ADD", None, "PROD"],
+            "component_material_quantity": [1.5, None, 2.0],
+            "month": [1, 2, 3],
+        }
+    )
+
+    df_cleaned = service._clean_data_types(df)
+
+    assert list(df_cleaned.index) == [0, 2]
+    assert list(df_cleaned["produced_material_id"]) == ["10000", "10002"]
+    assert list(df_cleaned["component_material_id"]) == ["C1", "C3"]
+    assert isinstance(
+        df_cleaned["produced_material_production_type"].dtype, pd.CategoricalDtype
+    )
+    assert list(df_cleaned["produced_material_production_type"]) == ["8002", "8007"]
+    assert df_cleaned["component_material_quantity"].dtype == "float64"
+    assert not (df_cleaned.dtypes == object).any()
+    assert isinstance(df_cleaned["plant_id"].dtype, pd.CategoricalDtype)
+    assert df_cleaned["month"].dtype == "int8"
+
+
+def test_clean_data_types_without_compact_dtypes(service, mocker):
+    mocker.patch("config.settings.COMPACT_DTYPES", False)
+    df = pd.DataFrame({"plant_id": ["P1"], "produced_material_id": ["1"], "month": [1]})
+
+    df_cleaned = service._clean_data_types(df)
+
+    assert df_cleaned["plant_id"].dtype == "string[pyarrow]"
+    assert df_cleaned["month"].dtype == "int64"
+
+
 def test_run_import_pipeline_success(service, mocker):
     mock_df = pd.DataFrame(
         {
@@ -83,17 +129,37 @@ def test_run_import_pipeline_success(service, mocker):
     mocker.patch.object(service, "_clean_data_types", return_value=mock_df)
 
     mocker.patch("config.settings.INPUT_CSV_PATH", Path("dummy.csv"))
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
 
     count = service.run_import_pipeline()
 
     assert count == 1
     service.repository.truncate_table.assert_called_once()
     service.repository.bulk_insert.assert_called_once()
+    service.repository.refresh_yearly_aggregate.assert_called_once_with([])
     args, _ = service.repository.bulk_insert.call_args
     assert len(args[0]) == 1
     assert args[0][0]["month"] == 1
 
 
+def test_run_import_pipeline_records_stage_metrics(service, mocker):
+    mock_df = pd.DataFrame(
+        {"produced_material_id": ["1"], "year": [2024], "month": [1]}
+    )
+    mocker.patch.object(service, "_read_csv", return_value=mock_df)
+    mocker.patch.object(service, "_transform_columns", return_value=mock_df)
+    mocker.patch.object(service, "_clean_data_types", return_value=mock_df)
+    mocker.patch("config.settings.METRICS_ENABLED", True)
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+
+    service.run_import_pipeline(Path("dummy.csv"))
+
+    summary = service.metrics.summary()
+    assert summary["run"] == "import"
+    assert list(summary["stages"]) == ["extract", "transform", "load", "aggregate"]
+    assert summary["stages"]["load"]["rows"] == 1
+
+
 def test_run_import_pipeline_missing_column(service, mocker):
     bad_df = pd.DataFrame(
         {
@@ -131,8 +197,13 @@ def test_generate_bom_report(service, mocker):
     mock_sql_content = "DELETE FROM reports; INSERT INTO reports..."
     mocker.patch("builtins.open", mock_open(read_data=mock_sql_content))
 
+    mocker.patch("config.settings.BOM_MAX_DEPTH", 7)
+    service.repository.get_bom_diagnostics.return_value = []
+
     service.generate_bom_report()
 
+    service.repository.set_bom_max_depth.assert_called_once_with(7)
+    service.repository.get_bom_diagnostics.assert_called_once()
     service.repository.session.execute.assert_called_once()
     service.repository.session.commit.assert_called_once()
     service.repository.execute_raw_sql.assert_called_once()
@@ -140,3 +211,720 @@ def test_generate_bom_report(service, mocker):
     call_args = service.repository.execute_raw_sql.call_args[0][0]
     assert "SELECT *" in call_args
     assert "FROM bom_reports" in call_args
+
+
+def test_run_import_pipeline_copy_loader(service, mocker):
+    mock_df = pd.DataFrame(
+        {"produced_material_id": ["1"], "year": [2024], "month": [1]}
+    )
+
+    mocker.patch.object(service, "_read_csv", return_value=mock_df)
+    mocker.patch.object(service, "_transform_columns", return_value=mock_df)
+    mocker.patch.object(service, "_clean_data_types", return_value=mock_df)
+    mocker.patch("config.settings.USE_COPY_LOADER", True)
+    service.repository.copy_insert.return_value = 1
+
+    count = service.run_import_pipeline(Path("dummy.csv"))
+
+    assert count == 1
+    service.repository.copy_insert.assert_called_once_with(mock_df)
+    service.repository.bulk_insert.assert_not_called()
+
+
+def test_run_import_pipeline_streaming(service, tmp_path, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    csv_path = tmp_path / "factory_data.csv"
+    csv_path.write_text(
+        "year,month,produced_material,component_material,plant_id,produced_material_quantity\n"
+        '2024,1,MAT-1,COMP-1,P1,"1,000.50"\n'
+        "2024,2,MAT-1,COMP-2,P1,10\n"
+        "2024,nan,MAT-1,COMP-3,P1,20\n"
+        "2024,3,,COMP-4,P1,30\n"
+        "2024,4,MAT-2,COMP-5,P1,40\n"
+    )
+
+    count = service.run_import_pipeline(csv_path, chunk_size=2)
+
+    assert count == 3
+    service.repository.truncate_table.assert_called_once()
+    assert service.repository.bulk_insert.call_count == 2
+
+    loaded = [
+        row
+        for call in service.repository.bulk_insert.call_args_list
+        for row in call[0][0]
+    ]
+    assert [row["component_material_id"] for row in loaded] == [
+        "COMP-1",
+        "COMP-2",
+        "COMP-5",
+    ]
+    assert loaded[0]["produced_material_quantity"] == 1000.5
+
+
+def test_run_import_pipeline_streaming_file_not_found(service, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        service.run_import_pipeline(tmp_path / "missing.csv", chunk_size=2)
+
+    service.repository.truncate_table.assert_not_called()
+
+
+def test_run_incremental_import_skips_unchanged_partitions(service, mocker):
+    df = pd.DataFrame(
+        {
+            "plant_id": ["P1", "P1", "P2"],
+            "year": [2024, 2024, 2024],
+            "month": [1, 2, 1],
+            "produced_material_id": ["M1", "M1", "M2"],
+            "component_material_quantity": [1.0, 2.0, 3.0],
+        }
+    )
+    stored = service._partition_hashes(df)
+    service.repository.get_partition_hashes.return_value = {
+        (row.plant_id, row.year, row.month): row.content_hash
+        for row in stored.itertuples()
+    }
+
+    changed_df = df.assign(component_material_quantity=[1.0, 5.0, 3.0])
+    mocker.patch.object(service, "_read_csv", return_value=changed_df)
+    mocker.patch.object(service, "_transform_columns", return_value=changed_df)
+    mocker.patch.object(service, "_clean_data_types", return_value=changed_df)
+    service.repository.replace_partitions.return_value = 1
+
+    count = service.run_incremental_import(Path("dummy.csv"))
+
+    assert count == 1
+    service.repository.truncate_table.assert_not_called()
+    rows, partitions = service.repository.replace_partitions.call_args[0]
+    assert list(rows["month"]) == [2]
+    assert [(p["plant_id"], p["year"], p["month"]) for p in partitions] == [
+        ("P1", 2024, 2)
+    ]
+    assert partitions[0]["row_count"] == 1
+
+
+def test_run_incremental_import_nothing_changed(service, mocker):
+    df = pd.DataFrame(
+        {
+            "plant_id": ["P1"],
+            "year": [2024],
+            "month": [1],
+            "produced_material_id": ["M1"],
+        }
+    )
+    stored = service._partition_hashes(df)
+    service.repository.get_partition_hashes.return_value = {
+        ("P1", 2024, 1): stored.loc[0, "content_hash"]
+    }
+    mocker.patch.object(service, "_read_csv", return_value=df)
+    mocker.patch.object(service, "_transform_columns", return_value=df)
+    mocker.patch.object(service, "_clean_data_types", return_value=df)
+
+    assert service.run_incremental_import(Path("dummy.csv")) == 0
+    service.repository.replace_partitions.assert_not_called()
+
+
+def test_streaming_import_stores_partition_hashes(service, tmp_path, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    csv_path = tmp_path / "factory_data.csv"
+    csv_path.write_text(
+        "year,month,produced_material,component_material,plant_id,component_material_quantity\n"
+        "2024,1,MAT-1,COMP-1,P1,1\n"
+        "2024,2,MAT-1,COMP-2,P1,2\n"
+        "2024,1,MAT-1,COMP-3,P1,3\n"
+        "2024,1,MAT-2,COMP-4,P2,4\n"
+    )
+
+    service.run_import_pipeline(csv_path, chunk_size=2)
+
+    (partitions,) = service.repository.store_partition_hashes.call_args[0]
+    assert [
+        (p["plant_id"], p["year"], p["month"], p["row_count"]) for p in partitions
+    ] == [("P1", 2024, 1, 2), ("P1", 2024, 2, 1), ("P2", 2024, 1, 1)]
+
+    service.repository.get_partition_hashes.return_value = {
+        (p["plant_id"], p["year"], p["month"]): p["content_hash"] for p in partitions
+    }
+    assert service.run_incremental_import(csv_path) == 0
+    service.repository.replace_partitions.assert_not_called()
+
+
+def test_partition_hashes_ignore_row_order(service):
+    df = pd.DataFrame(
+        {
+            "plant_id": ["P1", "P1"],
+            "year": [2024, 2024],
+            "month": [1, 1],
+            "produced_material_id": ["M1", "M2"],
+        }
+    )
+
+    forward = service._partition_hashes(df)
+    backward = service._partition_hashes(df.iloc[::-1])
+
+    assert forward["content_hash"].tolist() == backward["content_hash"].tolist()
+    assert forward["row_count"].tolist() == [2]
+
+
+def test_partition_hashes_fold_chunks(service):
+    df = pd.DataFrame(
+        {
+            "plant_id": ["P1", "P2", "P1"],
+            "year": [2024, 2024, 2024],
+            "month": [1, 1, 1],
+            "produced_material_id": ["M1", "M2", "M3"],
+        }
+    )
+
+    partitions = {}
+    for chunk in (df.iloc[:1], df.iloc[1:]):
+        service._collect_row_hashes(chunk, partitions)
+
+    assert list(partitions) == [("P1", 2024, 1), ("P2", 2024, 1)]
+    assert service._content_hashes(partitions).equals(service._partition_hashes(df))
+
+
+def test_generate_bom_report_for_slices(service, mocker):
+    mock_path = MagicMock()
+    mock_path.exists.return_value = True
+    mock_path.name = "mock_script.sql"
+    mocker.patch("config.settings.SQL_BOM_SCRIPT_PATH", mock_path)
+    mocker.patch("builtins.open", mock_open(read_data="DELETE FROM reports;"))
+    service.repository.get_data_versions.return_value = (4, 3)
+    service._slice_base = 3
+
+    service.generate_bom_report({("P2", 2024), ("P1", 2024), ("P1", 2024)})
+
+    service.repository.set_bom_refresh_scope.assert_called_once_with(
+        [("P1", 2024), ("P2", 2024)]
+    )
+    service.repository.session.execute.assert_called_once()
+    service.repository.session.commit.assert_called_once()
+
+
+def test_generate_bom_report_refreshes_all_slices_of_stale_report(service, mocker):
+    mock_path = MagicMock()
+    mock_path.exists.return_value = True
+    mocker.patch("config.settings.SQL_BOM_SCRIPT_PATH", mock_path)
+    mocker.patch("builtins.open", mock_open(read_data="DELETE FROM reports;"))
+    service.repository.get_data_versions.return_value = (5, 2)
+    service._slice_base = 4
+
+    service.generate_bom_report({("P1", 2024)})
+
+    service.repository.set_bom_refresh_scope.assert_called_once_with([])
+    service.repository.set_report_version.assert_called_once_with(5)
+
+
+def test_generate_bom_report_without_changed_slices(service):
+    service.repository.get_data_versions.return_value = (3, 3)
+
+    service.generate_bom_report(set())
+
+    service.repository.set_bom_refresh_scope.assert_not_called()
+    service.repository.session.execute.assert_not_called()
+    service.repository.execute_raw_sql.assert_called_once()
+
+
+def test_iter_bom_report_pages_by_keyset():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            BomReport(
+                plant=plant,
+                year=2024,
+                fin_material_id="FIN-1",
+                prod_material_id="FIN-1",
+                component_id=component,
+            )
+            for plant, component in [
+                ("P2", "C1"),
+                ("P1", "C2"),
+                ("P1", "C1"),
+                ("P1", "C1"),
+                ("P3", "C1"),
+            ]
+        )
+        session.commit()
+
+        service = MaterialETLService(RawDataRepository(session))
+        batches = list(service.iter_bom_report(batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    rows = pd.concat(batches, ignore_index=True)
+    assert rows[["plant", "component_id"]].values.tolist() == [
+        ["P1", "C1"],
+        ["P1", "C1"],
+        ["P1", "C2"],
+        ["P2", "C1"],
+        ["P3", "C1"],
+    ]
+    assert rows["id"].is_unique
+
+
+@pytest.fixture
+def typed_table():
+    return pa.table(
+        {
+            "year": pa.array([2024, 2024], pa.int32()),
+            "month": pa.array([1, 2], pa.int32()),
+            "plant_id": ["P1", "P1"],
+            "produced_material": ["MAT-1", "MAT-2"],
+            "component_material": ["COMP-1", None],
+            "produced_material_quantity": [1000.5, 2.0],
+            "operator_comment": ["unused", "unused"],
+        }
+    )
+
+
+def test_read_parquet_projects_columns(service, typed_table, tmp_path):
+    path = tmp_path / "factory_data.parquet"
+    pq.write_table(typed_table, path)
+
+    df = service._read_csv(path)
+
+    assert "operator_comment" not in df.columns
+    assert df["plant_id"].dtype == "string[pyarrow]"
+    assert df["produced_material_quantity"].dtype == "float64"
+
+    cleaned = service._clean_data_types(service._transform_columns(df))
+    assert cleaned["produced_material_id"].tolist() == ["MAT-1", "MAT-2"]
+    assert cleaned["component_material_id"].tolist() == ["COMP-1", ""]
+
+
+def test_read_csv_keeps_renamed_columns(service, tmp_path):
+    path = tmp_path / "factory_data.csv"
+    path.write_text(
+        "year,month,plant_id,produced_material_id,component_material_id,"
+        "produced_material_quantity,operator_comment\n"
+        "2024,1,P1,MAT-1,COMP-1,10,unused\n"
+    )
+
+    df = service._transform_columns(service._read_csv(path))
+    service._validate_columns(df)
+
+    assert "operator_comment" not in df.columns
+    assert df["produced_material_id"].tolist() == ["MAT-1"]
+
+
+def test_read_arrow_ipc_chunks(service, typed_table, tmp_path):
+    path = tmp_path / "factory_data.arrow"
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, typed_table.schema) as writer:
+            writer.write_table(typed_table)
+
+    chunks = list(service._read_csv_chunks(path, chunk_size=1))
+
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert "operator_comment" not in chunks[0].columns
+    assert chunks[1]["month"].tolist() == [2]
+
+
+def test_run_import_pipeline_writes_rejects(service, tmp_path, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    mocker.patch("config.settings.METRICS_ENABLED", True)
+    path = tmp_path / "factory_data.csv"
+    path.write_text(
+        "year,month,plant_id,produced_material,component_material,"
+        "produced_material_quantity\n"
+        "2024,1,P1,MAT-1,COMP-1,10\n"
+        "2024,1,none,MAT-1,COMP-1,10\n"
+        "2024,0,P1,MAT-1,COMP-1,10\n"
+        "2024,2,P1,MAT-1,COMP-1,ten\n"
+    )
+
+    loaded = service.run_import_pipeline(path)
+
+    assert loaded == 2
+    rejects = service.repository.insert_rejects.call_args[0][0]
+    assert rejects[["source_line", "reason", "value", "action"]].values.tolist() == [
+        [3, "invalid_plant_id", "none", "dropped"],
+        [4, "invalid_month", "0", "dropped"],
+        [5, "unparseable_quantity", "ten", "defaulted"],
+    ]
+    assert set(rejects["source"]) == {"factory_data.csv"}
+    assert '"produced_material_quantity":"ten"' in rejects["record"].iloc[2]
+    assert service.metrics.summary()["stages"]["rejects"]["rows"] == 3
+
+
+def test_streaming_parquet_rejects_keep_row_positions(
+    service, typed_table, tmp_path, mocker
+):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    mocker.patch("config.settings.REJECTS_SINK", "parquet")
+    mocker.patch("config.settings.REJECTS_PATH", tmp_path / "rejects")
+    path = tmp_path / "factory_data.parquet"
+    pq.write_table(typed_table.set_column(1, "month", pa.array([1, 0])), path)
+
+    service.run_import_pipeline(path, chunk_size=1)
+
+    service.repository.insert_rejects.assert_not_called()
+    (written,) = (tmp_path / "rejects").glob("streaming_import-*.parquet")
+    rejects = pd.read_parquet(written)
+    assert rejects[["source", "source_line", "reason"]].values.tolist() == [
+        ["factory_data.parquet", 2, "invalid_month"]
+    ]
+
+
+def test_streaming_import_spills_rejects_per_chunk(service, tmp_path, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    path = tmp_path / "factory_data.csv"
+    path.write_text(
+        "year,month,plant_id,produced_material\n"
+        "2024,0,P1,MAT-1\n2024,1,P1,MAT-1\n2024,0,P1,MAT-2\n"
+    )
+    buffered = []
+    spill = service._spill_rejects
+
+    def spill_and_record(file_path=None):
+        spill(file_path)
+        buffered.append(len(service._rejects))
+
+    mocker.patch.object(service, "_spill_rejects", side_effect=spill_and_record)
+
+    service.run_import_pipeline(path, chunk_size=1)
+
+    assert buffered == [0, 0, 0]
+    rejects = pd.concat(
+        call[0][0] for call in service.repository.insert_rejects.call_args_list
+    )
+    assert rejects["source_line"].tolist() == [2, 4]
+    assert service._reject_spool_path is None
+
+
+def test_failed_import_discards_rejects(service, tmp_path, mocker):
+    path = tmp_path / "factory_data.csv"
+    path.write_text("year,month,plant_id,produced_material\n2024,0,P1,MAT-1\n")
+    service.repository.truncate_table.side_effect = RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        service.run_import_pipeline(path)
+    service.repository.truncate_table.side_effect = None
+    path.write_text("year,month,plant_id,produced_material\n2024,1,P1,MAT-1\n")
+    service.run_import_pipeline(path)
+
+    service.repository.insert_rejects.assert_not_called()
+
+
+def test_insert_rejects_on_sqlite(service):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    df = pd.DataFrame(
+        {"plant_id": ["P1", ""], "produced_material_id": ["M1", "M2"], "month": [1, 1]}
+    )
+    service._clean_data_types(df)
+
+    with Session(engine) as session:
+        repo = RawDataRepository(session)
+        assert repo.insert_rejects(service._take_rejects(Path("plant.csv"))) == 1
+        rows = session.execute(
+            text("SELECT source, source_line, reason, column_name FROM rejects")
+        ).fetchall()
+
+    assert [tuple(row) for row in rows] == [
+        ("plant.csv", 3, "invalid_plant_id", "plant_id")
+    ]
+
+
+@pytest.fixture
+def plant_files(tmp_path):
+    header = "year,month,produced_material,component_material,plant_id\n"
+    (tmp_path / "plant_1.csv").write_text(
+        header + "2024,1,MAT-1,COMP-1,P1\n2024,2,MAT-1,COMP-1,P1\n"
+    )
+    (tmp_path / "plant_2.csv").write_text(
+        header + "2024,1,MAT-2,COMP-2,P2\n2024,nan,MAT-2,COMP-2,P2\n"
+    )
+    (tmp_path / "notes.txt").write_text("not an input file")
+    return tmp_path
+
+
+def test_run_multi_file_import(service, plant_files, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+
+    stats = service.run_multi_file_import(plant_files, workers=2)
+
+    assert stats == {
+        str(plant_files / "plant_1.csv"): {"rows": 2, "rejected": 0},
+        str(plant_files / "plant_2.csv"): {"rows": 1, "rejected": 1},
+    }
+    service.repository.truncate_table.assert_called_once()
+    loaded = [
+        row
+        for call in service.repository.bulk_insert.call_args_list
+        for row in call[0][0]
+    ]
+    assert sorted(row["plant_id"] for row in loaded) == ["P1", "P1", "P2"]
+    service.repository.refresh_yearly_aggregate.assert_called_once_with([])
+
+    rejects = service.repository.insert_rejects.call_args[0][0]
+    assert rejects[["source", "source_line", "reason"]].values.tolist() == [
+        ["plant_2.csv", 3, "invalid_month"]
+    ]
+
+
+def test_run_multi_file_import_refills_window(service, tmp_path, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+    mocker.patch("config.settings.IMPORT_QUEUE_SIZE", 1)
+    header = "year,month,produced_material,component_material,plant_id\n"
+    for plant in range(5):
+        (tmp_path / f"plant_{plant}.csv").write_text(
+            header + f"2024,1,MAT-1,COMP-1,P{plant}\n"
+        )
+
+    stats = service.run_multi_file_import(tmp_path, workers=1)
+
+    assert sorted(stats) == sorted(str(path) for path in tmp_path.glob("*.csv"))
+    assert all(counts == {"rows": 1, "rejected": 0} for counts in stats.values())
+
+
+def test_run_multi_file_import_glob(service, plant_files, mocker):
+    mocker.patch("config.settings.USE_COPY_LOADER", False)
+
+    stats = service.run_multi_file_import(str(plant_files / "*_2.csv"))
+
+    assert list(stats) == [str(plant_files / "plant_2.csv")]
+
+
+def test_run_multi_file_import_no_files(service, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        service.run_multi_file_import(tmp_path)
+
+    service.repository.truncate_table.assert_not_called()
+
+
+class FakeAsyncRepository:
+    def __init__(self):
+        self.frames = []
+
+    async def replace_all(self, frames):
+        async for frame in frames:
+            self.frames.append(frame)
+        return sum(len(frame) for frame in self.frames)
+
+
+def test_run_async_import(mock_repo, tmp_path):
+    csv_path = tmp_path / "factory_data.csv"
+    csv_path.write_text(
+        "year,month,produced_material,component_material,plant_id\n"
+        "2024,1,MAT-1,COMP-1,P1\n"
+        "2024,nan,MAT-1,COMP-2,P1\n"
+        "2024,nan,MAT-1,COMP-3,P1\n"
+        "2024,2,MAT-2,COMP-4,P1\n"
+        "2024,3,MAT-2,COMP-5,P1\n"
+    )
+    async_repo = FakeAsyncRepository()
+    service = MaterialETLService(mock_repo, async_repo)
+
+    count = asyncio.run(service.run_async_import(csv_path, chunk_size=2, in_flight=1))
+
+    assert count == 3
+    assert [len(frame) for frame in async_repo.frames] == [1, 1, 1]
+    assert async_repo.frames[-1]["component_material_id"].tolist() == ["COMP-5"]
+
+
+def test_run_async_import_requires_async_repository(service, tmp_path):
+    with pytest.raises(ValueError, match="async repository"):
+        asyncio.run(service.run_async_import(tmp_path / "factory_data.csv"))
+
+
+def test_run_async_import_propagates_stage_errors(mock_repo, tmp_path):
+    csv_path = tmp_path / "factory_data.csv"
+    csv_path.write_text("year,produced_material\n2024,MAT-1\n")
+    service = MaterialETLService(mock_repo, FakeAsyncRepository())
+
+    with pytest.raises(ValueError, match="Validation Error"):
+        asyncio.run(service.run_async_import(csv_path))
+
+
+def test_generate_bom_report_skips_current_version(service):
+    service.repository.get_data_versions.return_value = (3, 3)
+
+    service.generate_bom_report()
+
+    service.repository.session.execute.assert_not_called()
+    service.repository.execute_raw_sql.assert_called_once()
+
+
+def test_generate_bom_report_records_version(service, mocker):
+    mock_path = MagicMock()
+    mock_path.exists.return_value = True
+    mocker.patch("config.settings.SQL_BOM_SCRIPT_PATH", mock_path)
+    mocker.patch("builtins.open", mock_open(read_data="DELETE FROM reports;"))
+    service.repository.get_data_versions.return_value = (3, 3)
+
+    service.generate_bom_report(force=True)
+    service.generate_bom_report(force=True)
+
+    service.repository.set_report_version.assert_called_with(3)
+    assert service.repository.session.execute.call_count == 2
+    assert open.call_count == 1
+
+
+def test_data_versions_on_sqlite():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        repo = RawDataRepository(session)
+        assert repo.get_data_versions() == (0, None)
+
+        session.execute(text(repo._bump_version_statement()))
+        repo.set_report_version(1)
+        session.execute(text(repo._bump_version_statement()))
+
+        assert repo.get_data_versions() == (2, 1)
+
+
+def test_where_used_looks_up_component_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            BomReport(
+                plant=plant,
+                year=2024,
+                fin_material_id=fin,
+                prod_material_id=prod,
+                component_id=component,
+                level=path.count(">"),
+                path=path,
+            )
+            for plant, fin, prod, component, path in [
+                ("P1", "FIN-1", "SEMI-1", "RM-1", "FIN-1 > SEMI-1 > RM-1"),
+                ("P1", "FIN-2", "FIN-2", "RM-1", "FIN-2 > RM-1"),
+                ("P2", "FIN-1", "FIN-1", "RM-1", "FIN-1 > RM-1"),
+                ("P1", "FIN-1", "FIN-1", "SEMI-1", "FIN-1 > SEMI-1"),
+            ]
+        )
+        session.commit()
+
+        service = MaterialETLService(RawDataRepository(session))
+        uses = service.where_used("RM-1")
+        in_p1 = service.where_used("RM-1", plant="P1")
+
+    assert uses[["plant", "fin_material_id", "level"]].values.tolist() == [
+        ["P1", "FIN-1", 2],
+        ["P1", "FIN-2", 1],
+        ["P2", "FIN-1", 1],
+    ]
+    assert in_p1["path"].tolist() == ["FIN-1 > SEMI-1 > RM-1", "FIN-2 > RM-1"]
+
+
+def test_scenario_service_reads_yearly_snapshot(service):
+    service.repository.stream_raw_sql.return_value = iter(
+        [
+            pd.DataFrame(
+                {
+                    "plant_id": ["P1"],
+                    "year": [2024],
+                    "produced_material_id": ["FIN-1"],
+                    "produced_material_release_type": ["FIN"],
+                    "produced_material_quantity": [10.0],
+                    "component_material_id": ["RM-1"],
+                    "component_material_quantity": [5.0],
+                }
+            )
+        ]
+    )
+
+    scenarios = service.scenario_service()
+    report, _ = scenarios.evaluate(Scenario().set_quantity("FIN-1", 20.0))
+
+    assert "raw_factory_yearly" in service.repository.stream_raw_sql.call_args.args[0]
+    assert report["unit_requirement"].tolist() == [0.25]
+    service.repository.session.execute.assert_not_called()
+    service.repository.session.commit.assert_not_called()
+
+
+def test_imports_on_sqlite(tmp_path, mocker):
+    mocker.patch("config.settings.REJECTS_SINK", "none")
+    path = tmp_path / "factory_data.csv"
+    header = (
+        "year,month,plant_id,produced_material,component_material,"
+        "component_material_quantity\n"
+    )
+    path.write_text(
+        header + "2024,1,P1,FIN-1,RM-1,2\n2024,2,P1,FIN-1,RM-1,3\n"
+        "2024,1,P2,FIN-2,RM-2,4\n"
+    )
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    def yearly(session):
+        return session.execute(
+            text(
+                "SELECT plant_id, year, component_material_quantity "
+                "FROM raw_factory_yearly ORDER BY plant_id"
+            )
+        ).all()
+
+    with Session(engine) as session:
+        service = MaterialETLService(RawDataRepository(session))
+
+        assert service.run_import_pipeline(path) == 3
+        assert yearly(session) == [("P1", 2024, 5.0), ("P2", 2024, 4.0)]
+        assert service.run_import_pipeline(path, chunk_size=2) == 3
+        assert yearly(session) == [("P1", 2024, 5.0), ("P2", 2024, 4.0)]
+
+        path.write_text(
+            header + "2024,1,P1,FIN-1,RM-1,2\n2024,2,P1,FIN-1,RM-1,7\n"
+            "2024,1,P2,FIN-2,RM-2,4\n"
+        )
+        assert service.run_incremental_import(path) == 1
+        assert service.changed_slices == {("P1", 2024)}
+        assert yearly(session) == [("P1", 2024, 9.0), ("P2", 2024, 4.0)]
+        assert service.repository.get_data_versions() == (5, None)
+
+
+def test_generate_bom_report_in_parallel_on_sqlite(tmp_path, mocker):
+    mocker.patch("config.settings.REJECTS_SINK", "none")
+    mocker.patch("config.settings.BOM_ENGINE", "parallel")
+    mocker.patch("config.settings.BOM_WORKERS", 2)
+    mocker.patch("config.settings.BOM_PARALLEL_MIN_ROWS", 0)
+    mocker.patch("config.settings.REPORT_BATCH_SIZE", 2)
+    path = tmp_path / "factory_data.csv"
+    path.write_text(
+        "year,month,plant_id,produced_material,produced_material_release_type,"
+        "component_material,produced_material_quantity,component_material_quantity\n"
+        "2024,1,P1,FIN-1,FIN,SEMI-1,10,20\n"
+        "2024,1,P1,SEMI-1,PROD,RM-1,5,15\n"
+        "2024,1,P2,FIN-2,FIN,RM-2,4,8\n"
+    )
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(
+            BomReport(
+                plant="P3",
+                year=2024,
+                fin_material_id="OLD",
+                prod_material_id="OLD",
+                component_id="OLD",
+            )
+        )
+        session.commit()
+        service = MaterialETLService(RawDataRepository(session))
+        service.run_import_pipeline(path)
+
+        rows = service.generate_bom_report()
+        assert [(row.plant, row.component_id, row.level) for row in rows] == [
+            ("P1", "RM-1", 2),
+            ("P1", "SEMI-1", 1),
+            ("P2", "RM-2", 1),
+        ]
+        assert rows[0].total_requirement == pytest.approx(60.0)
+        raw_version, report_version = service.repository.get_data_versions()
+        assert report_version == raw_version
+
+        rows = service.generate_bom_report({("P2", 2024)})
+        assert len(rows) == 3
+
+
+def test_generate_bom_report_rejects_unknown_engine(service, mocker):
+    mocker.patch("config.settings.BOM_ENGINE", "spark")
+
+    with pytest.raises(ValueError, match="Unknown BOM engine"):
+        service.generate_bom_report(force=True)
+    service.repository.session.execute.assert_not_called()
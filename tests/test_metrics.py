@@ -0,0 +1,41 @@
+from core.services.metrics import RunMetrics, to_prometheus
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = RunMetrics("import", enabled=False)
+
+    with metrics.stage("extract"):
+        pass
+    metrics.add_rows("extract", 10)
+
+    summary = metrics.summary()
+    assert summary["enabled"] is False
+    assert summary["stages"] == {}
+
+
+def test_enabled_metrics_accumulate_stages():
+    metrics = RunMetrics("import", enabled=True)
+
+    with metrics.stage("load"):
+        pass
+    with metrics.stage("load"):
+        pass
+    metrics.add_rows("load", 100)
+
+    stage = metrics.summary()["stages"]["load"]
+    assert stage["calls"] == 2
+    assert stage["rows"] == 100
+    assert stage["seconds"] >= 0
+    assert metrics.peak_rss is None or metrics.peak_rss > 0
+
+
+def test_to_prometheus_renders_labelled_samples():
+    metrics = RunMetrics("bom_report", enabled=True)
+    with metrics.stage("fetch"):
+        pass
+    metrics.add_rows("fetch", 3)
+
+    text = to_prometheus([metrics])
+
+    assert "# TYPE bom_pipeline_stage_seconds gauge" in text
+    assert 'bom_pipeline_stage_rows{run="bom_report",stage="fetch"} 3' in text
@@ -1,5 +1,8 @@
 from unittest.mock import MagicMock
 
+import pandas as pd
+import pytest
+
 from core.models.raw_data import RawFactoryData
 from core.repositories.raw_repository import RawDataRepository
 
@@ -10,23 +13,24 @@ def test_repository_truncate_postgres_style():
 
     repo.truncate_table()
 
-    assert mock_session.execute.called
-    args, _ = mock_session.execute.call_args
-    assert "TRUNCATE TABLE" in str(args[0])
+    statements = [str(call[0][0]) for call in mock_session.execute.call_args_list]
+    assert "TRUNCATE TABLE" in statements[0]
+    assert statements[1].startswith("INSERT INTO data_versions")
     mock_session.commit.assert_called_once()
 
 
 def test_repository_truncate_fallback():
     mock_session = MagicMock()
-    mock_session.execute.side_effect = [Exception("Syntax Error"), None]
+    mock_session.execute.side_effect = [Exception("Syntax Error"), None, None]
 
     repo = RawDataRepository(mock_session)
     repo.truncate_table()
 
     mock_session.rollback.assert_called_once()
-    assert mock_session.execute.call_count == 2
-    args, _ = mock_session.execute.call_args
-    assert "DELETE FROM" in str(args[0])
+    statements = [str(call[0][0]) for call in mock_session.execute.call_args_list]
+    assert len(statements) == 3
+    assert "DELETE FROM" in statements[1]
+    assert "raw_version = data_versions.raw_version + 1" in statements[2]
     mock_session.commit.assert_called_once()
 
 
@@ -60,3 +64,343 @@ def test_execute_raw_sql():
     assert mock_session.execute.called
     args, _ = mock_session.execute.call_args
     assert str(args[0]) == query
+
+
+def test_repository_copy_insert_fallback():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "sqlite"
+    repo = RawDataRepository(mock_session)
+
+    df = pd.DataFrame(
+        {"plant_id": ["P1", "P2"], "produced_material_quantity": [1.5, None]}
+    )
+    count = repo.copy_insert(df)
+
+    assert count == 2
+    args, _ = mock_session.bulk_insert_mappings.call_args
+    assert args[0] is RawFactoryData
+    assert args[1] == [
+        {"plant_id": "P1", "produced_material_quantity": 1.5},
+        {"plant_id": "P2", "produced_material_quantity": None},
+    ]
+
+
+def test_repository_copy_insert_postgres():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_session.get_bind.return_value.dialect.driver = "psycopg"
+    cursor = (
+        mock_session.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+    )
+    copy = cursor.copy.return_value.__enter__.return_value
+    repo = RawDataRepository(mock_session)
+
+    chunks = [
+        pd.DataFrame({"plant_id": ["P1"], "component_material_id": [""], "extra": [1]}),
+        pd.DataFrame(columns=["plant_id", "component_material_id", "extra"]),
+        pd.DataFrame(
+            {"plant_id": ["P2"], "component_material_id": ["C2"], "extra": [2]}
+        ),
+    ]
+    count = repo.copy_insert(iter(chunks))
+
+    assert count == 2
+    statement = cursor.copy.call_args[0][0]
+    assert statement.startswith(
+        "COPY raw_factory_data (plant_id, component_material_id) FROM STDIN"
+    )
+    assert "FORCE_NOT_NULL (plant_id, component_material_id)" in statement
+    assert [call[0][0] for call in copy.write.call_args_list] == ["P1,\n", "P2,C2\n"]
+    mock_session.bulk_insert_mappings.assert_not_called()
+    mock_session.commit.assert_called_once()
+
+
+def test_repository_replace_partitions():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "sqlite"
+    repo = RawDataRepository(mock_session)
+
+    df = pd.DataFrame({"plant_id": ["P1"], "year": [2024], "month": [1]})
+    partitions = [
+        {
+            "plant_id": "P1",
+            "year": 2024,
+            "month": 1,
+            "content_hash": "abc",
+            "row_count": 1,
+        }
+    ]
+    count = repo.replace_partitions(df, partitions)
+
+    assert count == 1
+    statements = [str(call[0][0]) for call in mock_session.execute.call_args_list]
+    assert "CREATE TEMP TABLE raw_factory_data_staging" in statements[1]
+    assert statements[2].startswith("INSERT INTO raw_factory_data_staging")
+    assert statements[3].startswith("DELETE FROM raw_factory_data WHERE")
+    assert statements[4].startswith("INSERT INTO raw_factory_data (")
+    assert "ON CONFLICT (plant_id, year, month)" in statements[5]
+    assert mock_session.execute.call_args_list[5][0][1] == partitions
+    assert statements[-2].startswith("INSERT INTO raw_factory_yearly")
+    assert statements[-1].startswith("INSERT INTO data_versions")
+    mock_session.commit.assert_called_once()
+
+
+def test_repository_replace_partitions_rolls_back_on_error():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "sqlite"
+    mock_session.execute.side_effect = [None, None, None, Exception("boom")]
+    repo = RawDataRepository(mock_session)
+
+    df = pd.DataFrame({"plant_id": ["P1"], "year": [2024], "month": [1]})
+    with pytest.raises(Exception, match="boom"):
+        repo.replace_partitions(df, [])
+
+    mock_session.rollback.assert_called_once()
+    mock_session.commit.assert_not_called()
+
+
+def test_repository_set_bom_refresh_scope():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    repo = RawDataRepository(mock_session)
+
+    repo.set_bom_refresh_scope([("P1", 2024)])
+
+    statements = [str(call[0][0]) for call in mock_session.execute.call_args_list]
+    assert "CREATE TEMP TABLE IF NOT EXISTS bom_refresh_scope" in statements[0]
+    assert "ON COMMIT DELETE ROWS" in statements[0]
+    assert statements[1] == "DELETE FROM bom_refresh_scope;"
+    assert mock_session.execute.call_args_list[2][0][1] == [
+        {"plant_id": "P1", "year": 2024}
+    ]
+    mock_session.commit.assert_not_called()
+
+
+def test_repository_set_bom_max_depth():
+    mock_session = MagicMock()
+    repo = RawDataRepository(mock_session)
+
+    repo.set_bom_max_depth(25)
+
+    statement, params = mock_session.execute.call_args[0]
+    assert "set_config('bom.max_depth'" in str(statement)
+    assert params == {"max_depth": "25"}
+    mock_session.commit.assert_not_called()
+
+
+def test_repository_refresh_yearly_aggregate():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    repo = RawDataRepository(mock_session)
+
+    repo.refresh_yearly_aggregate([("P1", 2024)])
+
+    statements = [str(call[0][0]) for call in mock_session.execute.call_args_list]
+    assert "bom_refresh_scope" in statements[0]
+    assert statements[3].startswith("DELETE FROM raw_factory_yearly WHERE")
+    assert statements[4].startswith("INSERT INTO raw_factory_yearly")
+    assert "SUM(component_material_quantity)" in statements[4]
+    assert "GROUP BY plant_id, year, produced_material_id" in statements[4]
+    mock_session.commit.assert_called_once()
+
+
+@pytest.fixture
+def partitioned_session(mocker):
+    mocker.patch("config.settings.PARTITION_TABLES", True)
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_session.get_bind.return_value.dialect.driver = "psycopg"
+    return mock_session
+
+
+def test_partition_statements_list_years_then_plants():
+    statements = RawDataRepository._partition_statements(
+        "bom_reports", "plant", {("P'1", 2024), ("P2", 2023)}
+    )
+
+    assert statements[0] == (
+        "CREATE TABLE IF NOT EXISTS bom_reports_y2023 PARTITION OF bom_reports "
+        "(CHECK (year = 2023)) FOR VALUES IN (2023) PARTITION BY LIST (plant);"
+    )
+    assert statements[1].startswith("CREATE TABLE IF NOT EXISTS bom_reports_y2024 ")
+    leaf = RawDataRepository._partition_name("bom_reports", 2024, "P'1")
+    assert leaf.startswith("bom_reports_y2024_p")
+    assert statements[2].startswith(
+        f"CREATE TABLE IF NOT EXISTS {leaf} PARTITION OF bom_reports_y2024"
+    )
+    assert statements[2].endswith("FOR VALUES IN ('P''1');")
+    assert "FOR VALUES IN ('P2')" in statements[3]
+
+
+def test_repository_copy_insert_creates_partitions_per_chunk(partitioned_session):
+    driver_connection = partitioned_session.connection.return_value.connection
+    cursor = (
+        driver_connection.driver_connection.cursor.return_value.__enter__.return_value
+    )
+    ddl = partitioned_session.connection.return_value.exec_driver_sql
+    repo = RawDataRepository(partitioned_session)
+
+    chunks = [
+        pd.DataFrame({"plant_id": ["P1", "P1"], "year": [2024, 2024]}),
+        pd.DataFrame({"plant_id": ["P2"], "year": [2024]}),
+    ]
+    count = repo.copy_insert(iter(chunks))
+
+    assert count == 3
+    assert cursor.copy.call_count == 2
+    statements = [call[0][0] for call in ddl.call_args_list]
+    assert [s.split(" FOR VALUES IN ")[1] for s in statements] == [
+        "(2024) PARTITION BY LIST (plant_id);",
+        "('P1');",
+        "(2024) PARTITION BY LIST (plant_id);",
+        "('P2');",
+    ]
+
+
+def test_repository_truncate_creates_reload_table(partitioned_session):
+    repo = RawDataRepository(partitioned_session)
+
+    repo.truncate_table()
+
+    statements = [
+        str(call[0][0]) for call in partitioned_session.execute.call_args_list
+    ]
+    assert statements == [
+        "DROP TABLE IF EXISTS raw_factory_data_reload;",
+        "CREATE TABLE raw_factory_data_reload (LIKE raw_factory_data INCLUDING ALL) "
+        "PARTITION BY LIST (year);",
+    ]
+    partitioned_session.commit.assert_called_once()
+
+
+def test_repository_reload_swaps_partitions_on_refresh(partitioned_session):
+    driver_connection = partitioned_session.connection.return_value.connection
+    cursor = (
+        driver_connection.driver_connection.cursor.return_value.__enter__.return_value
+    )
+    ddl = partitioned_session.connection.return_value.exec_driver_sql
+    leaf = RawDataRepository._partition_name("raw_factory_data_reload", 2024, "P1")
+    children = {
+        "raw_factory_data": ["raw_factory_data_y2023"],
+        "raw_factory_data_reload": ["raw_factory_data_reload_y2024"],
+        "raw_factory_data_reload_y2024": [leaf],
+    }
+
+    def execute(statement, params=None):
+        result = MagicMock()
+        result.scalars.return_value = children.get((params or {}).get("name"), [])
+        return result
+
+    partitioned_session.execute.side_effect = execute
+    repo = RawDataRepository(partitioned_session)
+
+    repo.truncate_table()
+    repo.copy_insert(pd.DataFrame({"plant_id": ["P1"], "year": [2024]}))
+    assert cursor.copy.call_args[0][0].startswith("COPY raw_factory_data_reload ")
+    assert ddl.call_args_list[0][0][0].startswith(
+        "CREATE TABLE IF NOT EXISTS raw_factory_data_reload_y2024 "
+    )
+
+    partitioned_session.execute.reset_mock()
+    repo.refresh_yearly_aggregate([])
+
+    statements = [
+        str(call[0][0])
+        for call in partitioned_session.execute.call_args_list
+        if "pg_inherits" not in str(call[0][0])
+    ]
+    target = RawDataRepository._partition_name("raw_factory_data", 2024, "P1")
+    assert statements[:6] == [
+        "DROP TABLE raw_factory_data_y2023;",
+        "ALTER TABLE raw_factory_data_reload "
+        "DETACH PARTITION raw_factory_data_reload_y2024;",
+        f"ALTER TABLE {leaf} RENAME TO {target};",
+        "ALTER TABLE raw_factory_data_reload_y2024 RENAME TO raw_factory_data_y2024;",
+        "ALTER TABLE raw_factory_data "
+        "ATTACH PARTITION raw_factory_data_y2024 FOR VALUES IN (2024);",
+        "DROP TABLE raw_factory_data_reload;",
+    ]
+    assert any(s.startswith("INSERT INTO raw_factory_yearly") for s in statements)
+    assert partitioned_session.commit.call_count == 3
+    assert repo._load_target(RawFactoryData.__table__) == "raw_factory_data"
+
+
+def test_repository_replace_partitions_deletes_per_partition(partitioned_session):
+    partitioned_session.get_bind.return_value.dialect.driver = "psycopg2"
+    repo = RawDataRepository(partitioned_session)
+
+    df = pd.DataFrame({"plant_id": ["P1"], "year": [2024], "month": [3]})
+    partitions = [
+        {
+            "plant_id": "P1",
+            "year": 2024,
+            "month": 3,
+            "content_hash": "a",
+            "row_count": 1,
+        }
+    ]
+    repo.replace_partitions(df, partitions)
+
+    calls = partitioned_session.execute.call_args_list
+    delete = next(
+        call
+        for call in calls
+        if str(call[0][0]).startswith("DELETE FROM raw_factory_data ")
+    )
+    assert "plant_id = :plant_id AND year = :year AND month = :month" in str(
+        delete[0][0]
+    )
+    assert delete[0][1] == [{"plant_id": "P1", "year": 2024, "month": 3}]
+    yearly = next(
+        call
+        for call in calls
+        if str(call[0][0]).startswith("INSERT INTO raw_factory_yearly")
+    )
+    assert "AND year IN (2024)" in str(yearly[0][0])
+
+
+def test_repository_clear_bom_reports_truncates_slices(partitioned_session):
+    repo = RawDataRepository(partitioned_session)
+
+    assert repo.clear_bom_reports([("P2", 2024), ("P1", 2024)])
+
+    statements = [
+        str(call[0][0]) for call in partitioned_session.execute.call_args_list
+    ]
+    names = [
+        RawDataRepository._partition_name("bom_reports", 2024, plant)
+        for plant in ["P1", "P2"]
+    ]
+    assert statements[0] == f"TRUNCATE TABLE {', '.join(names)};"
+    assert "set_config('bom.reports_cleared', 'on', true)" in statements[1]
+    partitioned_session.commit.assert_not_called()
+
+
+def test_repository_clear_bom_reports_without_partitioning():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    repo = RawDataRepository(mock_session)
+
+    assert not repo.clear_bom_reports([("P1", 2024)])
+    mock_session.execute.assert_not_called()
+
+
+def test_repository_copy_out_csv():
+    mock_session = MagicMock()
+    mock_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_session.get_bind.return_value.dialect.driver = "psycopg"
+    driver_connection = mock_session.connection.return_value.connection
+    cursor = (
+        driver_connection.driver_connection.cursor.return_value.__enter__.return_value
+    )
+    copy = cursor.copy.return_value.__enter__.return_value
+    copy.__iter__.return_value = iter([memoryview(b"a\n"), memoryview(b"1\n")])
+    repo = RawDataRepository(mock_session)
+
+    assert list(repo.copy_out_csv("SELECT 1 AS a")) == [b"a\n", b"1\n"]
+    assert cursor.copy.call_args[0][0] == (
+        "COPY (SELECT 1 AS a) TO STDOUT WITH (FORMAT csv, HEADER)"
+    )
+
+    mock_session.get_bind.return_value.dialect.driver = "psycopg2"
+    assert repo.copy_out_csv("SELECT 1 AS a") is None
@@ -0,0 +1,105 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from core.services.bom_engine import explode_bom
+from core.services.in_memory_service import InMemoryMaterialService
+from core.services.material_service import MaterialETLService
+from core.services.report_parquet import read_report, write_report, write_report_csv
+
+
+@pytest.fixture
+def report():
+    return explode_bom(
+        pd.DataFrame(
+            {
+                "plant_id": ["P1", "P1", "P2"],
+                "year": [2024, 2024, 2025],
+                "produced_material_id": ["FIN-1", "SEMI-1", "FIN-2"],
+                "produced_material_release_type": ["FIN", "PROD", "FIN"],
+                "produced_material_quantity": [10.0, 20.0, 5.0],
+                "component_material_id": ["SEMI-1", "RM-1", "RM-1"],
+                "component_material_quantity": [12.0, None, 4.0],
+            }
+        )
+    )
+
+
+def test_write_report_partitions_by_plant_and_year(report, tmp_path):
+    path = tmp_path / "report"
+
+    assert write_report([report.iloc[:1], report.iloc[1:]], path) == 3
+
+    assert sorted(
+        p.relative_to(path).parent.as_posix() for p in path.rglob("*.parquet")
+    ) == [
+        "plant=P1/year=2024",
+        "plant=P2/year=2025",
+    ]
+    schema = pq.read_schema(next(path.rglob("*.parquet")))
+    assert str(schema.field("component_id").type).startswith("dictionary")
+
+
+def test_read_report_filters_slices(report, tmp_path):
+    path = tmp_path / "report"
+    write_report([report], path)
+
+    p1 = read_report(path, plants=["P1"], columns=["plant", "component_id"])
+    y2025 = read_report(path, years=[2025])
+
+    assert p1["plant"].unique().tolist() == ["P1"]
+    assert sorted(p1["component_id"].astype(str)) == ["RM-1", "SEMI-1"]
+    assert y2025["fin_material_id"].astype(str).tolist() == ["FIN-2"]
+
+
+def test_read_report_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_report(tmp_path / "missing")
+
+
+def test_export_bom_report_replaces_dataset(report, tmp_path):
+    service = InMemoryMaterialService()
+    service.report = report
+    path = tmp_path / "report"
+
+    assert service.export_bom_report(path) == 3
+    service.report = report[report["plant"] == "P1"].reset_index(drop=True)
+    assert service.export_bom_report(path) == 2
+
+    assert read_report(path)["plant"].unique().tolist() == ["P1"]
+    assert [p.name for p in tmp_path.iterdir()] == ["report"]
+
+
+def test_write_report_slices_keeps_other_partitions(report, tmp_path):
+    path = tmp_path / "report"
+    write_report([report], path)
+
+    p1 = report[report["plant"] == "P1"]
+    assert write_report([p1.iloc[:1]], path, full=False) == 1
+
+    assert sorted(read_report(path)["plant"]) == ["P1", "P2"]
+
+
+def test_write_report_csv_matches_frame_export(report, tmp_path):
+    data = report.to_csv(index=False).encode()
+    chunks = [data[start:][:7] for start in range(0, len(data), 7)]
+
+    assert write_report_csv(iter(chunks), tmp_path / "csv") == 3
+    write_report([report], tmp_path / "frames")
+
+    from_csv = read_report(tmp_path / "csv")
+    from_frames = read_report(tmp_path / "frames")
+    pd.testing.assert_frame_equal(from_csv, from_frames)
+    assert from_csv["component_consumption_quantity"].isna().sum() == 1
+
+
+def test_export_bom_report_streams_copy_csv(report, mocker, tmp_path):
+    repository = mocker.MagicMock()
+    repository.copy_out_csv.return_value = iter([report.to_csv(index=False).encode()])
+    service = MaterialETLService(repository)
+    iter_report = mocker.patch.object(service, "iter_bom_report")
+
+    assert service.export_bom_report(tmp_path / "report") == 3
+
+    assert repository.copy_out_csv.call_args[0][0].startswith("SELECT plant, year")
+    iter_report.assert_not_called()
@@ -0,0 +1,107 @@
+import pandas as pd
+import pytest
+
+from core.services.bom_engine import aggregate_yearly, explode_yearly
+from core.services.scenario_service import Scenario, ScenarioService
+
+
+@pytest.fixture
+def yearly():
+    return aggregate_yearly(
+        pd.DataFrame(
+            {
+                "plant_id": ["P1", "P1", "P1", "P1", "P1", "P2"],
+                "year": [2024] * 6,
+                "produced_material_id": [
+                    "FIN-1",
+                    "FIN-2",
+                    "SEMI-1",
+                    "SEMI-1",
+                    "SEMI-2",
+                    "FIN-1",
+                ],
+                "produced_material_release_type": [
+                    "FIN",
+                    "FIN",
+                    "PROD",
+                    "PROD",
+                    "PROD",
+                    "FIN",
+                ],
+                "produced_material_quantity": [10.0, 4.0, 20.0, 20.0, 5.0, 1.0],
+                "component_material_id": [
+                    "SEMI-1",
+                    "RM-9",
+                    "RM-1",
+                    "RM-2",
+                    "RM-3",
+                    "RM-1",
+                ],
+                "component_material_quantity": [12.0, 8.0, 30.0, 2.0, 10.0, 4.0],
+            }
+        )
+    )
+
+
+def full_explosion(yearly):
+    report, _ = explode_yearly(yearly)
+    return report
+
+
+def test_scenario_matches_full_explosion(yearly):
+    service = ScenarioService(yearly)
+    scenario = Scenario().set_quantity("SEMI-1", factor=2.0).substitute("RM-2", "RM-4")
+
+    report, _ = service.evaluate(scenario)
+
+    changed = yearly.copy()
+    semi = changed["produced_material_id"] == "SEMI-1"
+    changed.loc[semi, "produced_material_quantity"] *= 2
+    changed.loc[changed["component_material_id"] == "RM-2", "component_material_id"] = (
+        "RM-4"
+    )
+    pd.testing.assert_frame_equal(report, full_explosion(changed))
+
+
+def test_scenario_re_explodes_only_affected_finished_goods(yearly, mocker):
+    service = ScenarioService(yearly)
+    service.base()
+    explode = mocker.spy(service, "_explode")
+
+    report, _ = service.evaluate(
+        Scenario().substitute("SEMI-1", "SEMI-2", material_id="FIN-1", plant="P1")
+    )
+
+    roots = explode.call_args.args[1]
+    assert list(roots) == [("P1", 2024, "FIN-1")]
+    fin_1 = report[(report["plant"] == "P1") & (report["fin_material_id"] == "FIN-1")]
+    assert fin_1["path"].tolist() == ["FIN-1 > SEMI-2 > RM-3", "FIN-1 > SEMI-2"]
+    assert len(report[report["fin_material_id"] == "FIN-2"]) == 1
+
+
+def test_scenario_results_are_cached(yearly, mocker):
+    service = ScenarioService(yearly)
+    evaluate = mocker.spy(service, "_evaluate")
+
+    first = service.evaluate(Scenario().remove_plant("P2"))
+    second = service.evaluate(Scenario().remove_plant("P2"))
+
+    assert evaluate.call_count == 1
+    assert first is second
+    assert set(first[0]["plant"]) == {"P1"}
+
+
+def test_compare_reports_requirement_delta(yearly):
+    service = ScenarioService(yearly)
+
+    delta = service.compare(
+        Scenario().set_quantity("FIN-2", 16.0, component_id="RM-9")
+    ).set_index(["plant", "fin_material_id", "component_id"])
+
+    assert delta.loc[("P1", "FIN-2", "RM-9"), "total_requirement_delta"] == 8.0
+    assert delta.loc[("P1", "FIN-1", "RM-1"), "total_requirement_delta"] == 0.0
+
+
+def test_scenario_rejects_ambiguous_quantity():
+    with pytest.raises(ValueError):
+        Scenario().set_quantity("FIN-1", 1.0, factor=2.0)
@@ -0,0 +1,28 @@
+from benchmarks.synthetic_data import generate_factory_data, tree_edges
+from core.services.bom_engine import explode_bom
+from core.services.material_service import MaterialETLService
+
+
+def test_tree_edges_follow_depth_and_fan_out():
+    parent, child, level = tree_edges(depth=2, fan_out=3)
+
+    assert len(child) == 3 + 9
+    assert list(parent[:3]) == [0, 0, 0]
+    assert level.max() == 2
+
+
+def test_generated_data_cleans_and_explodes():
+    df = generate_factory_data(
+        2_000, plants=2, months=2, dirty_ratio=0.2, nan_id_ratio=0.05
+    )
+
+    assert len(df) >= 2_000
+    assert df["produced_material_quantity"].str.contains(",").any()
+
+    service = MaterialETLService(repository=None)
+    clean = service._clean_data_types(service._transform_columns(df.copy()))
+    assert 0 < len(clean) < len(df)
+
+    report = explode_bom(clean)
+    assert set(report["plant"]) == {"RLT_10", "RLT_11"}
+    assert report["level"].max() == 3